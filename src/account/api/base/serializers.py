@@ -1,8 +1,17 @@
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from account.models import Profile, User
+from account.principal import Principal, get_principal_claims
+from utils.base.exceptions import Conflict
+from utils.base.fieldsets import SparseFieldsMixin
+from utils.base.mixins import ChangedFieldsMixin
 from utils.base.validators import validate_special_char
 
 
@@ -18,6 +27,31 @@ access token every {settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']} minutes ")
         help_text='Used in headers to authenticate users')
 
 
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that reads the principal claims from the database,
+    simplejwt copies them from the refresh token otherwise, so a demoted
+    or deactivated user would keep them until logging in again
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if not settings.PRINCIPAL_TOKEN_CLAIMS:
+            return data
+
+        refresh = RefreshToken(data.get('refresh', attrs['refresh']))
+        principal = Principal.from_db(refresh[api_settings.USER_ID_CLAIM])
+        if principal is None or not principal.is_active:
+            raise TokenError('User is inactive or does not exist')
+
+        for claim, value in get_principal_claims(principal).items():
+            refresh[claim] = value
+        data['access'] = str(refresh.access_token)
+        if 'refresh' in data:
+            data['refresh'] = str(refresh)
+        return data
+
+
 class TokenGenerateSerializer(serializers.Serializer):
     id = serializers.IntegerField()
 
@@ -45,19 +79,28 @@ class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('password', 'email', 'first_name', 'last_name')
+        extra_kwargs = {
+            # Unique email is enforced by the database on create,
+            # instead of a query before it
+            'email': {'validators': []},
+        }
 
     def create(self, validated_data):
         email = validated_data.get('email')
-        password = validated_data.get('password')
-        user = User.objects.create_user(email=email, password=password)
-
-        # Get the profile and update the first and last names
-        profile = user.profile
-        profile.first_name = validated_data.get('first_name')
-        profile.last_name = validated_data.get('last_name')
-        profile.save()
-
-        return user
+        try:
+            return User.objects.create_user_with_profile(
+                email=email,
+                password=validated_data.get('password'),
+                first_name=validated_data.get('first_name'),
+                last_name=validated_data.get('last_name'),
+            )
+        except IntegrityError:
+            # Also raised for usernames still taken after the retries
+            if User.objects.filter(
+                    email=User.objects.normalize_email(email)).exists():
+                raise serializers.ValidationError(
+                    {'email': 'user with this email already exists.'})
+            raise Conflict
 
 
 class LoginSerializer(serializers.Serializer):
@@ -85,15 +128,42 @@ class LoginSerializer(serializers.Serializer):
         return attrs
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class OtpRequestSerializer(serializers.Serializer):
+    email = serializers.EmailField(
+        required=True, help_text='Email to send the login code to')
+
+    def validate_email(self, value):
+        # Codes and user lookups do not depend on the case of the email
+        return User.objects.normalize_email(value).lower()
+
+
+class OtpVerifySerializer(OtpRequestSerializer):
+    email = serializers.EmailField(required=True)
+    otp = serializers.CharField(
+        required=True, min_length=settings.OTP_LENGTH,
+        max_length=settings.OTP_LENGTH, help_text='Login code sent to email')
+
+
+class UsernameAvailableSerializer(serializers.Serializer):
+    username = serializers.CharField(
+        max_length=60, validators=[validate_special_char])
+    available = serializers.BooleanField(read_only=True)
+
+
+class ProfileSerializer(
+    ChangedFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     fullname = serializers.CharField(read_only=True)
 
     class Meta:
         model = Profile
-        fields = '__all__'
+        # The version is sent in the ETag header
+        exclude = ['version']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(
+    ChangedFieldsMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     profile = ProfileSerializer(read_only=True)
 
     class Meta:
@@ -102,6 +172,7 @@ class UserSerializer(serializers.ModelSerializer):
             'email',
             'profile'
         ]
+        expandable_fields = ['profile']
 
     def validate_phoneno(self, value):
         if value:
@@ -119,6 +190,39 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
 
+class UserBatchLookupSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list)
+    emails = serializers.ListField(
+        child=serializers.EmailField(), default=list)
+
+    def validate(self, attrs):
+        count = len(attrs['ids']) + len(attrs['emails'])
+        if not count:
+            raise serializers.ValidationError(
+                'Pass the ids or emails of the users to look up')
+
+        limit = settings.USER_BATCH_LOOKUP_LIMIT
+        if count > limit:
+            raise serializers.ValidationError(
+                f'At most {limit} ids and emails can be looked up at once')
+        return attrs
+
+
+class UserBatchMissingSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField())
+    emails = serializers.ListField(child=serializers.EmailField())
+
+
+class UserBatchLookupResponseSerializer(serializers.Serializer):
+    ids = serializers.DictField(
+        child=UserSerializer(), help_text='Users found by id')
+    emails = serializers.DictField(
+        child=UserSerializer(), help_text='Users found by email')
+    missing = UserBatchMissingSerializer(
+        help_text='Ids and emails without a user')
+
+
 class ForgetChangePasswordSerializerSwagger(serializers.Serializer):
     new_password = serializers.CharField(
         write_only=True, required=True, validators=[validate_password])
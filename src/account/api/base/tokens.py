@@ -1,6 +1,12 @@
+from typing import Optional
+
+from django.conf import settings
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
 import six
 
+from utils.base.general import compare_hash, random_otp, sha256_hash
+
 
 class EmailConfirmationToken(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
@@ -15,4 +21,66 @@ class EmailConfirmationToken(PasswordResetTokenGenerator):
         )
 
 
+class LoginOtpGenerator:
+    """
+    Generates one time passwords for passwordless login.
+
+    Only a keyed hash of the otp is stored, in the cache,
+    with an attempt counter, both expire with settings.OTP_TIMEOUT
+    """
+
+    key_prefix = 'login-otp'
+
+    def get_cache_key(self, email: str, suffix: str = '') -> str:
+        return f"{self.key_prefix}:{sha256_hash(email.lower())}{suffix}"
+
+    def hash_otp(self, email: str, otp: str) -> str:
+        return sha256_hash(f"{email.lower()}:{otp}")
+
+    def make_otp(self, email: str) -> Optional[str]:
+        """
+        Create and store a new otp for email, returns None if an
+        otp was sent to email less than settings.OTP_RESEND_TIMEOUT ago
+        """
+        sent_key = self.get_cache_key(email, ':sent')
+        if not cache.add(sent_key, 1, timeout=settings.OTP_RESEND_TIMEOUT):
+            return None
+
+        otp = random_otp(settings.OTP_LENGTH)
+        cache.set_many({
+            self.get_cache_key(email): self.hash_otp(email, otp),
+            self.get_cache_key(email, ':attempts'): 0,
+        }, timeout=settings.OTP_TIMEOUT)
+        return otp
+
+    def check_otp(self, email: str, otp: str) -> bool:
+        """
+        Check otp is valid for email, an otp can only be used once
+        and is discarded after settings.OTP_MAX_ATTEMPTS wrong tries
+        """
+        key = self.get_cache_key(email)
+        attempts_key = self.get_cache_key(email, ':attempts')
+
+        hashed = cache.get(key)
+        if hashed is None:
+            return False
+
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            # Attempts counter expired with the otp
+            return False
+
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            cache.delete_many([key, attempts_key])
+            return False
+
+        if not compare_hash(hashed, self.hash_otp(email, otp)):
+            return False
+
+        cache.delete_many([key, attempts_key])
+        return True
+
+
 account_confirm_token = EmailConfirmationToken()
+login_otp = LoginOtpGenerator()
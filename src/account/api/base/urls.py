@@ -1,10 +1,15 @@
 from django.urls import path
+from rest_framework.urlpatterns import format_suffix_patterns
+
 from . import views
 
 app_name = 'auth'
 urlpatterns = [
     path('register/', views.RegisterAPIView.as_view(), name='register'),
     path('login/', views.LoginAPIView.as_view(), name='login'),
+    path('otp/request/', views.OtpRequestAPIView.as_view(),
+         name='otp_request'),
+    path('otp/verify/', views.OtpVerifyAPIView.as_view(), name='otp_verify'),
     path('forget-password/<str:email>/',
          views.ForgetPasswordView.as_view(), name='forget_password'),
 
@@ -23,6 +28,13 @@ urlpatterns = [
          views.ProfileAPIView.as_view(), name='detail_profile'),
 
     # Paths for getting and finding user informations
-    path('users/', views.UserListView.as_view(), name='user_list'),
+    *format_suffix_patterns([
+        path('users/', views.UserListView.as_view(), name='user_list'),
+    ], allowed=['ndjson']),
     path('users/detail/', views.UserAPIView.as_view(), name='user_data'),
+    path('users/batch/', views.UserBatchLookupView.as_view(),
+         name='user_batch'),
+    path('batch/', views.AccountBatchAPIView.as_view(), name='batch'),
+    path('username/available/<str:username>/',
+         views.UsernameAvailableAPIView.as_view(), name='username_available'),
 ]
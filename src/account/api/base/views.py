@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
@@ -7,17 +8,25 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
-from account.models import Profile, User
-from utils.base.general import get_tokens_for_user
+from account.lookup import lookup_users
+from account.models import Profile, User, taken_usernames
+from account.principal import get_model_user
+from utils.base.batch import (BatchAPIView, BatchRequestSerializer,
+                              BatchResponseSerializer)
+from utils.base.columnar import ColumnarListMixin
+from utils.base.fieldsets import SparseFieldsViewMixin
+from utils.base.general import get_tokens_for_user, send_email_async
+from utils.base.mixins import ConditionalUpdateMixin
+from utils.base.streaming import NDJSONListMixin
+from utils.base.timing import ServerTimingMixin
 
 from . import serializers
 from .permissions import PermA, PermB
-from .tokens import account_confirm_token
+from .tokens import account_confirm_token, login_otp
 
 
-class TokenVerifyAPIView(APIView):
+class TokenVerifyAPIView(ServerTimingMixin, APIView):
     """
     An authentication plugin that checks if a jwt
     access token is still valid and returns the user info.
@@ -44,13 +53,13 @@ class TokenVerifyAPIView(APIView):
         return Response(data=user_details)
 
 
-class TokenRefreshAPIView(APIView):
+class TokenRefreshAPIView(ServerTimingMixin, APIView):
     permission_classes = (PermA,)
-    serializer_class = TokenRefreshSerializer
+    serializer_class = serializers.PrincipalTokenRefreshSerializer
 
     @swagger_auto_schema(
-        request_body=TokenRefreshSerializer,
-        responses={200: TokenRefreshSerializer}
+        request_body=serializers.PrincipalTokenRefreshSerializer,
+        responses={200: serializers.PrincipalTokenRefreshSerializer}
     )
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -63,7 +72,7 @@ class TokenRefreshAPIView(APIView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
-class LoginAPIView(APIView):
+class LoginAPIView(ServerTimingMixin, APIView):
     permission_classes = (PermA,)
     serializer_class = serializers.LoginSerializer
 
@@ -117,7 +126,115 @@ class LoginAPIView(APIView):
             return Response(data=serializer.errors, status='400')
 
 
-class ForgetPasswordView(APIView):
+class OtpRequestAPIView(ServerTimingMixin, APIView):
+    """
+    Send a one time login code to the email of an active user.
+
+    Always responds the same way, so it can not be
+    used to find out which emails have accounts.
+    """
+
+    permission_classes = (PermA,)
+    serializer_class = serializers.OtpRequestSerializer
+
+    @swagger_auto_schema(
+        request_body=serializers.OtpRequestSerializer,
+    )
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(data=serializer.errors, status='400')
+
+        email = serializer.validated_data.get('email')
+        user_email = User.objects.filter(
+            email__iexact=email, active=True).values_list(
+                'email', flat=True).first()
+        if user_email is not None:
+            otp = login_otp.make_otp(email)
+            if otp is not None:
+                minutes = settings.OTP_TIMEOUT // 60
+                send_email_async(
+                    email=user_email, subject='Your login code',
+                    message=f"Your login code is {otp}, \
+it expires in {minutes} minutes.")
+
+        return Response(status='200')
+
+
+class OtpVerifyAPIView(ServerTimingMixin, APIView):
+    """
+    Exchange a valid one time login code for jwt tokens
+    """
+
+    permission_classes = (PermA,)
+    serializer_class = serializers.OtpVerifySerializer
+
+    @swagger_auto_schema(
+        request_body=serializers.OtpVerifySerializer,
+        responses={
+            200: serializers.LoginResponseSerializer200,
+        }
+    )
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(data=serializer.errors, status='400')
+
+        email = serializer.validated_data.get('email')
+        otp = serializer.validated_data.get('otp')
+        if not login_otp.check_otp(email, otp):
+            return Response(status='443')
+
+        try:
+            user = User.objects.select_related('profile').get(
+                email__iexact=email)
+        except (User.DoesNotExist, User.MultipleObjectsReturned):
+            return Response(status='443')
+
+        if not user.is_active:
+            return Response(status='432')
+
+        # The code was delivered to the email, so the email is verified
+        if not user.verified_email:
+            user.verified_email = True
+            User.objects.filter(pk=user.pk).update(verified_email=True)
+
+        response_data = {
+            'tokens': get_tokens_for_user(user),
+            'user': serializers.UserSerializer(user).data
+        }
+        return Response(data=response_data)
+
+
+class UsernameAvailableAPIView(ServerTimingMixin, APIView):
+    """
+    Check if a profile username is available.
+
+    Only usernames the taken usernames bloom filter may contain are
+    checked in the database. A username taken in another process can
+    be reported available for up to the local timeout of the filter,
+    the unique constraint is still the final check on save.
+    """
+
+    permission_classes = (PermA,)
+
+    @swagger_auto_schema(
+        responses={200: serializers.UsernameAvailableSerializer}
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = serializers.UsernameAvailableSerializer(
+            data={'username': kwargs.get('username')})
+        if not serializer.is_valid():
+            return Response(data=serializer.errors, status='400')
+
+        username = serializer.validated_data.get('username')
+        available = username not in taken_usernames or \
+            not Profile.objects.filter(username=username).exists()
+
+        return Response(data={'username': username, 'available': available})
+
+
+class ForgetPasswordView(ServerTimingMixin, APIView):
     permission_classes = (PermA,)
 
     @swagger_auto_schema(
@@ -157,7 +274,7 @@ class ForgetPasswordView(APIView):
         return Response(status='424')
 
 
-class RegisterAPIView(APIView):
+class RegisterAPIView(ServerTimingMixin, APIView):
     permission_classes = (PermA,)
     serializer_class = serializers.RegisterSerializer
 
@@ -196,20 +313,22 @@ class RegisterAPIView(APIView):
         return self.create(request, *args, **kwargs)
 
 
-class ProfileAPIView(generics.RetrieveUpdateAPIView):
+class ProfileAPIView(
+    ServerTimingMixin, ConditionalUpdateMixin, SparseFieldsViewMixin,
+    generics.RetrieveUpdateAPIView
+):
     lookup_field = 'id'
     permission_classes = (PermB,)
     serializer_class = serializers.ProfileSerializer
+    queryset = Profile.objects.all()
     http_method_names = ['get', 'patch']
 
     def get_object(self):
-        return get_object_or_404(Profile, user=self.request.user.id)
+        return get_object_or_404(
+            self.get_queryset(), user=self.request.user.id)
 
-    def get_queryset(self):
-        return Profile.objects.all()
 
-
-class ForgetChangePasswordView(generics.UpdateAPIView):
+class ForgetChangePasswordView(ServerTimingMixin, generics.UpdateAPIView):
     permission_classes = (PermA,)
     serializer_class = serializers.ForgetChangePasswordSerializer
 
@@ -246,27 +365,93 @@ class ForgetChangePasswordView(generics.UpdateAPIView):
         return User.objects.filter(active=True)
 
 
-class ChangePasswordView(generics.UpdateAPIView):
+class ChangePasswordView(ServerTimingMixin, generics.UpdateAPIView):
     permission_classes = (PermB,)
     serializer_class = serializers.ChangePasswordSerializer
     http_method_names = ['patch']
 
     def get_object(self):
-        return self.request.user
+        return get_model_user(self.request.user)
 
     def get_queryset(self):
         return User.objects.filter(active=True)
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(
+    ServerTimingMixin, SparseFieldsViewMixin, ColumnarListMixin,
+    NDJSONListMixin, generics.ListAPIView
+):
     permission_classes = (PermB,)
     serializer_class = serializers.UserSerializer
+    queryset = User.objects.order_by('email')
 
-    def get_queryset(self):
-        return User.objects.all().order_by('email')
 
+class UserBatchLookupView(ServerTimingMixin, APIView):
+    """
+    Look up many users by ids and emails in one request, for
+    services resolving users. Users are keyed by the id or email
+    they were looked up with, those not found are listed in missing.
+    """
+
+    permission_classes = (PermA,)
+    serializer_class = serializers.UserBatchLookupSerializer
 
-class UserAPIView(generics.RetrieveUpdateAPIView):
+    @swagger_auto_schema(
+        request_body=serializers.UserBatchLookupSerializer,
+        responses={200: serializers.UserBatchLookupResponseSerializer}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        # Looked up normalized, returned by the email passed
+        emails = {
+            email: User.objects.normalize_email(email)
+            for email in serializer.validated_data['emails']
+        }
+
+        by_id, by_email = lookup_users(
+            ids, emails.values(),
+            serializers.UserSerializer(many=True).to_representation)
+        return Response(data={
+            'ids': {str(user_id): data for user_id, data in by_id.items()},
+            'emails': {
+                email: by_email[normalized]
+                for email, normalized in emails.items()
+                if normalized in by_email
+            },
+            'missing': {
+                'ids': [
+                    user_id for user_id in dict.fromkeys(ids)
+                    if user_id not in by_id
+                ],
+                'emails': [
+                    email for email, normalized in emails.items()
+                    if normalized not in by_email
+                ],
+            },
+        })
+
+
+class AccountBatchAPIView(ServerTimingMixin, BatchAPIView):
+    """
+    Send many account api requests in one, authenticated once.
+    Each request is checked with the permissions of its view.
+    """
+
+    permission_classes = (PermA,)
+
+    @swagger_auto_schema(
+        request_body=BatchRequestSerializer,
+        responses={200: BatchResponseSerializer}
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class UserAPIView(
+    ServerTimingMixin, ConditionalUpdateMixin, generics.RetrieveUpdateAPIView
+):
     permission_classes = (PermB,)
     serializer_class = serializers.UserSerializer
     http_method_names = ['get', 'patch']
@@ -275,9 +460,8 @@ class UserAPIView(generics.RetrieveUpdateAPIView):
         return User.objects.all()
 
     def get_object(self):
-        return self.request.user
+        return get_model_user(self.request.user)
 
-    def get(self, request, *args, **kwargs):
-        # Get the user data
-        response_data = self.get_serializer_class()(request.user).data
-        return Response(data=response_data)
+    def get_versions(self, obj) -> tuple:
+        # The profile is part of the representation
+        return (obj.version, obj.profile.version)
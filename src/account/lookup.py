@@ -0,0 +1,100 @@
+"""
+Batch lookup of users by id and email, for service to service calls.
+
+Serialized users are cached by id with their email, and emails with
+the id of their user, so repeat lookups are two cache reads. Misses
+are loaded with one query joining the profile. Cached users are
+forgotten when the user or its profile is saved or deleted.
+"""
+
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+
+def get_user_key(user_id) -> str:
+    return f'user-lookup:id:{user_id}'
+
+
+def get_email_key(email: str) -> str:
+    return f'user-lookup:email:{email}'
+
+
+def forget_user(user_id):
+    cache.delete(get_user_key(user_id))
+
+
+def load_users(
+    ids: List[int], emails: List[str], serialize: Callable[[list], list]
+) -> Dict[int, tuple]:
+    """Email and serialized data of users by id, cached for next time"""
+    from account.models import User
+
+    users = list(
+        User.objects.select_related('profile').filter(
+            Q(id__in=ids) | Q(email__in=emails)))
+    loaded = {
+        user.pk: (user.email, data)
+        for user, data in zip(users, serialize(users))
+    }
+
+    cached = {}
+    for user_id, (email, data) in loaded.items():
+        cached[get_user_key(user_id)] = (email, data)
+        cached[get_email_key(email)] = user_id
+    cache.set_many(cached, timeout=settings.USER_LOOKUP_CACHE_TIMEOUT)
+    return loaded
+
+
+def lookup_users(
+    ids: Iterable[int], emails: Iterable[str],
+    serialize: Callable[[list], list]
+) -> Tuple[Dict[int, dict], Dict[str, dict]]:
+    """
+    Serialized users of ids and emails, from the cache then the
+    database. Returns the found users by id and by email.
+
+    :param serialize: function returning the serialized list of users,
+        e.g to_representation of a list serializer
+    :type serialize: Callable[[list], list]
+    """
+    ids = list(dict.fromkeys(ids))
+    emails = list(dict.fromkeys(emails))
+
+    cached = cache.get_many([get_email_key(email) for email in emails])
+    email_ids = {
+        email: cached[get_email_key(email)] for email in emails
+        if get_email_key(email) in cached
+    }
+
+    user_ids = list(dict.fromkeys([*ids, *email_ids.values()]))
+    cached = cache.get_many([get_user_key(user_id) for user_id in user_ids])
+    users = {
+        user_id: cached[get_user_key(user_id)] for user_id in user_ids
+        if get_user_key(user_id) in cached
+    }
+
+    def get_by_email(email: str):
+        # The email of a cached user may have changed since
+        user = users.get(email_ids.get(email))
+        return user[1] if user is not None and user[0] == email else None
+
+    missing_ids = [user_id for user_id in ids if user_id not in users]
+    missing_emails = [
+        email for email in emails if get_by_email(email) is None]
+    if missing_ids or missing_emails:
+        loaded = load_users(missing_ids, missing_emails, serialize)
+        users.update(loaded)
+        email_ids.update(
+            (email, user_id) for user_id, (email, _) in loaded.items())
+
+    found_ids = {
+        user_id: users[user_id][1] for user_id in ids if user_id in users}
+    found_emails = {}
+    for email in emails:
+        data = get_by_email(email)
+        if data is not None:
+            found_emails[email] = data
+    return found_ids, found_emails
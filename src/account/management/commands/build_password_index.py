@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.core.management.base import BaseCommand
+
+from utils.base.password_validation import CommonPasswordIndex
+
+# Password list of django's CommonPasswordValidator
+DEFAULT_SOURCE = Path(password_validation.__file__).resolve().with_name(
+    'common-passwords.txt.gz')
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the memory mapped common password index "
+        "used by utils.base.password_validation.CommonPasswordValidator"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=DEFAULT_SOURCE,
+            help='Password list to index, may be gzipped. '
+                 'Defaults to the django common password list')
+        parser.add_argument(
+            '--output', default=settings.COMMON_PASSWORD_INDEX,
+            help='Path to write the index to')
+
+    def handle(self, *args, **options):
+        CommonPasswordIndex.build_from_list(
+            options['source'], options['output'])
+        index = CommonPasswordIndex(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} passwords to {options['output']}"))
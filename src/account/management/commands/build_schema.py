@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from utils.base.openapi import CODEC_EXTENSIONS, get_current_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the openapi schema served by the docs view, "
+        "run at deploy time so no request has to generate it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', default='config.urls.BaseSchemaView',
+            help='Schema view to build the schema of, '
+                 'a view with utils.base.openapi.PrebuiltSchemaMixin')
+        parser.add_argument(
+            '--format', nargs='+', dest='extensions',
+            choices=list(CODEC_EXTENSIONS.values()),
+            help='Formats to build, defaults to all')
+
+    def handle(self, *args, **options):
+        if not settings.CODE_VERSION:
+            # The schema version would not change with the code
+            raise CommandError(
+                "Set CODE_VERSION to the version of the deployed code, "
+                "e.g the git commit")
+
+        view = import_string(options['view'])
+        version = get_current_version()
+        for path in view.build_schema(version, options['extensions']):
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Built openapi schema version {version}"))
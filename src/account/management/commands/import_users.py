@@ -0,0 +1,258 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+
+from account.models import Profile, User, taken_usernames
+from utils.base.general import batched, username_gen
+
+
+PROFILE_FIELDS = (
+    'username', 'first_name', 'last_name', 'phone',
+    'address', 'city', 'state', 'zip', 'about',
+)
+
+
+def read_records(path: Path, file_format: str) -> Iterator[Dict[str, str]]:
+    """Read user records from a csv file with a header, or jsonl file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users and their profiles from a csv or jsonl file. "
+        "Records need an email, and may have a password and any of: "
+        f"{', '.join(PROFILE_FIELDS)}. Invalid records are reported "
+        "and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument(
+            '--format', dest='file_format', choices=('csv', 'jsonl'),
+            help='File format, defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processes used to hash passwords, defaults to cpu count')
+        parser.add_argument(
+            '--skip-existing', action='store_true',
+            help='Skip records whose email already exists, '
+                 'instead of not importing any')
+
+    def handle(self, *args, **options):
+        path: Path = options['path']
+        file_format = options['file_format'] or path.suffix.lstrip('.')
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError(
+                f"Unknown format {file_format!r}, pass --format")
+
+        if not options['skip_existing']:
+            # Checked before the first batch is committed,
+            # so a failed run does not leave a partial import
+            existing = self.find_existing(
+                read_records(path, file_format), options['batch_size'])
+            if existing:
+                raise CommandError(
+                    f"Users already exist: {', '.join(existing)}")
+
+        records = read_records(path, file_format)
+        created = skipped = 0
+        self.rejected = 0
+        self.seen_emails = set()
+
+        # Hashing is cpu bound, so it is spread over processes
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            for batch in batched(records, options['batch_size']):
+                count = self.import_batch(batch, executor)
+                created += count
+                skipped += len(batch) - count
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} users, skipped {skipped}, "
+            f"{self.rejected} of them invalid"))
+
+    def import_batch(
+        self, records: List[dict], executor: ProcessPoolExecutor
+    ) -> int:
+        records = self.clean_records(records)
+        emails = [record['email'] for record in records]
+
+        # Only found with --skip-existing, or users created
+        # since the check before the import
+        existing = set(User.objects.filter(
+            email__in=emails).values_list('email', flat=True))
+        records = [r for r in records if r['email'] not in existing]
+
+        records = self.reject_taken_usernames(records)
+        if not records:
+            return 0
+
+        # make_password(None) gives an unusable password
+        passwords = executor.map(
+            make_password, [r.get('password') or None for r in records],
+            chunksize=max(1, len(records) // 32))
+        usernames = self.get_usernames(records)
+
+        users = [
+            User(email=record['email'], password=password)
+            for record, password in zip(records, passwords)
+        ]
+
+        with transaction.atomic():
+            # bulk_create does not send post_save,
+            # so profiles are created below instead
+            users = User.objects.bulk_create(users)
+            if any(user.pk is None for user in users):
+                # Backend can not return ids from bulk inserts
+                ids = dict(User.objects.filter(
+                    email__in=[u.email for u in users]
+                ).values_list('email', 'id'))
+                for user in users:
+                    user.pk = ids[user.email]
+
+            Profile.objects.bulk_create([
+                Profile(
+                    user_id=user.pk, username=username,
+                    **{
+                        field: record[field] for field in PROFILE_FIELDS
+                        if field != 'username' and record.get(field)
+                    }
+                )
+                for user, record, username in zip(users, records, usernames)
+            ])
+
+        # Not added by the post_save of profiles, bulk_create skips it
+        taken_usernames.add_many(usernames)
+
+        return len(users)
+
+    def get_email(self, record: dict) -> str:
+        return User.objects.normalize_email(
+            (record.get('email') or '').strip())
+
+    def find_existing(
+        self, records: Iterator[dict], batch_size: int
+    ) -> List[str]:
+        """Emails of the records that already have users"""
+        existing = []
+        for batch in batched(records, batch_size):
+            emails = {self.get_email(record) for record in batch}
+            existing.extend(User.objects.filter(
+                email__in=emails - {''}).values_list('email', flat=True))
+        return sorted(existing)
+
+    def reject(self, record: dict, errors: Dict[str, List[str]]):
+        """Report a record left out of the import"""
+        self.rejected += 1
+        reasons = '; '.join(
+            f"{field}: {' '.join(messages)}"
+            for field, messages in errors.items())
+        self.stderr.write(
+            f"Rejected {record.get('email') or record}: {reasons}")
+
+    def get_errors(self, record: dict) -> Dict[str, List[str]]:
+        """
+        Errors of the email and profile fields of record, checked with
+        the validators and lengths of the model fields
+        """
+        fields = [('email', User)] + [
+            (field, Profile) for field in PROFILE_FIELDS if record.get(field)]
+
+        errors = {}
+        for field, model in fields:
+            try:
+                model._meta.get_field(field).clean(record[field], None)
+            except ValidationError as e:
+                errors[field] = e.messages
+            except serializers.ValidationError as e:
+                # Raised by the validators in utils.base.validators
+                errors[field] = [str(detail) for detail in e.detail]
+        return errors
+
+    def clean_records(self, records: List[dict]) -> List[dict]:
+        """
+        Valid records with normalized emails, records with an email
+        of an earlier record of the import are rejected
+        """
+        cleaned = []
+        for record in records:
+            email = self.get_email(record)
+            if not email:
+                self.reject(record, {'email': ['Missing']})
+                continue
+
+            record = {**record, 'email': email}
+            if email in self.seen_emails:
+                self.reject(record, {'email': ['Duplicate in the file']})
+                continue
+
+            errors = self.get_errors(record)
+            if errors:
+                self.reject(record, errors)
+            else:
+                self.seen_emails.add(email)
+                cleaned.append(record)
+        return cleaned
+
+    def reject_taken_usernames(self, records: List[dict]) -> List[dict]:
+        """
+        Records without a username taken by an existing profile,
+        or by an earlier record of the batch
+        """
+        usernames = [r['username'] for r in records if r.get('username')]
+        taken = set(Profile.objects.filter(
+            username__in=usernames).values_list('username', flat=True))
+
+        kept = []
+        for record in records:
+            username = record.get('username')
+            if username in taken:
+                self.reject(record, {'username': ['Already taken']})
+                continue
+            if username:
+                taken.add(username)
+            kept.append(record)
+        return kept
+
+    def get_usernames(self, records: List[dict]) -> List[str]:
+        """
+        Usernames of the records, generating free ones for
+        records without a username with one query per round
+        """
+        usernames = [r.get('username') or None for r in records]
+        missing = [i for i, name in enumerate(usernames) if name is None]
+        used = set(usernames)
+
+        while missing:
+            candidates = {
+                i: username_gen(settings.USERNAME_LENGTH) for i in missing}
+            taken = set(Profile.objects.filter(
+                username__in=candidates.values()
+            ).values_list('username', flat=True))
+
+            missing = []
+            for i, name in candidates.items():
+                if name in taken or name in used:
+                    missing.append(i)
+                else:
+                    usernames[i] = name
+                    used.add(name)
+        return usernames
@@ -1,20 +1,30 @@
+from functools import partial
 from typing import TypeVar
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
-from utils.base.general import send_email
+from django.db import IntegrityError, models, transaction
+from account.lookup import forget_user
+from utils.base.bloom import CachedBloomFilter
+from utils.base.general import send_email, username_gen
+from utils.base.mixins import VersionedModel
 from utils.base.validators import validate_special_char, validate_phone
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
 
 T = TypeVar('T', bound=AbstractBaseUser)
 
 
 class UserManager(BaseUserManager):
-    def create_base_user(
+    # Number of tries with a new generated profile username,
+    # when the generated one is already taken
+    profile_username_retries = 3
+
+    def build_user(
         self, email, is_active=True,
         is_staff=False, is_admin=False
     ) -> T:
+        """Get an unsaved user instance"""
         if not email:
             raise ValueError("User must provide an email")
 
@@ -24,6 +34,13 @@ class UserManager(BaseUserManager):
         user.active = is_active
         user.admin = is_admin
         user.staff = is_staff
+        return user
+
+    def create_base_user(
+        self, email, is_active=True,
+        is_staff=False, is_admin=False
+    ) -> T:
+        user = self.build_user(email, is_active, is_staff, is_admin)
         user.set_unusable_password()
         user.save(using=self._db)
         return user
@@ -32,13 +49,52 @@ class UserManager(BaseUserManager):
         self, email, password=None, is_active=True,
         is_staff=False, is_admin=False
     ) -> T:
-        user = self.create_base_user(email, is_active, is_staff, is_admin)
         if not password:
             raise ValueError("User must provide a password")
+
+        # Password is set before the first save, so the
+        # user is created with a single insert
+        user = self.build_user(email, is_active, is_staff, is_admin)
         user.set_password(password)
-        user.save()
+        user.save(using=self._db)
         return user
 
+    def create_user_with_profile(
+        self, email, password, is_active=True, **profile_fields
+    ) -> T:
+        """
+        Create a user and its populated profile in one transaction,
+        with one insert each. Uniqueness is left to the database
+        constraints, an IntegrityError is raised if the email is taken.
+        """
+        if not password:
+            raise ValueError("User must provide a password")
+
+        # Hash once, it is the expensive part of a retry
+        user = self.build_user(email, is_active)
+        user.set_password(password)
+        password_hash = user.password
+
+        generate_username = not profile_fields.get('username')
+        for attempt in range(self.profile_username_retries):
+            user = self.build_user(email, is_active)
+            user.password = password_hash
+            user._profile_fields = profile_fields.copy()
+            if generate_username:
+                user._profile_fields['username'] = username_gen(
+                    settings.USERNAME_LENGTH)
+
+            try:
+                with transaction.atomic(using=self._db):
+                    user.save(using=self._db)
+                return user
+            except IntegrityError:
+                # Only a generated username is worth another try
+                last_try = attempt == self.profile_username_retries - 1
+                if not generate_username or last_try or self.filter(
+                        email=user.email).exists():
+                    raise
+
     def create_staff(self, email, password=None) -> T:
         user = self.create_user(email=email, password=password, is_staff=True)
         return user
@@ -55,7 +111,7 @@ class UserManager(BaseUserManager):
         return self.filter(admin=True)
 
 
-class User(AbstractBaseUser):
+class User(VersionedModel, AbstractBaseUser):
     email = models.EmailField(unique=True)
 
     # Admin fields
@@ -113,7 +169,7 @@ class User(AbstractBaseUser):
         return self.admin
 
 
-class Profile(models.Model):
+class Profile(VersionedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     username = models.CharField(
         max_length=60, unique=True, validators=[validate_special_char])
@@ -135,6 +191,13 @@ class Profile(models.Model):
 
     about = models.TextField(max_length=2500, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        profile = super().from_db(db, field_names, values)
+        # Saved username, only changed ones are added to taken_usernames
+        profile._saved_username = profile.__dict__.get('username')
+        return profile
+
     @property
     def fullname(self):
         return f"{self.first_name} {self.last_name}"
@@ -151,7 +214,44 @@ class Profile(models.Model):
         return f"{user_name}-{self.user.id}"
 
 
+# Profile usernames in use, for availability checks without a query
+taken_usernames = CachedBloomFilter(
+    'taken-usernames',
+    loader=lambda: Profile.objects.values_list(
+        'username', flat=True).iterator(),
+    count=lambda: Profile.objects.count(),
+    capacity=settings.USERNAME_BLOOM_CAPACITY,
+)
+
+
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
+        # Profile fields can be passed with the user,
+        # see UserManager.create_user_with_profile
+        profile_fields = dict(getattr(instance, '_profile_fields', None) or {})
+        if not profile_fields.get('username'):
+            profile_fields['username'] = username_gen(
+                settings.USERNAME_LENGTH)
+        Profile.objects.create(user=instance, **profile_fields)
+
+
+@receiver(post_save, sender=Profile)
+def add_taken_username(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    if instance.username != getattr(instance, '_saved_username', None):
+        # Added once committed, see CachedBloomFilter
+        transaction.on_commit(partial(taken_usernames.add, instance.username))
+        instance._saved_username = instance.username
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_looked_up_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def forget_looked_up_profile(sender, instance, **kwargs):
+    forget_user(instance.user_id)
@@ -0,0 +1,165 @@
+"""
+Lightweight stand-in for the User model on authenticated requests
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from account.models import User
+
+
+# Token claims written by `get_tokens_for_user` when
+# settings.PRINCIPAL_TOKEN_CLAIMS is enabled
+PRINCIPAL_CLAIMS = (
+    'email', 'active', 'staff', 'admin', 'verified_email',
+    'username', 'first_name', 'last_name',
+)
+
+# Columns loaded by the narrow principal query, in slot order
+PRINCIPAL_COLUMNS = (
+    'id', 'email', 'active', 'staff', 'admin', 'verified_email',
+    'profile__username', 'profile__first_name', 'profile__last_name',
+)
+
+
+class Principal:
+    """
+    Read only representation of an authenticated user.
+
+    Holds only the fields the permissions and read views need,
+    the real User model is loaded the first time a view asks
+    for something the principal does not carry, e.g `save` or
+    `set_password`, or calls `get_user` explicitly before writing.
+    """
+
+    __slots__ = (
+        'id', 'email', 'active', 'staff', 'admin', 'verified_email',
+        'username', 'first_name', 'last_name', '_user',
+    )
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(
+        self, id: int, email: str, active: bool = True,
+        staff: bool = False, admin: bool = False,
+        verified_email: bool = False, username: str = '',
+        first_name: str = '', last_name: str = '', user: User = None
+    ):
+        self.id = id
+        self.email = email
+        self.active = active
+        self.staff = staff
+        self.admin = admin
+        self.verified_email = verified_email
+        self.username = username or ''
+        self.first_name = first_name or ''
+        self.last_name = last_name or ''
+        self._user = user
+
+    @classmethod
+    def from_claims(cls, token) -> Optional['Principal']:
+        """
+        Build principal from validated token claims,
+        returns None if the token does not carry all claims.
+        The claims are as fresh as the last token refresh,
+        see `PrincipalTokenRefreshSerializer`
+        """
+        try:
+            values = [token[claim] for claim in PRINCIPAL_CLAIMS]
+        except KeyError:
+            return None
+        return cls(token[api_settings.USER_ID_CLAIM], *values)
+
+    @classmethod
+    def from_db(cls, user_id) -> Optional['Principal']:
+        """
+        Build principal with a single query joining the profile,
+        returns None if the user does not exist
+        """
+        row = User.objects.filter(id=user_id).values_list(
+            *PRINCIPAL_COLUMNS).first()
+        if row is None:
+            return None
+        return cls(*row)
+
+    @classmethod
+    def from_token_user(cls, token_user: TokenUser) -> Optional['Principal']:
+        """
+        Get the principal for a simplejwt token user, token claims are
+        only trusted when settings.PRINCIPAL_TOKEN_CLAIMS is enabled
+        """
+        if getattr(settings, 'PRINCIPAL_TOKEN_CLAIMS', False):
+            principal = cls.from_claims(token_user.token)
+            if principal is not None:
+                return principal
+        return cls.from_db(token_user.id)
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    @property
+    def is_active(self) -> bool:
+        return self.active
+
+    @property
+    def is_staff(self) -> bool:
+        return self.staff
+
+    @property
+    def is_admin(self) -> bool:
+        return self.admin
+
+    @property
+    def get_emailname(self) -> str:
+        """Return the x part of an email e.g [x]@gmail.com"""
+        return self.email.split('@')[0]
+
+    def get_user(self) -> User:
+        """
+        Get the real user model, loaded with its profile
+        in one query the first time it is needed
+        """
+        if self._user is None:
+            self._user = User.objects.select_related(
+                'profile').get(id=self.id)
+        return self._user
+
+    def __getattr__(self, name: str):
+        # Only called for attributes the principal does not carry,
+        # so anything else upgrades to the real model
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, 'pk', None) == self.id and isinstance(
+            other, (Principal, User))
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return self.email
+
+
+def get_principal_claims(user: User) -> dict:
+    """
+    Claims to add to the tokens of user so that
+    the principal can be built without a query
+    """
+    return {claim: getattr(user, claim) for claim in PRINCIPAL_CLAIMS}
+
+
+def get_model_user(user) -> User:
+    """
+    Get the real User model of `request.user`,
+    to be used by views that write to the user
+    """
+    if isinstance(user, Principal):
+        return user.get_user()
+    return user
@@ -0,0 +1,58 @@
+"""
+Benchmarks for hot paths of the api.
+
+Run from the src directory with the module name, e.g
+
+    python -m benchmarks.principal
+
+Benchmarks use settings.test and create their own test database
+when they need one.
+"""
+
+import os
+import timeit
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable
+
+
+def setup_django(settings_module: str = 'config.settings.test'):
+    """Configure django for standalone benchmark scripts"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a throw away test database for the benchmark"""
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def report(name: str, func: Callable[[], None], number: int = 1000,
+           repeat: int = 5) -> float:
+    """Print and return the best time per call of func in seconds"""
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{name:<48} {best * 1e6:12.2f} us")
+    return best
+
+
+def peak_memory(func: Callable[[], None]) -> int:
+    """Return the peak memory allocated while calling func in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,61 @@
+"""
+Total latency of the account requests of a screen sent one by one,
+against the same requests sent in one batch request.
+
+    python -m benchmarks.batch
+"""
+
+from benchmarks import report, setup_django, test_database
+
+
+def main():
+    setup_django()
+
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+
+    from account.models import User
+    from project_api_key.models import ProjectApiKey
+    from utils.base.general import get_tokens_for_user
+
+    with test_database():
+        user = User.objects.create_user(
+            email='bench@example.com', password='bench-password')
+        user.staff = True
+        user.save()
+
+        api_key = ProjectApiKey.objects.create(user=user)
+        headers = {
+            settings.API_KEY_HEADER: api_key.pub_key,
+            settings.API_SEC_KEY_HEADER: api_key.get_cached_pass_key(),
+            'HTTP_AUTHORIZATION':
+                f"Bearer {get_tokens_for_user(user)['access']}",
+        }
+
+        client = Client()
+        paths = [
+            reverse('auth:detail_profile'),
+            reverse('auth:user_data'),
+            f"{reverse('auth:detail_profile')}?fields=city",
+            f"{reverse('auth:user_data')}?fields=email",
+        ]
+        batch = {'requests': [{'path': path} for path in paths]}
+
+        def sequential():
+            for path in paths:
+                client.get(path, **headers)
+
+        def batched():
+            client.post(
+                reverse('auth:batch'), batch,
+                content_type='application/json', **headers)
+
+        one_by_one = report(
+            f'{len(paths)} sequential requests', sequential, number=50)
+        in_batch = report(f'batch of {len(paths)}', batched, number=50)
+        print(f"speedup: {one_by_one / in_batch:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Payload size and serialize + encode time of 10k UserSerializer rows,
+row format against the columnar format.
+
+    python -m benchmarks.columnar
+"""
+
+import gzip
+
+from benchmarks import report, setup_django
+
+
+def main():
+    setup_django()
+
+    from django.test import RequestFactory
+    from rest_framework.response import Response
+
+    from account.api.base.serializers import UserSerializer
+    from account.models import Profile, User
+    from utils.base.columnar import ColumnarRenderer, serialize_columnar
+    from utils.base.renderer import ApiRenderer
+
+    users = []
+    for i in range(10000):
+        user = User(id=i + 1, email=f'user{i}@example.com')
+        user.profile = Profile(
+            id=i + 1, user=user, username=f'user{i}', first_name='Bench',
+            last_name=f'Mark{i}', phone='+2348012345678',
+            address='12 Marina Road', city='Lagos', state='Lagos',
+            zip='100001', about='Hello, I build apis.')
+        users.append(user)
+
+    request = RequestFactory().get('/api/v1/account/users/')
+    serializer = UserSerializer(many=True)
+
+    def render_rows():
+        data = UserSerializer(users, many=True).data
+        context = {'request': request, 'response': Response(data)}
+        return ApiRenderer().render(data, renderer_context=context)
+
+    def render_columnar():
+        data = serialize_columnar(serializer, users)
+        context = {'request': request, 'response': Response(data)}
+        return ColumnarRenderer().render(data, renderer_context=context)
+
+    for name, func in (('rows', render_rows), ('columnar', render_columnar)):
+        body = func()
+        print(f"{name}: {len(body)} bytes, "
+              f"{len(gzip.compress(body, 6))} bytes gzipped")
+        report(f"{name} serialize + encode 10k", func, number=3, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+CPU cost against bytes saved of CompressionMiddleware on user
+payloads, at a few gzip levels and for cache hits.
+
+    python -m benchmarks.compression
+"""
+
+from benchmarks import report, setup_django
+
+
+def main():
+    setup_django()
+
+    from django.core.cache import cache
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from rest_framework.response import Response
+
+    from account.api.base.serializers import UserSerializer
+    from account.models import Profile, User
+    from utils.base.middleware import CompressionMiddleware
+    from utils.base.renderer import ApiRenderer
+
+    users = []
+    for i in range(100):
+        user = User(email=f'user{i}@example.com')
+        user.profile = Profile(
+            username=f'user{i}', first_name='Bench', last_name=f'Mark{i}',
+            phone='+2348012345678', address='12 Marina Road', city='Lagos',
+            state='Lagos', zip='100001', about='Hello, I build apis.')
+        users.append(user)
+
+    request = RequestFactory().get(
+        '/api/v1/account/users/', HTTP_ACCEPT_ENCODING='gzip, br')
+    renderer = ApiRenderer()
+
+    for name, data in (
+        ('user detail', UserSerializer(users[0]).data),
+        ('users page of 10', UserSerializer(users[:10], many=True).data),
+        ('users list of 100', UserSerializer(users, many=True).data),
+    ):
+        context = {'request': request, 'response': Response(data)}
+        body = renderer.render(data, renderer_context=context)
+
+        for level, timeout in ((1, 0), (6, 0), (9, 0), (6, 300)):
+            with override_settings(
+                COMPRESSION_LEVEL=level, COMPRESSION_CACHE_TIMEOUT=timeout
+            ):
+                cache.clear()
+                middleware = CompressionMiddleware(
+                    lambda request: HttpResponse(body))
+                size = len(middleware(request).content)
+
+                label = f"level {level}" + (" cached" if timeout else "")
+                print(f"{name}, {label}: {len(body)} -> {size} bytes")
+                report(
+                    f"  {name}, {label}", lambda: middleware(request),
+                    number=500)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+ApiRenderer.render of UserSerializer list payloads with each
+json backend in utils.base.encoders.
+
+    python -m benchmarks.encoders
+"""
+
+from benchmarks import report, setup_django
+
+BACKENDS = (
+    'utils.base.encoders.DRFJSONBackend',
+    'utils.base.encoders.StdlibJSONBackend',
+    'utils.base.encoders.SimpleJSONBackend',
+    'utils.base.encoders.OrjsonJSONBackend',
+)
+
+
+def main():
+    setup_django()
+
+    from django.test import RequestFactory, override_settings
+    from rest_framework.response import Response
+
+    from account.api.base.serializers import UserSerializer
+    from account.models import Profile, User
+    from utils.base.renderer import ApiRenderer
+
+    users = []
+    for i in range(100):
+        user = User(email=f'user{i}@example.com')
+        user.profile = Profile(
+            username=f'user{i}', first_name='Zoë', last_name=f'Ångström{i}',
+            phone='+2348012345678', address='12 Marina Road', city='Lagos',
+            state='Lagos', zip='100001', about='Café owner ' * 10)
+        users.append(user)
+
+    request = RequestFactory().get('/api/v1/account/users/')
+    renderer = ApiRenderer()
+
+    for size in (1, 20, 100):
+        data = UserSerializer(users[:size], many=True).data
+        context = {'request': request, 'response': Response(data)}
+
+        for backend in BACKENDS:
+            with override_settings(API_JSON_BACKEND=backend):
+                report(
+                    f"{size} users {backend.rsplit('.', 1)[1]}",
+                    lambda: renderer.render(data, renderer_context=context),
+                    number=2000 // size)
+
+
+if __name__ == '__main__':
+    main()
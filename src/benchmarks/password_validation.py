@@ -0,0 +1,79 @@
+"""
+Registration latency and worker memory of the django password
+validators against utils.base.password_validation.
+
+    python manage.py build_password_index
+    python -m benchmarks.password_validation
+"""
+
+import multiprocessing
+
+from benchmarks import report, setup_django
+
+STOCK_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},  # noqa
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},  # noqa
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},  # noqa
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},  # noqa
+]
+
+
+def rss_kb() -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS'):
+                return int(line.split()[1])
+    return 0
+
+
+def worker_rss(config, queue):
+    """Memory a forked worker gains by loading validators"""
+    from django.contrib.auth.password_validation import \
+        get_password_validators
+
+    before = rss_kb()
+    validators = get_password_validators(config)
+    for validator in validators:
+        try:
+            validator.validate('a-Str0ng-passw0rd')
+        except Exception:
+            pass
+    queue.put(rss_kb() - before)
+
+
+def main():
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.password_validation import (
+        get_password_validators, validate_password)
+
+    from account.models import Profile, User
+
+    user = User(email='john.doe@example.com')
+    user.profile = Profile(
+        username='johndoe', first_name='John', last_name='Doe')
+
+    context = multiprocessing.get_context('fork')
+    for name, config in (
+        ('django validators', STOCK_VALIDATORS),
+        ('project validators', settings.AUTH_PASSWORD_VALIDATORS),
+    ):
+        validators = get_password_validators(config)
+
+        def register():
+            validate_password(
+                'correct-horse-battery', user=user,
+                password_validators=validators)
+
+        queue = context.Queue()
+        process = context.Process(target=worker_rss, args=(config, queue))
+        process.start()
+        process.join()
+
+        print(f"{name}: worker RSS +{queue.get()} kB")
+        report(f"{name} validate_password", register)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Memory and queries of the request user set by `check_user_set`,
+full User model against the slotted Principal.
+
+    python -m benchmarks.principal
+"""
+
+from benchmarks import peak_memory, report, setup_django, test_database
+
+
+def main():
+    setup_django()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.models import TokenUser
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from account.models import User
+    from account.principal import Principal
+
+    with test_database():
+        user = User.objects.create_user(
+            email='bench@example.com', password='bench-password')
+        profile = user.profile
+        profile.username = 'bench'
+        profile.first_name = 'Bench'
+        profile.last_name = 'Mark'
+        profile.save()
+
+        token_user = TokenUser(AccessToken.for_user(user))
+
+        def model_user():
+            # What check_user_set did before, plus the
+            # display fields read by the views
+            request_user = User.objects.get(id=token_user.id)
+            return (
+                request_user.username, request_user.first_name,
+                request_user.last_name, request_user.is_staff,
+            )
+
+        def principal_user():
+            request_user = Principal.from_token_user(token_user)
+            return (
+                request_user.username, request_user.first_name,
+                request_user.last_name, request_user.is_staff,
+            )
+
+        for name, func in (
+            ('model user', model_user),
+            ('principal', principal_user),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                func()
+            print(f"{name}: {len(context.captured_queries)} queries, "
+                  f"{peak_memory(func)} bytes peak per request")
+            report(name, func)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+ApiRenderer.render for small payloads, and the status message
+lookup against the walk over CustomStatusCode it replaced.
+Then a cached list payload rendered from data and as RawJSON.
+
+    python -m benchmarks.renderer
+"""
+
+import json
+
+from benchmarks import report, setup_django
+
+
+def legacy_message(status: str):
+    """Message lookup as ResponseDecorator.set_message used to do it"""
+    from utils.base.status import CustomStatusCode
+
+    for key, value in CustomStatusCode.__dict__.items():
+        if key.find(status) != -1:
+            return value.__doc__
+
+
+def main():
+    setup_django()
+
+    from django.test import RequestFactory
+    from rest_framework.response import Response
+
+    from utils.base.encoders import RawJSON
+    from utils.base.renderer import ApiRenderer
+    from utils.base.status import STATUS_MESSAGES
+
+    renderer = ApiRenderer()
+    request = RequestFactory().get('/api/v1/account/users/detail/')
+
+    for status, data in (
+        (200, {'id': 1, 'email': 'bench@example.com'}),
+        (443, {'otp': ['Invalid otp']}),
+    ):
+        context = {'request': request, 'response': Response(data, status)}
+        report(
+            f"render {status}",
+            lambda: renderer.render(data, renderer_context=context),
+            number=20000)
+
+        report(
+            f"legacy message lookup {status}",
+            lambda: legacy_message(str(status)), number=20000)
+        report(
+            f"registry message lookup {status}",
+            lambda: STATUS_MESSAGES.get(str(status)), number=20000)
+
+    # Payload as a view would cache it, decoded or as the encoded bytes
+    rows = [
+        {'email': f'user{i}@example.com', 'profile': {
+            'username': f'user{i}', 'first_name': 'Bench',
+            'last_name': 'Mark', 'about': 'About me ' * 10}}
+        for i in range(100)
+    ]
+    cached = renderer.encode(rows)
+    for name, data in (
+        ('render cached decoded', lambda: json.loads(cached)),
+        ('render cached RawJSON', lambda: RawJSON(cached)),
+    ):
+        def render(data=data):
+            context = {'request': request, 'response': Response(data())}
+            renderer.render(None, renderer_context=context)
+
+        report(name, render, number=2000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Url resolution of CustomDefaultRouter routes, Django's linear
+resolver against TrieDefaultRouter, at 50, 500 and 5000 routes.
+
+    python -m benchmarks.routing
+"""
+
+from benchmarks import report, setup_django
+
+
+def get_item_viewset():
+    """Viewset with a list, detail and extra actions"""
+    from rest_framework.decorators import action
+    from rest_framework.viewsets import ModelViewSet
+
+    class ItemViewSet(ModelViewSet):
+
+        @action(detail=False)
+        def search(self, request):
+            pass
+
+        @action(detail=True)
+        def read(self, request, pk=None):
+            pass
+
+    return ItemViewSet
+
+
+def get_resolver(router_class, viewset, viewsets: int):
+    from django.urls import URLResolver
+    from django.urls.resolvers import RegexPattern
+
+    router = router_class()
+    for i in range(viewsets):
+        router.register(f'items{i}', viewset, basename=f'items{i}')
+    return URLResolver(RegexPattern(r'^/'), router.urls)
+
+
+def resolve(resolver, path: str):
+    from django.urls.exceptions import Resolver404
+
+    try:
+        resolver.resolve(path)
+    except Resolver404:
+        pass
+
+
+def report_routes(routes: int, viewset):
+    from utils.base.routers import CustomDefaultRouter, TrieDefaultRouter
+
+    # Each viewset has 14 routes with format suffixes
+    viewsets = max(1, routes // 14)
+    resolvers = [
+        (name, get_resolver(router_class, viewset, viewsets))
+        for name, router_class in (
+            ('linear', CustomDefaultRouter), ('trie', TrieDefaultRouter))
+    ]
+    last = viewsets - 1
+    paths = (
+        ('first list', '/items0/'),
+        ('middle detail', f'/items{viewsets // 2}/detail/42/'),
+        ('last action', f'/items{last}/42/read/'),
+        ('not found', '/missing/'),
+    )
+
+    print(f"{viewsets * 14 + 2} routes")
+    for label, path in paths:
+        for name, resolver in resolvers:
+            resolve(resolver, path)
+            number = 20 if name == 'linear' and routes > 500 else 200
+            report(
+                f"  {label}, {name}",
+                lambda: resolve(resolver, path), number=number)
+
+
+def main():
+    setup_django()
+
+    viewset = get_item_viewset()
+    for routes in (50, 500, 5000):
+        report_routes(routes, viewset)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Overhead of ServerTimingMiddleware and timed phases on a request
+running a few queries, against the same request untimed.
+
+    python -m benchmarks.timing
+"""
+
+from benchmarks import report, setup_django, test_database
+
+
+def main():
+    setup_django()
+
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from account.models import User
+    from utils.base.timing import ServerTimingMiddleware, timed
+
+    with test_database():
+        User.objects.create_user(
+            email='bench@example.com', password='bench-password')
+        request = RequestFactory().get('/')
+
+        def view(request):
+            with timed('auth'):
+                User.objects.filter(email='bench@example.com').exists()
+            with timed('view'):
+                list(User.objects.all()[:10])
+                User.objects.count()
+            with timed('render'):
+                return HttpResponse(b'{}')
+
+        timed_view = ServerTimingMiddleware(view)
+
+        untimed = report('untimed request', lambda: view(request))
+        timed_ = report('timed request', lambda: timed_view(request))
+        print(f"overhead per request: {(timed_ - untimed) * 1e6:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput of create_unique_tracking_id, in one process and across
+processes, bulk creates of models with a TrackingCodeField, and
+tracking code lookups through the cached pk against the unique index.
+
+    python -m benchmarks.tracking
+"""
+
+import multiprocessing
+import time
+
+from benchmarks import report, setup_django, test_database
+
+PROCESS_IDS = 200000
+
+
+def generate(count: int) -> int:
+    from utils.base.general import create_unique_tracking_id
+
+    codes = {create_unique_tracking_id('UID') for _ in range(count)}
+    return len(codes)
+
+
+def main():
+    setup_django()
+
+    from django.core.cache import cache
+
+    from utils.base.fields import TrackingCodeField
+    from utils.base.general import create_unique_tracking_id
+    from utils.base.mixins import BaseModelTracker
+
+    report(
+        'create_unique_tracking_id',
+        lambda: create_unique_tracking_id('UID'), number=100000)
+
+    for processes in (1, 4):
+        context = multiprocessing.get_context('fork')
+        start = time.perf_counter()
+        with context.Pool(processes) as pool:
+            unique = sum(pool.map(generate, [PROCESS_IDS] * processes))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{processes} processes, {unique} unique of "
+            f"{PROCESS_IDS * processes}, "
+            f"{unique / elapsed / 1000:.0f}k ids/s")
+
+    # Created with the test database
+    class TrackedBench(BaseModelTracker):
+        tracking_code = TrackingCodeField(prefix='BEN', max_length=60)
+
+        class Meta:
+            app_label = 'tests'
+
+    with test_database():
+        def bulk_create():
+            TrackedBench.objects.bulk_create(
+                [TrackedBench() for _ in range(1000)])
+
+        report('bulk_create 1000 tracked rows', bulk_create, number=5)
+
+        cache.clear()
+        code = TrackedBench.objects.order_by('?').values_list(
+            'tracking_code', flat=True)[0]
+        missing = create_unique_tracking_id('BEN')
+        print(f"{TrackedBench.objects.count()} rows")
+
+        def plain_missing():
+            TrackedBench.objects.filter(tracking_code=missing).first()
+
+        report(
+            'get by unique index',
+            lambda: TrackedBench.objects.get(tracking_code=code))
+        report(
+            'get by cached pk',
+            lambda: TrackedBench.objects.get_by_tracking_code(code))
+        report('missing by unique index', plain_missing)
+        report(
+            'missing by cached pk',
+            lambda: TrackedBench.objects.get_tracking_pk(missing))
+
+
+if __name__ == '__main__':
+    main()
@@ -46,12 +46,36 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'utils.base.renderer.ApiRenderer',
     ),
+
+    'EXCEPTION_HANDLER': 'utils.base.exceptions.exception_handler',
+}
+
+SWAGGER_SETTINGS = {
+    # Documents the response envelope, compact envelope and columnar lists
+    'DEFAULT_AUTO_SCHEMA_CLASS': 'utils.base.schema.BaseSchema',
 }
 
+# Json encoding backend of ApiRenderer, one of DRFJSONBackend,
+# StdlibJSONBackend, SimpleJSONBackend or OrjsonJSONBackend in
+# utils.base.encoders, see benchmarks/encoders.py
+API_JSON_BACKEND = config(
+    'API_JSON_BACKEND', default='utils.base.encoders.OrjsonJSONBackend')
+
+# Rows fetched and serialized at a time by streamed list responses
+STREAM_CHUNK_SIZE = 500
+
+# Build request principals from token claims instead of a query,
+# the claims are read again from the database on token refresh, so
+# changed flags apply at the latest when the access token expires
+PRINCIPAL_TOKEN_CLAIMS = config(
+    'PRINCIPAL_TOKEN_CLAIMS', default=False, cast=bool)
+
 API_KEY_HEADER = "HTTP_BEARER_API_KEY"
 API_SEC_KEY_HEADER = "HTTP_BEARER_SEC_API_KEY"
 
 MIDDLEWARE = [
+    'utils.base.timing.ServerTimingMiddleware',
+    'utils.base.middleware.CompressionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,6 +86,18 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Responses smaller than this many bytes are not compressed
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+# Gzip level 1-9, higher is smaller and slower
+COMPRESSION_LEVEL = config('COMPRESSION_LEVEL', default=6, cast=int)
+
+# Seconds compressed bodies are cached by content digest, 0 disables.
+# Only worth it when many responses share a body, most api bodies
+# hold the path and per user data and would miss the cache
+COMPRESSION_CACHE_TIMEOUT = config(
+    'COMPRESSION_CACHE_TIMEOUT', default=0, cast=int)
+
 
 CORS_ALLOWED_ORIGINS = []
 
@@ -92,19 +128,37 @@ TEMPLATES = [
 
 AUTH_PASSWORD_VALIDATORS = [
     {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',  # noqa
+        'NAME': 'utils.base.password_validation.UserAttributeSimilarityValidator',  # noqa
     },
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',  # noqa
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',  # noqa
+        'NAME': 'utils.base.password_validation.CommonPasswordValidator',  # noqa
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',  # noqa
     },
 ]
 
+# Built with `python manage.py build_password_index`
+COMMON_PASSWORD_INDEX = BASE_DIR / 'data' / 'common-passwords.idx'
+
+# Version of the deployed code, e.g the git commit. The prebuilt
+# openapi schema is rebuilt when it or the urls change, without
+# it the schema is built by each process and not written to disk
+CODE_VERSION = config('CODE_VERSION', default='')
+
+# Built with `python manage.py build_schema`
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'data' / 'openapi'
+
+# Seconds tracking codes are cached with their pk, and codes
+# without a row, see utils.base.tracking
+TRACKING_CODE_CACHE_TIMEOUT = config(
+    'TRACKING_CODE_CACHE_TIMEOUT', default=3600, cast=int)
+TRACKING_CODE_MISSING_TIMEOUT = config(
+    'TRACKING_CODE_MISSING_TIMEOUT', default=60, cast=int)
+
 
 USE_CACHE = config("USE_CACHE", default=False, cast=bool)
 REDIS_LOCATION = config("REDIS_LOCATION", default='redis://127.0.0.1:6379')
@@ -188,6 +242,30 @@ LOGGING = {
 PASSWORD_RESET_TIMEOUT = 600
 
 
+# Generated profile usernames, prefix + random chars
+USERNAME_PREFIX = 'user'
+USERNAME_LENGTH = 10
+
+# Expected number of usernames, sizes the username availability filter
+USERNAME_BLOOM_CAPACITY = 100000
+
+
+# Most ids and emails of a users/batch/ lookup, and
+# the seconds looked up users are cached
+USER_BATCH_LOOKUP_LIMIT = 100
+USER_LOOKUP_CACHE_TIMEOUT = 300
+
+# Most requests sent in one request to batch/
+BATCH_REQUEST_LIMIT = 10
+
+
+# Passwordless login codes
+OTP_LENGTH = 6
+OTP_TIMEOUT = 300  # 5mins
+OTP_MAX_ATTEMPTS = 5
+OTP_RESEND_TIMEOUT = 60
+
+
 # Emails settings
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = config('EMAIL_HOST', default='localhost')
@@ -7,24 +7,32 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
-base_schema_view = get_schema_view(
-    openapi.Info(
-        title="Project API",
-        default_version='v1',
-        description="Api documentation.",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="support@com.ng"),
-        license=openapi.License(name="BSD License"),
-    ),
+from utils.base.openapi import PrebuiltSchemaMixin
+
+api_info = openapi.Info(
+    title="Project API",
+    default_version='v1',
+    description="Api documentation.",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="support@com.ng"),
+    license=openapi.License(name="BSD License"),
+)
+
+
+class BaseSchemaView(PrebuiltSchemaMixin, get_schema_view(
+    api_info,
     public=True,
     permission_classes=(permissions.AllowAny,),
-)
+)):
+    # Built with `python manage.py build_schema`
+    schema_info = api_info
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path(
         'docs/',
-        base_schema_view.with_ui('swagger', cache_timeout=0),
+        BaseSchemaView.with_ui('swagger', cache_timeout=0),
         name='schema-swagger-ui'
     ),
     path('api/v1/', include([
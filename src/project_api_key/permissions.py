@@ -1,4 +1,4 @@
-from account.models import User
+from account.principal import Principal
 from django.conf import settings
 from rest_framework import permissions
 from rest_framework_simplejwt.models import TokenUser
@@ -10,15 +10,15 @@ from .models import ProjectApiKey
 def check_user_set(request) -> bool:
     """
     Check if the user is a Token user
-    and set user to request
+    and set a principal of the user to request
     """
     if isinstance(request.user, TokenUser):
-        try:
-            # Get the real user object
-            user = User.objects.get(id=request.user.id)
-            request.user = user
-        except User.DoesNotExist:
+        # Get the principal instead of the full user object,
+        # views load the real user only when they need to write
+        principal = Principal.from_token_user(request.user)
+        if principal is None:
             return False
+        request.user = principal
     return True
 
 
@@ -43,13 +43,24 @@ class HasStaffProjectAPIKey(permissions.BasePermission):
         pub_key = self.get_from_header(request, custom_header)
         sec_key = self.get_from_header(request, custom_sec_header)
 
+        # Already validated for this request, or for the batch
+        # request it was sent in, skip the query and hashing
+        api_obj = getattr(
+            getattr(request, '_request', request), 'project_api_key', None)
+        if api_obj is not None and api_obj.pub_key == pub_key:
+            return True, api_obj
+
         try:
             api_obj = ProjectApiKey.objects.select_related(
                 'user').get(pub_key=pub_key)
         except ProjectApiKey.DoesNotExist:
             return False, None
 
-        return api_obj.check_password(sec_key), api_obj
+        valid = api_obj.check_password(sec_key)
+        if valid:
+            # Kept on the django request for middlewares
+            getattr(request, '_request', request).project_api_key = api_obj
+        return valid, api_obj
 
     def get_from_header(self, request, name):
         """
@@ -0,0 +1,83 @@
+import pytest
+from django.urls import reverse
+
+from account.models import Profile
+from project_api_key.models import ProjectApiKey
+
+
+@pytest.mark.django_db
+class TestBatch:
+
+    url = reverse('auth:batch')
+    profile_url = reverse('auth:detail_profile')
+    user_url = reverse('auth:user_data')
+
+    def test_responses(self, logged_post, logged_get, user):
+        response = logged_post(user, self.url, {'requests': [
+            {'path': self.profile_url},
+            {'method': 'GET', 'path': self.user_url},
+        ]})
+        assert response.status_code == 200
+
+        profile, user_data = response.json()['data']['responses']
+        assert profile['status'] == 200
+        assert profile['success'] is True
+        assert profile['path'] == self.profile_url
+        assert profile['data'] == (
+            logged_get(user, self.profile_url).json()['data'])
+        assert user_data['data']['email'] == user.email
+
+    def test_body(self, logged_post, user):
+        response = logged_post(user, self.url, {'requests': [
+            {
+                'method': 'PATCH', 'path': self.profile_url,
+                'body': {'city': 'Lagos'},
+            },
+            {'path': f'{self.profile_url}?fields=city'},
+        ]})
+        patched, fetched = response.json()['data']['responses']
+        assert patched['status'] == 200
+        assert fetched['data'] == {'city': 'Lagos'}
+        assert Profile.objects.get(user=user).city == 'Lagos'
+
+    def test_errors(self, logged_post, user):
+        response = logged_post(user, self.url, {'requests': [
+            {'path': '/api/v1/account/none/'},
+            {'method': 'POST', 'path': self.url},
+            {'method': 'PATCH', 'path': self.profile_url,
+             'body': {'zip': '1234567'}},
+        ]})
+        assert response.status_code == 200
+
+        missing, nested, invalid = response.json()['data']['responses']
+        assert missing['status'] == 404
+        assert missing['success'] is False
+        assert nested['status'] == 400
+        assert invalid['status'] == 400
+        assert 'zip' in invalid['data']
+
+    def test_view_permissions(self, post):
+        # The api key passes the batch, the profile needs a user
+        response = post(self.url, {'requests': [{'path': self.profile_url}]})
+        assert response.status_code == 200
+        assert response.json()['data']['responses'][0]['status'] in (
+            401, 403)
+
+    def test_authenticated_once(self, logged_post, user, mocker):
+        check_password = mocker.spy(ProjectApiKey, 'check_password')
+        response = logged_post(user, self.url, {'requests': [
+            {'path': self.profile_url}] * 3})
+        assert [
+            sub['status'] for sub in response.json()['data']['responses']
+        ] == [200] * 3
+        assert check_password.call_count == 1
+
+    def test_limit(self, logged_post, user, settings):
+        settings.BATCH_REQUEST_LIMIT = 2
+        response = logged_post(user, self.url, {'requests': [
+            {'path': self.profile_url}] * 3})
+        assert response.status_code == 400
+
+    def test_empty(self, logged_post, user):
+        response = logged_post(user, self.url, {'requests': []})
+        assert response.status_code == 400
@@ -0,0 +1,160 @@
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from account.models import Profile, User
+from utils.base.exceptions import exception_handler
+from utils.base.mixins import VersionConflict
+
+
+@pytest.mark.django_db
+class TestVersionedModel:
+
+    def test_save_increments(self, user):
+        version = user.version
+        user.email = 'new@example.com'
+        user.save()
+        assert user.version == version + 1
+        assert User.objects.get(pk=user.pk).version == version + 1
+
+    def test_update_fields(self, user):
+        version = user.version
+        user.email = 'new@example.com'
+        user.save(update_fields=['email'])
+        assert User.objects.get(pk=user.pk).version == version + 1
+
+    def test_stale_save(self, user):
+        stale = User.objects.get(pk=user.pk)
+        user.email = 'first@example.com'
+        user.save()
+
+        stale.email = 'second@example.com'
+        with pytest.raises(VersionConflict):
+            with transaction.atomic():
+                stale.save()
+        assert User.objects.get(pk=user.pk).email == 'first@example.com'
+
+    def test_save_one_query(self, user, django_assert_num_queries):
+        profile = Profile.objects.get(user=user)
+        profile.city = 'Lagos'
+        with django_assert_num_queries(1):
+            profile.save()
+
+
+@pytest.mark.django_db
+class TestConditionalProfile:
+
+    url = reverse('auth:detail_profile')
+
+    def test_etag(self, logged_get, user):
+        response = logged_get(user, self.url)
+        profile = Profile.objects.get(user=user)
+        assert response['ETag'] == f'"{profile.pk}-{profile.version}"'
+
+    def test_not_modified(self, logged_get, user):
+        etag = logged_get(user, self.url)['ETag']
+        response = logged_get(
+            user, self.url, headers={'HTTP_IF_NONE_MATCH': etag})
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_modified(self, logged_get, user):
+        etag = logged_get(user, self.url)['ETag']
+        Profile.objects.get(user=user).save()
+
+        response = logged_get(
+            user, self.url, headers={'HTTP_IF_NONE_MATCH': etag})
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_if_match(self, logged_get, logged_patch, user):
+        etag = logged_get(user, self.url)['ETag']
+        response = logged_patch(
+            user, self.url, {'city': 'Lagos'},
+            headers={'HTTP_IF_MATCH': etag})
+        assert response.status_code == 200
+        assert Profile.objects.get(user=user).city == 'Lagos'
+        assert response['ETag'] != etag
+
+    def test_if_match_stale(self, logged_get, logged_patch, user):
+        etag = logged_get(user, self.url)['ETag']
+        Profile.objects.get(user=user).save()
+
+        response = logged_patch(
+            user, self.url, {'city': 'Lagos'},
+            headers={'HTTP_IF_MATCH': etag})
+        assert response.status_code == 412
+        assert Profile.objects.get(user=user).city != 'Lagos'
+
+    def test_concurrent_update(self, logged_patch, user, mocker):
+        # Another write lands between the read and the update
+        save = Profile.save
+
+        def concurrent_save(profile, *args, **kwargs):
+            Profile.objects.filter(pk=profile.pk).update(version=100)
+            return save(profile, *args, **kwargs)
+
+        mocker.patch.object(Profile, 'save', concurrent_save)
+        response = logged_patch(user, self.url, {'city': 'Lagos'})
+        assert response.status_code == 412
+
+    def test_no_if_match(self, logged_patch, user):
+        response = logged_patch(user, self.url, {'city': 'Lagos'})
+        assert response.status_code == 200
+
+    def test_version_not_in_data(self, logged_get, user):
+        response = logged_get(user, self.url)
+        assert 'version' not in response.json()['data']
+
+    def test_gzip_weak_etag(self, logged_get, logged_patch, user, settings):
+        settings.COMPRESSION_MIN_SIZE = 0
+        gzip = {'HTTP_ACCEPT_ENCODING': 'gzip'}
+        response = logged_get(user, self.url, headers=gzip)
+        assert response['Content-Encoding'] == 'gzip'
+        etag = response['ETag']
+        assert etag.startswith('W/"')
+
+        response = logged_get(
+            user, self.url, headers={**gzip, 'HTTP_IF_NONE_MATCH': etag})
+        assert response.status_code == 304
+
+        response = logged_patch(
+            user, self.url, {'city': 'Lagos'},
+            headers={**gzip, 'HTTP_IF_MATCH': etag})
+        assert response.status_code == 200
+
+        # Weak etag of the old version
+        response = logged_patch(
+            user, self.url, {'city': 'Abuja'},
+            headers={**gzip, 'HTTP_IF_MATCH': etag})
+        assert response.status_code == 412
+
+
+@pytest.mark.django_db
+class TestConditionalUser:
+
+    url = reverse('auth:user_data')
+
+    def test_etag_has_profile_version(self, logged_get, user):
+        etag = logged_get(user, self.url)['ETag']
+        Profile.objects.get(user=user).save()
+        assert logged_get(user, self.url)['ETag'] != etag
+
+    def test_if_match(self, logged_get, logged_patch, user):
+        etag = logged_get(user, self.url)['ETag']
+        response = logged_patch(
+            user, self.url, {'email': 'new@example.com'},
+            headers={'HTTP_IF_MATCH': etag})
+        assert response.status_code == 200
+        assert User.objects.get(pk=user.pk).email == 'new@example.com'
+
+        response = logged_patch(
+            user, self.url, {'email': 'other@example.com'},
+            headers={'HTTP_IF_MATCH': etag})
+        assert response.status_code == 412
+
+
+def test_version_conflict_handler():
+    response = exception_handler(VersionConflict(), {})
+    assert response.status_code == 412
@@ -0,0 +1,116 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from account.models import Profile, User
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'users.csv'
+    path.write_text(
+        "email,password,first_name,last_name,username\n"
+        "one@gmail.com,test1234,One,User,one\n"
+        "two@gmail.com,,Two,User,\n"
+        "three@gmail.com,test1234,Three,User,\n"
+    )
+    return path
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / 'users.jsonl'
+    path.write_text("\n".join(json.dumps(record) for record in [
+        {'email': 'one@gmail.com', 'password': 'test1234', 'city': 'Lagos'},
+        {'email': 'two@gmail.com'},
+    ]))
+    return path
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+
+    def test_import_csv(self, csv_file):
+        call_command('import_users', csv_file, '--workers', '2')
+
+        assert User.objects.count() == 3
+        assert Profile.objects.count() == 3
+
+        one = User.objects.get(email='one@gmail.com')
+        assert one.check_password('test1234')
+        assert one.profile.username == 'one'
+        assert one.profile.first_name == 'One'
+
+        two = User.objects.get(email='two@gmail.com')
+        assert not two.has_usable_password()
+        assert two.profile.username
+
+    def test_import_jsonl(self, jsonl_file):
+        call_command('import_users', jsonl_file, '--batch-size', '1')
+
+        assert User.objects.count() == 2
+        assert User.objects.get(email='one@gmail.com').profile.city == 'Lagos'
+
+    def test_existing_email(self, csv_file):
+        User.objects.create_user(email='one@gmail.com', password='test1234')
+
+        with pytest.raises(CommandError):
+            call_command('import_users', csv_file)
+        assert User.objects.count() == 1
+
+        call_command('import_users', csv_file, '--skip-existing')
+        assert User.objects.count() == 3
+
+    def test_existing_email_later_batch(self, csv_file):
+        User.objects.create_user(email='three@gmail.com', password='test1234')
+
+        with pytest.raises(CommandError):
+            call_command('import_users', csv_file, '--batch-size', '1')
+        # Nothing is imported before the conflict is found
+        assert User.objects.count() == 1
+
+    def test_duplicate_email(self, tmp_path):
+        path = tmp_path / 'users.csv'
+        path.write_text(
+            "email,first_name\n"
+            "one@gmail.com,First\n"
+            "two@gmail.com,Two\n"
+            "one@GMAIL.com,Second\n"
+        )
+        stderr = io.StringIO()
+        call_command('import_users', path, '--batch-size', '2', stderr=stderr)
+
+        assert User.objects.count() == 2
+        assert User.objects.get(
+            email='one@gmail.com').profile.first_name == 'First'
+        assert 'Duplicate' in stderr.getvalue()
+
+    def test_unknown_format(self, tmp_path):
+        path = tmp_path / 'users.txt'
+        path.write_text('')
+        with pytest.raises(CommandError):
+            call_command('import_users', path)
+
+    def test_invalid_records(self, tmp_path, user):
+        path = tmp_path / 'users.csv'
+        path.write_text(
+            "email,first_name,username\n"
+            "one@gmail.com,One,one\n"
+            "two@gmail.com,Two,one\n"
+            f"three@gmail.com,Three,{user.profile.username}\n"
+            "four@gmail.com,Four,fo#ur\n"
+            f"five@gmail.com,{'F' * 31},five\n"
+            "six@gmail.com,Six,six\n"
+            ",Seven,seven\n"
+        )
+        stderr = io.StringIO()
+        call_command('import_users', path, stderr=stderr)
+
+        assert set(Profile.objects.exclude(user=user).values_list(
+            'username', flat=True)) == {'one', 'six'}
+        errors = stderr.getvalue()
+        for rejected in ('two@', 'three@', 'four@', 'five@', 'Seven'):
+            assert rejected in errors
@@ -0,0 +1,104 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from account.api.base.tokens import login_otp
+from account.models import User
+from utils.base.status import StatCode
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestLoginOtpGenerator:
+    email = 'otp_user@gmail.com'
+
+    def test_check_otp(self):
+        otp = login_otp.make_otp(self.email)
+        assert len(otp) == 6
+
+        assert login_otp.check_otp(self.email, otp)
+
+        # Otp can only be used once
+        assert login_otp.check_otp(self.email, otp) is False
+
+    def test_otp_stored_hashed(self):
+        otp = login_otp.make_otp(self.email)
+        assert cache.get(login_otp.get_cache_key(self.email)) != otp
+
+    def test_resend_timeout(self):
+        assert login_otp.make_otp(self.email)
+        assert login_otp.make_otp(self.email) is None
+
+    def test_max_attempts(self, settings):
+        otp = login_otp.make_otp(self.email)
+        wrong = '0' * 6 if otp != '0' * 6 else '1' * 6
+
+        for _ in range(settings.OTP_MAX_ATTEMPTS):
+            assert login_otp.check_otp(self.email, wrong) is False
+
+        # The right otp is rejected once attempts are used up
+        assert login_otp.check_otp(self.email, otp) is False
+
+    def test_no_otp(self):
+        assert login_otp.check_otp(self.email, '123456') is False
+
+
+@pytest.mark.django_db
+class TestOtpViews:
+
+    @pytest.fixture
+    def mock_send(self, mocker):
+        return mocker.patch('account.api.base.views.send_email_async')
+
+    def test_request_otp(self, post, user, mock_send):
+        response = post(reverse('auth:otp_request'), {'email': user.email})
+        assert response.status_code == StatCode.HTTP_200_OK
+        mock_send.assert_called_once()
+        assert mock_send.call_args.kwargs['email'] == user.email
+
+    def test_request_otp_unknown_email(self, post, mock_send):
+        count = User.objects.count()
+        response = post(
+            reverse('auth:otp_request'), {'email': 'unknown@gmail.com'})
+
+        assert response.status_code == StatCode.HTTP_200_OK
+        mock_send.assert_not_called()
+        assert User.objects.count() == count
+
+    def test_verify_otp(self, post, user):
+        otp = login_otp.make_otp(user.email)
+        response = post(
+            reverse('auth:otp_verify'), {'email': user.email, 'otp': otp})
+
+        assert response.status_code == StatCode.HTTP_200_OK
+        data = response.json()['data']
+        assert data['tokens']['access']
+        assert data['tokens']['refresh']
+        assert data['user']['email'] == user.email
+
+    def test_email_case(self, post, user, mock_send, mocker):
+        make_otp = mocker.spy(login_otp, 'make_otp')
+        post(reverse('auth:otp_request'), {'email': user.email.upper()})
+        assert mock_send.call_args.kwargs['email'] == user.email
+
+        response = post(reverse('auth:otp_verify'), {
+            'email': user.email, 'otp': make_otp.spy_return})
+        assert response.status_code == StatCode.HTTP_200_OK
+
+    def test_verify_marks_email_verified(self, post, user):
+        User.objects.filter(pk=user.pk).update(verified_email=False)
+        otp = login_otp.make_otp(user.email)
+        post(reverse('auth:otp_verify'), {'email': user.email, 'otp': otp})
+
+        user.refresh_from_db()
+        assert user.verified_email
+
+    def test_verify_invalid_otp(self, post, user):
+        login_otp.make_otp(user.email)
+        response = post(
+            reverse('auth:otp_verify'),
+            {'email': user.email, 'otp': 'abcdef'})
+        assert response.status_code == StatCode.HTTP_443_INVALID_OTP
@@ -0,0 +1,125 @@
+import pytest
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from account.api.base.serializers import PrincipalTokenRefreshSerializer
+from account.models import User
+from account.principal import (PRINCIPAL_CLAIMS, Principal,
+                               get_model_user, get_principal_claims)
+from project_api_key.permissions import check_user_set
+from utils.base.general import get_tokens_for_user
+
+
+@pytest.mark.django_db
+class TestPrincipal:
+
+    def test_from_db(self, user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            principal = Principal.from_db(user.id)
+
+            assert principal.id == user.id
+            assert principal.pk == user.pk
+            assert principal.email == user.email
+            assert principal.is_active is user.is_active
+            assert principal.is_staff is user.is_staff
+            assert principal.username == user.profile.username
+            assert principal.first_name == user.profile.first_name
+            assert principal.last_name == user.profile.last_name
+
+    def test_from_db_no_user(self):
+        assert Principal.from_db(0) is None
+
+    def test_from_claims(self, user, settings, django_assert_num_queries):
+        settings.PRINCIPAL_TOKEN_CLAIMS = True
+        token = AccessToken.for_user(user)
+        for claim, value in get_principal_claims(user).items():
+            token[claim] = value
+
+        with django_assert_num_queries(0):
+            principal = Principal.from_token_user(TokenUser(token))
+
+        assert principal.id == user.id
+        for claim in PRINCIPAL_CLAIMS:
+            assert getattr(principal, claim) == getattr(user, claim)
+
+    def test_from_claims_disabled(
+        self, user, settings, django_assert_num_queries
+    ):
+        settings.PRINCIPAL_TOKEN_CLAIMS = False
+        token = AccessToken.for_user(user)
+        for claim, value in get_principal_claims(user).items():
+            token[claim] = value
+
+        with django_assert_num_queries(1):
+            principal = Principal.from_token_user(TokenUser(token))
+        assert principal.id == user.id
+
+    def test_from_claims_missing(self, user):
+        token = AccessToken.for_user(user)
+        assert Principal.from_claims(token) is None
+
+    def test_get_user(self, user, django_assert_num_queries):
+        principal = Principal.from_db(user.id)
+
+        with django_assert_num_queries(1):
+            real_user = principal.get_user()
+            assert principal.get_user() is real_user
+            assert real_user.profile.username == user.profile.username
+
+        assert isinstance(real_user, User)
+        assert get_model_user(principal) is real_user
+        assert get_model_user(user) is user
+
+    def test_upgrade_on_write(self, user):
+        principal = Principal.from_db(user.id)
+        principal.set_password('new-password')
+        principal.save()
+
+        user.refresh_from_db()
+        assert user.check_password('new-password')
+
+    def test_slots(self, user):
+        principal = Principal.from_db(user.id)
+        assert not hasattr(principal, '__dict__')
+        assert principal == user
+        assert hash(principal) == hash(user.id)
+
+    def test_check_user_set(self, user, mocker):
+        token_user = TokenUser(AccessToken.for_user(user))
+        request = mocker.Mock(user=token_user)
+        assert check_user_set(request)
+        assert isinstance(request.user, Principal)
+        assert request.user.id == user.id
+
+        # Set users are kept
+        request = mocker.Mock(user=user)
+        assert check_user_set(request)
+        assert request.user is user
+
+        token = AccessToken.for_user(user)
+        token['user_id'] = 0
+        request = mocker.Mock(user=TokenUser(token))
+        assert check_user_set(request) is False
+        assert isinstance(request.user, TokenUser)
+
+    def test_refresh_reads_claims(self, user, settings):
+        settings.PRINCIPAL_TOKEN_CLAIMS = True
+        user.staff = True
+        user.save()
+        refresh = get_tokens_for_user(user)['refresh']
+
+        # Demoted between refreshes
+        User.objects.filter(id=user.id).update(staff=False)
+        serializer = PrincipalTokenRefreshSerializer(
+            data={'refresh': refresh})
+        assert serializer.is_valid()
+        token = AccessToken(serializer.validated_data['access'])
+        assert token['staff'] is False
+        assert Principal.from_token_user(TokenUser(token)).is_staff is False
+
+        User.objects.filter(id=user.id).update(active=False)
+        serializer = PrincipalTokenRefreshSerializer(
+            data={'refresh': refresh})
+        with pytest.raises(TokenError):
+            serializer.is_valid()
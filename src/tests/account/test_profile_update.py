@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.api.base.serializers import ProfileSerializer, UserSerializer
+from account.models import Profile
+
+
+def get_updates(context) -> list:
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('UPDATE')
+    ]
+
+
+@pytest.mark.django_db
+class TestChangedFieldsUpdate:
+
+    url = reverse('auth:detail_profile')
+
+    def patch(self, logged_patch, user, data):
+        with CaptureQueriesContext(connection) as context:
+            response = logged_patch(user, self.url, data)
+        assert response.status_code == 200
+        return get_updates(context)
+
+    def test_no_op_not_saved(self, logged_patch, user):
+        profile = Profile.objects.get(user=user)
+        updates = self.patch(logged_patch, user, {
+            'city': profile.city, 'first_name': profile.first_name})
+        assert updates == []
+        assert Profile.objects.get(user=user).version == profile.version
+
+    def test_changed_columns_only(self, logged_patch, user):
+        profile = Profile.objects.get(user=user)
+        updates = self.patch(logged_patch, user, {
+            'city': 'Lagos', 'first_name': profile.first_name})
+        assert len(updates) == 1
+
+        sql = updates[0]
+        assert '"city"' in sql
+        assert '"version"' in sql
+        assert '"first_name"' not in sql
+        assert '"created"' not in sql
+
+        updated = Profile.objects.get(user=user)
+        assert updated.city == 'Lagos'
+        assert updated.created == profile.created
+        assert updated.version == profile.version + 1
+
+    def test_serializer_save(self, user, django_assert_num_queries):
+        profile = Profile.objects.get(user=user)
+        serializer = ProfileSerializer(
+            profile, data={'about': profile.about}, partial=True)
+        assert serializer.is_valid()
+        with django_assert_num_queries(0):
+            serializer.save()
+
+        serializer = ProfileSerializer(
+            profile, data={'about': 'Hello'}, partial=True)
+        assert serializer.is_valid()
+        with django_assert_num_queries(1):
+            serializer.save()
+        assert Profile.objects.get(pk=profile.pk).about == 'Hello'
+
+    def test_user_no_op(self, user, django_assert_num_queries):
+        serializer = UserSerializer(
+            user, data={'email': user.email}, partial=True)
+        assert serializer.is_valid()
+        with django_assert_num_queries(0):
+            serializer.save()
@@ -0,0 +1,106 @@
+import pytest
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from account.api.base.serializers import RegisterSerializer
+from account.models import Profile, User
+from utils.base.exceptions import Conflict
+
+
+def get_statements(context: CaptureQueriesContext) -> list:
+    """Captured queries without transaction savepoints"""
+    return [
+        query['sql'].split()[0] for query in context.captured_queries
+        if 'SAVEPOINT' not in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestCreateUserWithProfile:
+    email = 'new_user@gmail.com'
+
+    def test_create(self):
+        with CaptureQueriesContext(connection) as context:
+            user = User.objects.create_user_with_profile(
+                email=self.email, password='test1234',
+                first_name='John', last_name='Doe')
+
+        assert get_statements(context) == ['INSERT', 'INSERT']
+
+        user = User.objects.get(email=self.email)
+        assert user.check_password('test1234')
+        assert user.profile.first_name == 'John'
+        assert user.profile.last_name == 'Doe'
+        assert user.profile.username
+
+    def test_duplicate_email(self):
+        User.objects.create_user_with_profile(
+            email=self.email, password='test1234')
+
+        with pytest.raises(IntegrityError):
+            User.objects.create_user_with_profile(
+                email=self.email, password='test1234')
+        assert User.objects.filter(email=self.email).count() == 1
+
+    def test_generated_username_taken(self, mocker):
+        taken = User.objects.create_user_with_profile(
+            email='taken@gmail.com', password='test1234')
+        mocker.patch(
+            'account.models.username_gen',
+            side_effect=[taken.profile.username, 'user_free'])
+
+        user = User.objects.create_user_with_profile(
+            email=self.email, password='test1234')
+        assert user.profile.username == 'user_free'
+        assert Profile.objects.filter(user__email=self.email).exists()
+
+    def test_create_user_single_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            User.objects.create_user(email=self.email, password='test1234')
+
+        # User and the profile created by the signal
+        assert get_statements(context) == ['INSERT', 'INSERT']
+
+
+@pytest.mark.django_db
+class TestRegisterSerializer:
+    data = {
+        'email': 'new_user@gmail.com',
+        'password': 'Str0ng-passw0rd',
+        'first_name': 'John',
+        'last_name': 'Doe',
+    }
+
+    def test_create(self):
+        serializer = RegisterSerializer(data=self.data)
+        assert serializer.is_valid(), serializer.errors
+
+        with CaptureQueriesContext(connection) as context:
+            user = serializer.save()
+
+        assert get_statements(context) == ['INSERT', 'INSERT']
+        assert user.profile.first_name == 'John'
+
+    def test_duplicate_email(self):
+        User.objects.create_user(
+            email=self.data['email'], password='test1234')
+
+        serializer = RegisterSerializer(data=self.data)
+        assert serializer.is_valid()
+        with pytest.raises(serializers.ValidationError) as excinfo:
+            serializer.save()
+        assert 'email' in excinfo.value.detail
+
+    def test_username_taken(self, mocker):
+        taken = User.objects.create_user_with_profile(
+            email='taken@gmail.com', password='test1234')
+        mocker.patch(
+            'account.models.username_gen',
+            return_value=taken.profile.username)
+
+        serializer = RegisterSerializer(data=self.data)
+        assert serializer.is_valid()
+        with pytest.raises(Conflict):
+            serializer.save()
+        assert not User.objects.filter(email=self.data['email']).exists()
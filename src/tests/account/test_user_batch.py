@@ -0,0 +1,97 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+
+from account.api.base.serializers import UserSerializer
+from account.lookup import lookup_users
+from account.models import Profile, User
+
+serialize = UserSerializer(many=True).to_representation
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestLookupUsers:
+
+    def test_cold_one_query(self, user, django_assert_num_queries):
+        baker.make(User, email='other@example.com')
+        with django_assert_num_queries(1):
+            by_id, by_email = lookup_users(
+                [user.pk], ['other@example.com'], serialize)
+        assert by_id[user.pk]['email'] == user.email
+        assert by_email['other@example.com']['email'] == 'other@example.com'
+
+    def test_cached(self, user, django_assert_num_queries):
+        lookup_users([user.pk], [user.email], serialize)
+        with django_assert_num_queries(0):
+            by_id, by_email = lookup_users([user.pk], [user.email], serialize)
+        assert by_id[user.pk] == by_email[user.email]
+
+    def test_missing(self, user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            by_id, by_email = lookup_users(
+                [user.pk, user.pk + 1], ['none@example.com'], serialize)
+        assert list(by_id) == [user.pk]
+        assert by_email == {}
+
+    def test_forgotten_on_save(self, user):
+        lookup_users([user.pk], [], serialize)
+        profile = Profile.objects.get(user=user)
+        profile.city = 'Lagos'
+        profile.save()
+
+        by_id, _ = lookup_users([user.pk], [], serialize)
+        assert by_id[user.pk]['profile']['city'] == 'Lagos'
+
+    def test_changed_email(self, user):
+        email = user.email
+        lookup_users([], [email], serialize)
+        user = User.objects.get(pk=user.pk)
+        user.email = 'new@example.com'
+        user.save()
+
+        _, by_email = lookup_users([], [email, 'new@example.com'], serialize)
+        assert list(by_email) == ['new@example.com']
+
+
+@pytest.mark.django_db
+class TestUserBatchLookupView:
+
+    url = reverse('auth:user_batch')
+
+    def test_lookup(self, post, user):
+        # Looked up normalized, keyed by the email passed
+        name, domain = user.email.split('@')
+        email = f'{name}@{domain.upper()}'
+        response = post(self.url, {
+            'ids': [user.pk, user.pk + 1], 'emails': [email]})
+        assert response.status_code == 200
+        assert response.data['ids'][str(user.pk)]['email'] == user.email
+        assert response.data['emails'][email]['email'] == user.email
+        assert response.data['missing'] == {
+            'ids': [user.pk + 1], 'emails': []}
+
+    def test_missing_email(self, post, user):
+        response = post(self.url, {'emails': ['none@example.com']})
+        assert response.status_code == 200
+        assert response.data['emails'] == {}
+        assert response.data['missing']['emails'] == ['none@example.com']
+
+    def test_empty(self, post):
+        assert post(self.url, {}).status_code == 400
+
+    def test_limit(self, post, settings):
+        settings.USER_BATCH_LOOKUP_LIMIT = 2
+        response = post(self.url, {'ids': [1, 2, 3]})
+        assert response.status_code == 400
+
+    def test_keyless(self, keyless_post, user):
+        response = keyless_post(self.url, {'ids': [user.pk]})
+        assert response.status_code in (401, 403)
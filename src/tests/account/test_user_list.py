@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from account.models import User
+from utils.base.renderer import drop_empty
+from utils.base.status import StatCode
+
+
+def read_lines(response):
+    assert response['Content-Type'] == 'application/x-ndjson'
+    content = b''.join(response.streaming_content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db
+class TestUserListNDJSON:
+
+    @pytest.fixture(autouse=True)
+    def users(self, settings):
+        settings.STREAM_CHUNK_SIZE = 2
+        baker.make(User, _quantity=4)
+
+    def check_lines(self, lines, path):
+        meta, *rows = lines
+        assert meta == {
+            'success': True,
+            'message': 'Request is successful',
+            'path': path,
+        }
+
+        emails = list(
+            User.objects.order_by('email').values_list('email', flat=True))
+        assert [row['email'] for row in rows] == emails
+
+    def test_accept_header(self, logged_get, user):
+        response = logged_get(
+            user, reverse('auth:user_list'),
+            headers={'HTTP_ACCEPT': 'application/x-ndjson'})
+        assert response.status_code == StatCode.HTTP_200_OK
+        self.check_lines(read_lines(response), reverse('auth:user_list'))
+
+    def test_format_query(self, logged_get, user):
+        response = logged_get(
+            user, reverse('auth:user_list'), {'format': 'ndjson'})
+        self.check_lines(read_lines(response), reverse('auth:user_list'))
+
+    def test_format_suffix(self, logged_get, user):
+        url = reverse('auth:user_list', kwargs={'format': 'ndjson'})
+        assert url.endswith('users.ndjson/')
+
+        response = logged_get(user, url)
+        self.check_lines(read_lines(response), url)
+
+    def test_compact(self, logged_get, user):
+        response = logged_get(
+            user, reverse('auth:user_list'), {'format': 'ndjson'},
+            headers={'HTTP_X_ENVELOPE': 'compact'})
+        meta, *rows = read_lines(response)
+        assert meta == {}
+        assert rows and all(row == drop_empty(row) for row in rows)
+
+    def test_json_still_paginated(self, logged_get, user):
+        response = logged_get(user, reverse('auth:user_list'))
+        data = response.json()['data']
+        assert data['count'] == User.objects.count()
+
+    def test_error_line(self, get):
+        # No user token, the error is rendered as ndjson too
+        response = get(
+            reverse('auth:user_list'),
+            headers={'HTTP_ACCEPT': 'application/x-ndjson'})
+
+        assert response.status_code == StatCode.HTTP_401_FAILED_AUTHENTICATION
+        meta, detail = [
+            json.loads(line) for line in response.content.splitlines()]
+        assert meta['success'] is False
+        assert meta['error']['code'] == '401'
+        assert 'detail' in detail
+
+
+@pytest.mark.django_db
+class TestUserListColumnar:
+
+    def test_columnar(self, logged_get, user):
+        baker.make(User, _quantity=3)
+        response = logged_get(
+            user, reverse('auth:user_list'),
+            headers={'HTTP_ACCEPT': 'application/vnd.columnar+json'})
+
+        assert response.status_code == StatCode.HTTP_200_OK
+        assert response['Content-Type'] == 'application/vnd.columnar+json'
+
+        data = response.json()['data']
+        assert data['count'] == User.objects.count()
+
+        results = data['results']
+        names = [column['name'] for column in results['schema']]
+        emails = results['columns'][names.index('email')]
+        assert emails == list(User.objects.order_by(
+            'email').values_list('email', flat=True)[:len(emails)])
+        assert 'profile.username' in names
+
+    def test_format_query(self, logged_get, user):
+        response = logged_get(
+            user, reverse('auth:user_list'), {'format': 'columnar'})
+        assert 'schema' in response.json()['data']['results']
+
+
+@pytest.mark.django_db
+class TestUserListFields:
+
+    @pytest.fixture(autouse=True)
+    def users(self):
+        baker.make(User, _quantity=3)
+
+    def get_results(self, logged_get, user, data=None):
+        response = logged_get(user, reverse('auth:user_list'), data)
+        assert response.status_code == StatCode.HTTP_200_OK
+        return response.json()['data']['results']
+
+    def test_no_params(self, logged_get, user):
+        results = self.get_results(logged_get, user)
+        assert set(results[0]) == {'email', 'profile'}
+        assert 'first_name' in results[0]['profile']
+
+    def test_fields(self, logged_get, user):
+        results = self.get_results(logged_get, user, {'fields': 'email'})
+        assert all(list(row) == ['email'] for row in results)
+
+    def test_nested_fields(self, logged_get, user):
+        results = self.get_results(
+            logged_get, user, {'fields': 'email,profile.first_name'})
+        assert all(set(row) == {'email', 'profile'} for row in results)
+        assert all(list(row['profile']) == ['first_name'] for row in results)
+
+    def test_expand(self, logged_get, user):
+        results = self.get_results(logged_get, user, {'expand': ''})
+        assert list(results[0]) == ['email']
+
+        results = self.get_results(logged_get, user, {'expand': 'profile'})
+        assert set(results[0]) == {'email', 'profile'}
+
+    def test_fields_query_count(
+        self, logged_get, user, django_assert_max_num_queries
+    ):
+        # Nested profile is selected with the users, not once per user
+        baker.make(User, _quantity=5)
+        with django_assert_max_num_queries(4):
+            self.get_results(
+                logged_get, user, {'fields': 'email,profile.username'})
+
+    @pytest.mark.parametrize('data', [None, {'expand': 'profile'}])
+    def test_profile_query_count(
+        self, logged_get, user, data, django_assert_max_num_queries
+    ):
+        # Selected with the users without the fields parameter too
+        baker.make(User, _quantity=5)
+        with django_assert_max_num_queries(4):
+            results = self.get_results(logged_get, user, data)
+        assert all('first_name' in row['profile'] for row in results)
@@ -0,0 +1,99 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from account.models import Profile, taken_usernames
+from utils.base.general import get_usable_name
+from utils.base.status import StatCode
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    taken_usernames.clear()
+
+
+@pytest.mark.django_db
+class TestUsernameAvailable:
+
+    def get_url(self, username):
+        return reverse('auth:username_available', args=[username])
+
+    def test_taken(self, get, user):
+        response = get(self.get_url(user.profile.username))
+        assert response.status_code == StatCode.HTTP_200_OK
+        assert response.json()['data'] == {
+            'username': user.profile.username, 'available': False}
+
+    def test_available(self, get, user):
+        response = get(self.get_url('free_name'))
+        assert response.status_code == StatCode.HTTP_200_OK
+        assert response.json()['data']['available']
+
+    def test_new_username_taken(
+        self, get, user, django_capture_on_commit_callbacks
+    ):
+        # Filter is built, then the username changes
+        taken_usernames.get_filter()
+        user.profile.username = 'renamed'
+        with django_capture_on_commit_callbacks(execute=True):
+            user.profile.save(update_fields=['username'])
+
+        response = get(self.get_url('renamed'))
+        assert response.json()['data']['available'] is False
+
+    def test_available_without_query(
+        self, get, user, django_assert_max_num_queries
+    ):
+        taken_usernames.get_filter()
+        with django_assert_max_num_queries(1):
+            # Only the api key lookup is queried
+            response = get(self.get_url('free_name'))
+        assert response.json()['data']['available']
+
+    def test_invalid_username(self, get):
+        response = get(self.get_url('bad%name'))
+        assert response.status_code == StatCode.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_profile_username_in_filter(user):
+    assert user.profile.username in taken_usernames
+    assert Profile.objects.filter(username=user.profile.username).exists()
+
+
+@pytest.mark.django_db
+def test_unchanged_username_not_added(
+    user, mocker, django_capture_on_commit_callbacks
+):
+    add = mocker.spy(taken_usernames, 'add')
+    profile = Profile.objects.get(user=user)
+    profile.city = 'Lagos'
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.save()
+    assert not add.called
+
+    profile.username = 'renamed'
+    with django_capture_on_commit_callbacks(execute=True):
+        profile.save()
+    add.assert_called_once_with('renamed')
+
+
+@pytest.mark.django_db
+def test_imported_usernames_taken(tmp_path):
+    taken_usernames.get_filter()
+    path = tmp_path / 'users.csv'
+    path.write_text("email,username\none@gmail.com,imported\n")
+    call_command('import_users', path)
+    assert 'imported' in taken_usernames
+
+
+@pytest.mark.django_db
+def test_get_usable_name_taken(user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        username = get_usable_name(Profile, name=user.profile.username)
+    assert username != user.profile.username
+
+    with django_assert_num_queries(1):
+        assert get_usable_name(Profile, name='free_name') == 'free_name'
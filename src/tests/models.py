@@ -1,5 +1,69 @@
 from django.db import models
 
+from utils.base.fields import TrackingCodeField
+from utils.base.mixins import (BaseModelTracker, ModelChangeFunc,
+                               bulk_change_callback)
+
 
 class ModelText(models.Model):
     name = models.CharField(max_length=255)
+
+
+class TrackedModel(BaseModelTracker):
+    tracking_code = TrackingCodeField(prefix='TRK', max_length=60)
+
+
+class TrackedItem(BaseModelTracker):
+    pass
+
+
+# Callback calls of the ModelChangeFunc models, see test_model_change
+change_calls = []
+
+
+def record_field(instance):
+    change_calls.append(('field', instance.pk, instance.field))
+
+
+def record_other(instance):
+    change_calls.append(('other', instance.pk, instance.other))
+
+
+class WatchedModel(ModelChangeFunc):
+    field = models.CharField(max_length=100)
+    other = models.CharField(max_length=100)
+    ignored = models.CharField(max_length=100, default='')
+
+    monitor_change = {
+        'field': record_field,
+        'other': record_other,
+    }
+
+
+@bulk_change_callback
+def record_batch(instances):
+    change_calls.append(
+        ('batch', sorted(instance.pk for instance in instances)))
+
+
+class BatchModel(ModelChangeFunc):
+    field = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+    owner = models.ForeignKey(
+        WatchedModel, null=True, blank=True, on_delete=models.SET_NULL)
+
+    monitor_change = {
+        'field': record_batch,
+        'count': record_batch,
+        'owner': record_batch,
+    }
+
+
+class SharedFuncModel(ModelChangeFunc):
+    field = models.CharField(max_length=100)
+    other = models.CharField(max_length=100)
+
+    monitor_change = {
+        'field': record_field,
+        'other': record_field,
+    }
@@ -1,5 +1,6 @@
 import pytest
-from authentication.models import User
+from account.models import User
+from account.principal import Principal
 from project_api_key.permissions import (HasProjectAPIKey,
                                          HasStaffProjectAPIKey, check_user_set)
 from rest_framework_simplejwt.models import TokenUser
@@ -15,7 +16,8 @@ def test_check_user_set(user, mocker):
     assert isinstance(request.user, TokenUser)
 
     assert check_user_set(request)
-    assert isinstance(request.user, User)
+    assert isinstance(request.user, Principal)
+    assert request.user.id == user.id
 
     request = mocker.Mock()
     request.user = user
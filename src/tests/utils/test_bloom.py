@@ -0,0 +1,130 @@
+import pytest
+from django.core.cache import cache
+
+from utils.base.bloom import BloomFilter, CachedBloomFilter
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+class TestBloomFilter:
+
+    def test_no_false_negatives(self):
+        items = [f'user{i}' for i in range(1000)]
+        bloom = BloomFilter(1000, 0.01)
+        bloom.update(items)
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        bloom.update(f'user{i}' for i in range(1000))
+
+        false_positives = sum(
+            f'other{i}' in bloom for i in range(10000))
+        assert false_positives < 300
+
+    def test_bytes_round_trip(self):
+        bloom = BloomFilter(100)
+        bloom.update(['john', 'jane'])
+
+        loaded = BloomFilter.from_bytes(bloom.to_bytes())
+        assert (loaded.size, loaded.hash_count) == \
+            (bloom.size, bloom.hash_count)
+        assert 'john' in loaded and 'jane' in loaded
+
+
+class TestCachedBloomFilter:
+
+    @pytest.fixture
+    def names(self):
+        return ['john', 'jane']
+
+    @pytest.fixture
+    def bloom(self, names):
+        return CachedBloomFilter(
+            'test-bloom', loader=lambda: iter(names),
+            count=lambda: len(names), capacity=100)
+
+    def test_build_on_first_read(self, bloom):
+        assert cache.get(bloom.key) is None
+        assert 'john' in bloom
+        assert cache.get(bloom.key) is not None
+
+    def test_add(self, bloom, names):
+        bloom.get_filter()
+        bloom.add('doe')
+        assert 'doe' in bloom
+
+        # Other processes read the updated filter from the cache
+        other = CachedBloomFilter(
+            bloom.key, loader=lambda: iter(()), count=lambda: 0)
+        assert all(name in other for name in names + ['doe'])
+
+    def test_add_before_build(self, bloom, names):
+        bloom.add('doe')
+        names.append('doe')
+        assert 'doe' in bloom
+
+    def test_clear(self, bloom):
+        bloom.get_filter()
+        bloom.clear()
+        assert cache.get(bloom.key) is None
+
+    def test_concurrent_adds(self, names):
+        # Processes holding their own copy of the filter
+        first, second = [
+            CachedBloomFilter(
+                'test-bloom', loader=lambda: iter(names), count=lambda: 2,
+                local_timeout=0)
+            for _ in range(2)
+        ]
+        first.get_filter()
+        second.get_filter()
+
+        first.add('doe')
+        second.add('roe')
+        assert all(name in first for name in ('doe', 'roe'))
+        assert all(name in second for name in ('doe', 'roe'))
+
+    def test_added_seen_after_local_timeout(self, bloom, mocker):
+        monotonic = mocker.patch(
+            'utils.base.bloom.time.monotonic', return_value=0)
+        other = CachedBloomFilter(
+            bloom.key, loader=lambda: iter(()), count=lambda: 0)
+        bloom.get_filter()
+        other.get_filter()
+
+        other.add('doe')
+        # Seen at once by the adding process only
+        assert 'doe' in other
+        assert 'doe' not in bloom
+
+        monotonic.return_value = bloom.local_timeout
+        assert 'doe' in bloom
+
+    def test_negative_lookup_without_cache(self, bloom, mocker):
+        bloom.get_filter()
+        get = mocker.spy(cache, 'get')
+        assert 'doe' not in bloom
+        assert not get.called
+
+    def test_build_locked(self, bloom, mocker):
+        loader = mocker.spy(bloom, 'loader')
+        # Another process is building the filter
+        cache.add(f'{bloom.key}:lock', True)
+        assert 'anything' in bloom
+        assert cache.get(bloom.key) is None
+        assert not loader.called
+
+    def test_stale_rebuilt(self, bloom):
+        cache.set(bloom.key, (0, 0, BloomFilter(10).to_bytes()))
+        assert 'john' in bloom
+        assert cache.get(bloom.key)[0] > 0
+
+    def test_add_keeps_filter(self, bloom):
+        bloom.get_filter()
+        built = cache.get(bloom.key)
+        bloom.add_many(['doe', 'roe'])
+        assert cache.get(bloom.key) == built
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from django.test import RequestFactory
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from account.api.base.serializers import UserSerializer
+from account.models import Profile, User
+from utils.base.columnar import (ColumnarRenderer, rows_to_columnar,
+                                 serialize_columnar)
+
+
+@pytest.fixture
+def users():
+    users = []
+    for i in range(3):
+        user = User(id=i + 1, email=f'user{i}@example.com')
+        user.profile = Profile(
+            id=i + 1, user=user, username=f'user{i}', first_name='John')
+        users.append(user)
+    return users
+
+
+def to_rows(columnar):
+    names = [column['name'] for column in columnar['schema']]
+    return [dict(zip(names, row)) for row in zip(*columnar['columns'])]
+
+
+def flatten(row, prefix=''):
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+class TestSerializeColumnar:
+
+    def test_same_values_as_rows(self, users):
+        columnar = serialize_columnar(UserSerializer(many=True), users)
+        rows = UserSerializer(users, many=True).data
+
+        assert columnar['count'] == 3
+        assert to_rows(columnar) == [flatten(row) for row in rows]
+
+    def test_schema(self, users):
+        schema = serialize_columnar(
+            UserSerializer(many=True), users)['schema']
+        names = [column['name'] for column in schema]
+
+        assert names[:3] == ['email', 'profile.id', 'profile.fullname']
+        assert {'name': 'profile.id', 'type': 'integer',
+                'nullable': False} in schema
+
+    def test_null_nested(self):
+        class ParentSerializer(serializers.Serializer):
+            name = serializers.CharField()
+
+        class Serializer(serializers.Serializer):
+            name = serializers.CharField()
+            parent = ParentSerializer(allow_null=True)
+
+        columnar = serialize_columnar(
+            Serializer(many=True),
+            [
+                {'name': 'a', 'parent': None},
+                {'name': 'b', 'parent': {'name': 'a'}},
+            ]
+        )
+        assert columnar['schema'][1] == {
+            'name': 'parent.name', 'type': 'string', 'nullable': True}
+        assert columnar['columns'] == [['a', 'b'], [None, 'a']]
+
+    def test_empty(self):
+        columnar = serialize_columnar(UserSerializer(many=True), [])
+        assert columnar['count'] == 0
+        assert all(column == [] for column in columnar['columns'])
+
+
+def test_rows_to_columnar():
+    columnar = rows_to_columnar([
+        {'id': 1, 'profile': {'name': 'a'}},
+        {'id': 2, 'profile': {'name': None}, 'active': True},
+    ])
+    assert columnar['schema'] == [
+        {'name': 'id', 'type': 'integer', 'nullable': False},
+        {'name': 'profile.name', 'type': 'string', 'nullable': True},
+        {'name': 'active', 'type': 'boolean', 'nullable': True},
+    ]
+    assert columnar['columns'] == [[1, 2], ['a', None], [None, True]]
+
+
+class TestColumnarRenderer:
+
+    def render(self, data, status=200):
+        response = Response(data, status)
+        return json.loads(ColumnarRenderer().render(
+            data, renderer_context={
+                'request': RequestFactory().get('/'),
+                'response': response,
+            }
+        ))
+
+    def test_rows(self):
+        data = self.render([{'id': 1}, {'id': 2}])['data']
+        assert data['columns'] == [[1, 2]]
+
+    def test_paginated_rows(self):
+        data = self.render(
+            {'count': 1, 'next': None, 'results': [{'id': 1}]})['data']
+        assert data['count'] == 1
+        assert data['results']['columns'] == [[1]]
+
+    def test_error(self):
+        data = self.render({'detail': 'Not found.'}, 404)['data']
+        assert data == {'detail': 'Not found.'}
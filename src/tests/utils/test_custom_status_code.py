@@ -1,4 +1,4 @@
-from utils.base.status import StatCode
+from utils.base.status import STATUS_MESSAGES, CustomStatusCode, StatCode
 
 
 class TestCustomStatusCode:
@@ -54,3 +54,15 @@ class TestCustomStatusCode:
 
     def test_http_442_bad_payment_request(self):
         assert self.code.HTTP_442_BAD_PAYMENT_REQUEST == 442
+
+    def test_http_443_invalid_otp(self):
+        assert self.code.HTTP_443_INVALID_OTP == 443
+
+
+def test_status_messages():
+    assert len(STATUS_MESSAGES) == len([
+        name for name in vars(CustomStatusCode) if name.startswith('HTTP_')])
+    assert STATUS_MESSAGES['438'] == \
+        CustomStatusCode.HTTP_438_NOT_VERIFIED.__doc__
+    assert all(str(getattr(StatCode, name)) in STATUS_MESSAGES
+               for name in vars(CustomStatusCode) if name.startswith('HTTP_'))
@@ -84,3 +84,47 @@ class TestResponseDecorator(SimpleTestCase):
 
         self.assertDictEqual(response, expected)
         self.assertDictEqual(decorator.data, self.data)
+
+    def test_status_in_data(self):
+        data = {'status': 438, **self.data}
+        decorator = ResponseDecorator(data=data, status=200)
+
+        assert decorator.status == '438'
+        assert decorator.success is False
+        self.assertDictEqual(decorator.data, self.data)
+
+        # Passed data is left as it was
+        assert data['status'] == 438
+
+    def test_unknown_status(self):
+        decorator = ResponseDecorator(data=self.data, status=502)
+        assert decorator.message is None
+        assert decorator.success is False
+
+    def test_get_compact_response(self):
+        decorator = ResponseDecorator(
+            data={'user': 1, 'name': None, 'tags': [], 'about': {'bio': ''}},
+            status=200
+        )
+        self.assertDictEqual(
+            decorator.get_response(compact=True), {'data': {'user': 1}})
+
+    def test_get_compact_response_message(self):
+        decorator = ResponseDecorator(
+            data={}, status=200, message='Created the user')
+        self.assertDictEqual(
+            decorator.get_response(compact=True),
+            {'message': 'Created the user'})
+
+    def test_get_compact_error_response(self):
+        decorator = ResponseDecorator(data=self.data, status=400)
+        self.assertDictEqual(
+            decorator.get_response(compact=True),
+            {'error': {'code': '400'}, 'data': self.data})
+
+    def test_get_compact_response_list(self):
+        decorator = ResponseDecorator(
+            data=[{'id': 1, 'name': None}, {}], status=200)
+        self.assertDictEqual(
+            decorator.get_response(compact=True),
+            {'data': [{'id': 1}, {}]})
@@ -0,0 +1,83 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+from utils.base.encoders import (DRFJSONBackend, OrjsonJSONBackend, RawJSON,
+                                 RawJSONSplicer, SimpleJSONBackend,
+                                 StdlibJSONBackend, get_json_backend,
+                                 raw_json_splicer)
+
+
+@pytest.fixture
+def data():
+    return {
+        'id': uuid.UUID('6f1c2f52-2f1c-4b5a-8a43-8d1f1f5f3a11'),
+        'amount': decimal.Decimal('10.50'),
+        'created': datetime.datetime(2022, 1, 2, 3, 4, 5),
+        'day': datetime.date(2022, 1, 2),
+        'name': 'Zo\u00eb\u2028',
+        'items': (1, 2.5, None, True),
+    }
+
+
+def as_bytes(computed) -> bytes:
+    return computed.encode() if isinstance(computed, str) else computed
+
+
+@pytest.mark.parametrize(
+    'backend', [StdlibJSONBackend, SimpleJSONBackend, OrjsonJSONBackend])
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+def test_same_as_drf(backend, data, ensure_ascii):
+    options = {'ensure_ascii': ensure_ascii, 'separators': (',', ':')}
+    assert as_bytes(backend().dumps(data, **options)) == \
+        as_bytes(DRFJSONBackend().dumps(data, **options))
+
+
+def test_orjson_bytes(data):
+    computed = OrjsonJSONBackend().dumps(
+        data, ensure_ascii=False, separators=(',', ':'))
+    assert isinstance(computed, bytes)
+    assert json.loads(computed)['name'] == 'Zo\u00eb\u2028'
+
+    # Options orjson can not write use the stdlib encoder
+    assert '\n    "id"' in OrjsonJSONBackend().dumps(data, indent=4)
+
+
+def test_indent(data):
+    computed = StdlibJSONBackend().dumps(data, indent=4)
+    assert json.loads(computed)['amount'] == 10.5
+    assert '\n    "id"' in computed
+
+
+def test_not_allow_nan():
+    with pytest.raises(ValueError):
+        StdlibJSONBackend().dumps({'value': float('nan')}, allow_nan=False)
+
+
+def test_get_json_backend():
+    backend = get_json_backend('utils.base.encoders.StdlibJSONBackend')
+    assert isinstance(backend, StdlibJSONBackend)
+    assert get_json_backend('utils.base.encoders.StdlibJSONBackend') is backend
+
+
+@pytest.mark.parametrize('backend', [
+    DRFJSONBackend, StdlibJSONBackend, SimpleJSONBackend, OrjsonJSONBackend])
+def test_raw_json_splice(backend):
+    splicer = RawJSONSplicer()
+    token = raw_json_splicer.set(splicer)
+    try:
+        computed = backend().dumps(
+            {'raw': RawJSON(b'{"a": 1}')}, ensure_ascii=False,
+            separators=(',', ':'))
+    finally:
+        raw_json_splicer.reset(token)
+
+    assert splicer.splice(as_bytes(computed)) == b'{"raw":{"a": 1}}'
+
+
+def test_raw_json_without_splicer():
+    computed = StdlibJSONBackend().dumps({'raw': RawJSON('[1, 2]')})
+    assert json.loads(computed) == {'raw': [1, 2]}
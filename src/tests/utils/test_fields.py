@@ -0,0 +1,108 @@
+import multiprocessing
+import re
+import time
+
+import pytest
+
+from tests.models import TrackedModel
+from utils.base import general
+from utils.base.general import TrackingIdGenerator, create_unique_tracking_id
+
+ULID_RE = re.compile(r'^[0-9A-HJKMNP-TV-Z]{26}$')
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def decode(ulid: str) -> int:
+    value = 0
+    for char in ulid:
+        value = value * 32 + CROCKFORD.index(char)
+    return value
+
+
+def generate(count: int) -> list:
+    return [create_unique_tracking_id() for _ in range(count)]
+
+
+class TestTrackingIdGenerator:
+
+    def test_format(self):
+        code = create_unique_tracking_id(prefix='UID')
+        assert code.startswith('UID')
+        assert ULID_RE.match(code[3:])
+
+    def test_timestamp(self):
+        before = time.time_ns() // 1_000_000
+        code = create_unique_tracking_id()
+        after = time.time_ns() // 1_000_000
+        assert before <= decode(code[:10]) <= after
+
+    def test_ordered(self):
+        codes = generate(10000)
+        assert codes == sorted(codes)
+        assert len(set(codes)) == len(codes)
+
+    def test_same_millisecond(self, mocker):
+        mocker.patch.object(general.time, 'time_ns', return_value=10 ** 12)
+        generator = TrackingIdGenerator()
+        first, second = generator(), generator()
+        assert first[:10] == second[:10]
+        assert decode(second) == decode(first) + 1
+
+    def test_clock_back(self, mocker):
+        time_ns = mocker.patch.object(general.time, 'time_ns')
+        generator = TrackingIdGenerator()
+        time_ns.return_value = 2 * 10 ** 12
+        first = generator()
+        time_ns.return_value = 10 ** 12
+        assert generator() > first
+
+    def test_random_overflow(self, mocker):
+        mocker.patch.object(general.time, 'time_ns', return_value=10 ** 12)
+        generator = TrackingIdGenerator()
+        generator()
+        generator.last_random = 2 ** 80 - 1
+        code = generator()
+        assert decode(code[:10]) == 10 ** 6 + 1
+
+    def test_processes_unique(self):
+        # Parent state is copied to forked children
+        create_unique_tracking_id()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(4) as pool:
+            results = pool.map(generate, [20000] * 8)
+
+        codes = [code for result in results for code in result]
+        assert len(set(codes)) == len(codes)
+        for result in results:
+            assert result == sorted(result)
+
+
+@pytest.mark.django_db
+class TestTrackingCodeField:
+
+    def test_save(self):
+        obj = TrackedModel.objects.create()
+        assert obj.tracking_code.startswith('TRK')
+        assert ULID_RE.match(obj.tracking_code[3:])
+
+        code = obj.tracking_code
+        obj.save()
+        obj.refresh_from_db()
+        assert obj.tracking_code == code
+
+    def test_bulk_create(self, django_assert_num_queries):
+        objs = [TrackedModel() for _ in range(50)]
+        with django_assert_num_queries(1):
+            TrackedModel.objects.bulk_create(objs)
+
+        codes = [obj.tracking_code for obj in objs]
+        assert all(codes)
+        assert codes == sorted(codes)
+        assert sorted(
+            TrackedModel.objects.values_list('tracking_code', flat=True)
+        ) == codes
+
+    def test_code_kept(self):
+        code = create_unique_tracking_id(prefix='TRK')
+        obj = TrackedModel.objects.create(tracking_code=code)
+        assert obj.tracking_code == code
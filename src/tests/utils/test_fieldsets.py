@@ -0,0 +1,143 @@
+import pytest
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+
+from account.api.base.serializers import UserSerializer
+from account.models import User
+from utils.base.fieldsets import (SparseFieldsMixin, narrow_queryset,
+                                  parse_fieldset)
+
+
+def get_request(query=''):
+    return Request(APIRequestFactory().get(f'/?{query}'))
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        (None, None),
+        ('', {}),
+        ('email', {'email': {}}),
+        ('email, profile.city,profile.zip', {
+            'email': {}, 'profile': {'city': {}, 'zip': {}}}),
+        ('profile,profile.city', {'profile': {'city': {}}}),
+    ]
+)
+def test_parse_fieldset(value, expected):
+    assert parse_fieldset(value) == expected
+
+
+class TestSparseFieldsMixin:
+
+    class ChildSerializer(SparseFieldsMixin, serializers.Serializer):
+        a = serializers.CharField()
+        b = serializers.CharField()
+
+    class ParentSerializer(SparseFieldsMixin, serializers.Serializer):
+        name = serializers.CharField()
+        age = serializers.IntegerField()
+        child = None
+
+        class Meta:
+            expandable_fields = ['child']
+
+    @pytest.fixture
+    def serializer_class(self):
+        class Serializer(self.ParentSerializer):
+            child = self.ChildSerializer()
+        return Serializer
+
+    @pytest.fixture
+    def instance(self):
+        return {'name': 'n', 'age': 1, 'child': {'a': 'a', 'b': 'b'}}
+
+    def serialize(self, serializer_class, instance, query):
+        return serializer_class(
+            instance, context={'request': get_request(query)}).data
+
+    def test_no_params(self, serializer_class, instance):
+        assert self.serialize(serializer_class, instance, '') == instance
+
+    def test_fields(self, serializer_class, instance):
+        assert self.serialize(
+            serializer_class, instance, 'fields=name,child.b'
+        ) == {'name': 'n', 'child': {'b': 'b'}}
+
+    def test_fields_nested_whole(self, serializer_class, instance):
+        assert self.serialize(
+            serializer_class, instance, 'fields=age,child'
+        ) == {'age': 1, 'child': {'a': 'a', 'b': 'b'}}
+
+    def test_expand_only(self, serializer_class, instance):
+        assert self.serialize(
+            serializer_class, instance, 'expand=child') == instance
+        assert self.serialize(
+            serializer_class, instance, 'expand=') == {'name': 'n', 'age': 1}
+
+    def test_fields_and_expand(self, serializer_class, instance):
+        assert self.serialize(
+            serializer_class, instance, 'fields=name&expand=child'
+        ) == {'name': 'n', 'child': {'a': 'a', 'b': 'b'}}
+
+    def test_keyword_arguments(self, serializer_class, instance):
+        serializer = serializer_class(instance, fields={'age': {}})
+        assert serializer.data == {'age': 1}
+
+    def test_many(self, serializer_class, instance):
+        data = serializer_class(
+            [instance, instance], many=True,
+            context={'request': get_request('fields=name')}).data
+        assert data == [{'name': 'n'}, {'name': 'n'}]
+
+    def test_write_request_ignored(self, serializer_class, instance):
+        request = Request(APIRequestFactory().post('/?fields=name'))
+        data = serializer_class(instance, context={'request': request}).data
+        assert data == instance
+
+
+def only_fields(queryset):
+    return queryset.query.deferred_loading
+
+
+class TestNarrowQueryset:
+
+    def narrow(self, query):
+        serializer = UserSerializer(
+            many=True, context={'request': get_request(query)})
+        return narrow_queryset(User.objects.all(), serializer)
+
+    def test_plain_fields(self):
+        queryset = self.narrow('fields=email')
+        assert only_fields(queryset) == ({'email'}, False)
+        assert not queryset.query.select_related
+
+    def test_nested_fields(self):
+        queryset = self.narrow('fields=email,profile.first_name')
+        assert only_fields(queryset) == (
+            {'email', 'profile__first_name'}, False)
+        assert queryset.query.select_related == {'profile': {}}
+
+    def test_nested_property_loads_model(self):
+        # fullname is a property, so the whole profile is loaded
+        fields, _ = only_fields(
+            self.narrow('fields=email,profile.fullname'))
+        assert 'profile__about' in fields
+        assert 'password' not in fields
+
+
+@pytest.mark.django_db
+def test_narrowed_queryset_serializes(user, django_assert_num_queries):
+    serializer = UserSerializer(
+        many=True,
+        context={'request': get_request('fields=email,profile.username')})
+    queryset = narrow_queryset(User.objects.filter(pk=user.pk), serializer)
+
+    with django_assert_num_queries(1):
+        serializer.instance = queryset
+        data = serializer.data
+
+    assert data == [{
+        'email': user.email,
+        'profile': {'username': user.profile.username},
+    }]
@@ -0,0 +1,94 @@
+import gzip
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from utils.base.middleware import CompressionMiddleware, accepts_encoding
+
+BODY = b'{"success":true,"data":[' + b'{"name":"tester"},' * 200 + b'{}]}'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def get_response(response, accept_encoding='gzip, deflate, br'):
+    request = RequestFactory().get(
+        '/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@pytest.mark.parametrize(
+    'header, expected',
+    [
+        ('gzip', True),
+        ('deflate, gzip;q=0.5', True),
+        ('gzip;q=0', False),
+        ('*', True),
+        ('*;q=0.1, gzip;q=0', False),
+        ('deflate, br', False),
+        ('', False),
+    ]
+)
+def test_accepts_encoding(header, expected):
+    assert accepts_encoding(header, 'gzip') is expected
+
+
+class TestCompressionMiddleware:
+
+    def test_compress(self):
+        response = HttpResponse(BODY)
+        response['ETag'] = '"abc"'
+        response = get_response(response)
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['Vary'] == 'Accept-Encoding'
+        assert response['ETag'] == 'W/"abc"'
+        assert int(response['Content-Length']) == len(response.content)
+        assert gzip.decompress(response.content) == BODY
+
+    def test_not_accepted(self):
+        response = get_response(HttpResponse(BODY), 'br')
+        assert not response.has_header('Content-Encoding')
+        assert response['Vary'] == 'Accept-Encoding'
+        assert response.content == BODY
+
+    def test_below_min_size(self, settings):
+        settings.COMPRESSION_MIN_SIZE = len(BODY) + 1
+        response = get_response(HttpResponse(BODY))
+        assert not response.has_header('Content-Encoding')
+        assert response.content == BODY
+
+    def test_already_encoded(self):
+        response = HttpResponse(BODY)
+        response['Content-Encoding'] = 'br'
+        assert get_response(response).content == BODY
+
+    def test_incompressible(self, settings):
+        settings.COMPRESSION_MIN_SIZE = 0
+        response = get_response(HttpResponse(b'{}'))
+        assert not response.has_header('Content-Encoding')
+
+    def test_streaming(self):
+        response = get_response(StreamingHttpResponse([BODY[:50], BODY[50:]]))
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(b''.join(response.streaming_content)) == BODY
+
+    def test_cached(self, settings, mocker):
+        settings.COMPRESSION_CACHE_TIMEOUT = 300
+        compress = mocker.spy(gzip, 'compress')
+        first = get_response(HttpResponse(BODY))
+        second = get_response(HttpResponse(BODY))
+
+        assert compress.call_count == 1
+        assert first.content == second.content
+
+    def test_cache_disabled(self, mocker):
+        # Off by default
+        compress = mocker.spy(gzip, 'compress')
+        get_response(HttpResponse(BODY))
+        get_response(HttpResponse(BODY))
+        assert compress.call_count == 2
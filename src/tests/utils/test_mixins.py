@@ -168,7 +168,9 @@ class TestModelChangeMixin:
         assert model.check is True
         assert model.field == 'test1'
 
-    def test_model_change_func_valid_change(self):
+    def test_model_change_func_valid_change(
+        self, django_capture_on_commit_callbacks
+    ):
         model = self._Model(
             field='test1',
             other='test2',
@@ -178,7 +180,8 @@ class TestModelChangeMixin:
         assert model.field == 'test1'
 
         model.field = 'test'
-        model.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            model.save()
         assert model.check is True
         assert model.field == 'test'
 
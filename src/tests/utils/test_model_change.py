@@ -0,0 +1,340 @@
+import pytest
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Concat
+
+from tests.models import (BatchModel, SharedFuncModel, WatchedModel,
+                          change_calls)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    change_calls.clear()
+
+
+@pytest.fixture
+def watched():
+    return WatchedModel.objects.create(field='a', other='b').pk
+
+
+@pytest.mark.django_db
+class TestModelChangeFunc:
+
+    def test_create_callbacks(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            instance = WatchedModel.objects.create(field='a', other='b')
+        assert len(callbacks) == 1
+        assert change_calls == [
+            ('field', instance.pk, 'a'),
+            ('other', instance.pk, 'b'),
+        ]
+
+    def test_create_then_change(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            instance = WatchedModel.objects.create(field='a', other='b')
+            instance.field = 'changed'
+            instance.save()
+        assert change_calls == [
+            ('field', instance.pk, 'changed'),
+            ('other', instance.pk, 'b'),
+        ]
+
+    def test_loaded_save_no_change(
+        self, watched, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        instance = WatchedModel.objects.get(pk=watched)
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with django_assert_num_queries(1):
+                instance.save()
+        assert callbacks == []
+        assert change_calls == []
+
+    def test_unmonitored_change(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        instance = WatchedModel.objects.get(pk=watched)
+        instance.ignored = 'changed'
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            instance.save()
+        assert callbacks == []
+        assert change_calls == []
+
+    def test_change_deferred_to_commit(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        instance = WatchedModel.objects.get(pk=watched)
+        instance.field = 'changed'
+        with django_capture_on_commit_callbacks() as callbacks:
+            instance.save()
+        assert change_calls == []
+        assert len(callbacks) == 1
+
+        callbacks[0]()
+        assert change_calls == [('field', watched, 'changed')]
+
+    def test_callbacks_deduplicated(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        instance = WatchedModel.objects.get(pk=watched)
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            for value in ('x', 'y', 'z'):
+                instance.field = value
+                instance.save()
+            instance.other = 'changed'
+            instance.save()
+        assert len(callbacks) == 4
+        assert change_calls == [
+            ('field', watched, 'z'),
+            ('other', watched, 'changed'),
+        ]
+
+    def test_last_instance_of_row(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            first = WatchedModel.objects.get(pk=watched)
+            first.field = 'first'
+            first.save()
+
+            second = WatchedModel.objects.get(pk=watched)
+            second.field = 'second'
+            second.save()
+        assert change_calls == [('field', watched, 'second')]
+
+    def test_rows_batched(self, django_capture_on_commit_callbacks):
+        pks = [
+            WatchedModel.objects.create(field='a', other='b').pk
+            for _ in range(5)
+        ]
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            for instance in WatchedModel.objects.filter(pk__in=pks):
+                instance.field = 'changed'
+                instance.save()
+        assert len(callbacks) == 5
+        assert sorted(change_calls) == [('field', pk, 'changed') for pk in pks]
+
+    def test_shared_func_once(self, django_capture_on_commit_callbacks):
+        instance = SharedFuncModel.objects.create(field='a', other='b')
+        instance.field = 'x'
+        instance.other = 'y'
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.save()
+        assert change_calls == [('field', instance.pk, 'x')]
+
+    def test_savepoint_rollback(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        instance = WatchedModel.objects.get(pk=watched)
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    instance.field = 'rolled back'
+                    instance.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        assert change_calls == []
+
+    def test_savepoint_rollback_keeps_outer(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        other = WatchedModel.objects.create(field='a', other='b')
+        with django_capture_on_commit_callbacks(execute=True):
+            instance = WatchedModel.objects.get(pk=watched)
+            instance.field = 'kept'
+            instance.save()
+            try:
+                with transaction.atomic():
+                    other.field = 'rolled back'
+                    other.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        assert change_calls == [('field', watched, 'kept')]
+
+    def test_deferred_field(
+        self, watched, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        instance = WatchedModel.objects.only('other').get(pk=watched)
+        with django_capture_on_commit_callbacks(execute=True):
+            with django_assert_num_queries(1):
+                instance.other = 'changed'
+                instance.save(update_fields=['other'])
+        assert change_calls == [('other', watched, 'changed')]
+
+    def test_deferred_field_loaded(
+        self, watched, django_capture_on_commit_callbacks
+    ):
+        instance = WatchedModel.objects.only('other').get(pk=watched)
+        assert instance.field == 'a'
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.save()
+        assert change_calls == []
+
+    def test_update_fields(self, watched, django_capture_on_commit_callbacks):
+        instance = WatchedModel.objects.get(pk=watched)
+        instance.field = 'unsaved'
+        instance.other = 'saved'
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.save(update_fields=['other'])
+        assert change_calls == [('other', watched, 'saved')]
+
+        # Still changed until saved
+        change_calls.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            instance.save()
+        assert change_calls == [('field', watched, 'unsaved')]
+
+
+@pytest.mark.django_db
+class TestModelChangeQuerySet:
+
+    @pytest.fixture
+    def pks(self):
+        return [
+            obj.pk for obj in BatchModel.objects.bulk_create(
+                BatchModel(field=str(i), count=i) for i in range(6))
+        ]
+
+    def test_update(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with django_assert_num_queries(2):
+                rows = BatchModel.objects.filter(pk__in=pks[:4]) \
+                    .update(field='1')
+        assert rows == 4
+        assert len(callbacks) == 1
+        # Row with field 1 is unchanged
+        assert change_calls == [('batch', [pks[0], pks[2], pks[3]])]
+
+    def test_update_attname(self, pks, django_capture_on_commit_callbacks):
+        owner = WatchedModel.objects.create(field='a', other='b')
+        with django_capture_on_commit_callbacks(execute=True):
+            BatchModel.objects.filter(pk__in=pks[:2]).update(owner_id=owner.pk)
+            BatchModel.objects.filter(pk=pks[0]).update(owner=owner)
+        assert change_calls == [('batch', pks[:2])]
+
+    def test_update_chunks(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with django_assert_num_queries(10):
+                # Three chunks of 2 rows, each locked, updated and read
+                # back, and a last empty chunk
+                queryset = BatchModel.objects.filter(pk__in=pks)
+                queryset.update_chunk_size = 2
+                rows = queryset.update(count=F('count') + 1)
+        assert rows == 6
+        assert len(callbacks) == 1
+        assert change_calls == [('batch', pks)]
+        assert list(
+            BatchModel.objects.order_by('pk').values_list('count', flat=True)
+        ) == list(range(1, 7))
+
+    def test_update_unmonitored(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        WatchedModel.objects.create(field='a', other='b')
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with django_assert_num_queries(1):
+                WatchedModel.objects.update(ignored='x')
+        assert callbacks == []
+
+    def test_update_expression(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            with django_assert_num_queries(3):
+                BatchModel.objects.filter(pk__in=pks[:3]) \
+                    .update(count=F('count') * 2)
+        # 0 * 2 is unchanged
+        assert change_calls == [('batch', [pks[1], pks[2]])]
+
+    def test_update_expression_fields(
+        self, pks, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            BatchModel.objects.filter(pk=pks[1]) \
+                .update(field=Concat(F('field'), F('field')), count=1)
+        assert change_calls == [('batch', [pks[1]])]
+        assert BatchModel.objects.get(pk=pks[1]).field == '11'
+
+    def test_update_per_instance_funcs(
+        self, django_capture_on_commit_callbacks
+    ):
+        pks = [
+            WatchedModel.objects.create(field='a', other=str(i)).pk
+            for i in range(3)
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            WatchedModel.objects.filter(pk__in=pks).update(
+                field='changed', other='0')
+        expected = [('field', pk, 'changed') for pk in pks]
+        expected.extend(('other', pk, '0') for pk in pks[1:])
+        assert sorted(change_calls) == sorted(expected)
+
+    def test_bulk_update_loaded(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        objs = list(BatchModel.objects.filter(pk__in=pks))
+        for obj in objs[::2]:
+            obj.field = 'changed'
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with django_assert_num_queries(1):
+                BatchModel.objects.bulk_update(objs, ['field', 'count'])
+        assert len(callbacks) == 1
+        assert change_calls == [('batch', pks[::2])]
+
+        # Saved values are kept, nothing changed since
+        change_calls.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            objs[0].save()
+        assert change_calls == []
+
+    def test_bulk_update_not_loaded(
+        self, pks, django_capture_on_commit_callbacks,
+        django_assert_num_queries
+    ):
+        objs = [
+            BatchModel(pk=pk, field=str(i), count=0)
+            for i, pk in enumerate(pks)
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            with django_assert_num_queries(2):
+                BatchModel.objects.bulk_update(objs, ['field'])
+        assert change_calls == []
+
+        objs[1].field = 'changed'
+        with django_capture_on_commit_callbacks(execute=True):
+            BatchModel.objects.bulk_update(objs, ['field'])
+        assert change_calls == [('batch', [pks[1]])]
+
+    def test_batch_with_saves(self, pks, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            BatchModel.objects.filter(pk__in=pks[:2]).update(field='x')
+            obj = BatchModel.objects.get(pk=pks[2])
+            obj.count = 10
+            obj.save()
+            BatchModel.objects.filter(pk=pks[0]).update(count=10)
+        assert len(callbacks) == 3
+        # Rows of each save or update, changed rows run once
+        assert change_calls == [('batch', pks[:2]), ('batch', [pks[2]])]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_autocommit_runs_after_save(watched):
+    # Create of the fixture ran its callbacks already
+    change_calls.clear()
+    instance = WatchedModel.objects.get(pk=watched)
+    instance.field = 'changed'
+    instance.save()
+    assert change_calls == [('field', watched, 'changed')]
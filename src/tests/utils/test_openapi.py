@@ -0,0 +1,147 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from drf_yasg import openapi
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.test import APIRequestFactory
+
+from utils.base.openapi import (PrebuiltSchemaMixin, get_current_version,
+                                get_schema_version)
+
+api_info = openapi.Info(title='Test API', default_version='v1')
+
+
+class SchemaView(PrebuiltSchemaMixin, get_schema_view(
+    api_info, public=True, permission_classes=(permissions.AllowAny,)
+)):
+    schema_info = api_info
+
+
+schema_view = SchemaView.with_ui('swagger', cache_timeout=0)
+
+
+@pytest.fixture(autouse=True)
+def schema_dir(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_DIR = tmp_path
+    settings.CODE_VERSION = 'test'
+    SchemaView.prebuilt.clear()
+    yield tmp_path
+    SchemaView.prebuilt.clear()
+
+
+def get_schema(format='openapi', **headers):
+    request = APIRequestFactory().get('/docs/', {'format': format}, **headers)
+    return schema_view(request)
+
+
+def test_schema_version(settings):
+    version = get_current_version()
+    assert version == get_schema_version(settings.ROOT_URLCONF, 'test')
+    assert version != get_schema_version(settings.ROOT_URLCONF, 'other')
+
+
+def test_serves_prebuilt(mocker):
+    generate = mocker.spy(SchemaView.generator_class, 'get_schema')
+
+    first = get_schema()
+    second = get_schema()
+
+    assert generate.call_count == 1
+    assert first.status_code == 200
+    assert first['Content-Type'] == 'application/openapi+json; charset=utf-8'
+    assert first.content == second.content
+    assert first['ETag'] == second['ETag']
+
+    schema = json.loads(first.content)
+    assert schema['info']['title'] == 'Test API'
+    assert any(path.endswith('/users/') for path in schema['paths'])
+
+
+def test_not_modified():
+    etag = get_schema()['ETag']
+    response = get_schema(HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_gzip():
+    plain = get_schema()
+    response = get_schema(HTTP_ACCEPT_ENCODING='gzip, br')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == plain.content
+    assert response['ETag'] != plain['ETag']
+    assert 'Accept-Encoding' in response['Vary']
+
+
+def test_yaml():
+    response = get_schema('.yaml')
+    assert response['Content-Type'].startswith('application/yaml')
+    assert b'title: Test API' in response.content
+
+
+def test_rebuilt_on_code_version(settings, schema_dir):
+    get_schema()
+    settings.CODE_VERSION = 'next'
+    get_schema()
+    assert len(list(schema_dir.glob('openapi-*.json'))) == 2
+
+
+def test_loaded_from_disk(mocker):
+    SchemaView.build_schema(extensions=['json'])
+    generate = mocker.spy(SchemaView.generator_class, 'get_schema')
+
+    assert get_schema().status_code == 200
+    assert generate.call_count == 0
+
+
+def test_no_code_version(settings, schema_dir):
+    settings.CODE_VERSION = ''
+    # Left by an earlier deploy with the same urls
+    path = SchemaView.get_schema_path(get_current_version(), 'json')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'{"stale": true}')
+
+    schema = json.loads(get_schema().content)
+    assert 'paths' in schema
+    assert list(schema_dir.iterdir()) == [path]
+
+    with pytest.raises(CommandError):
+        call_command(
+            'build_schema', '--view', 'tests.utils.test_openapi.SchemaView')
+
+
+def test_ui_page():
+    request = APIRequestFactory().get('/docs/')
+    response = schema_view(request)
+    response.render()
+    assert response['Content-Type'].startswith('text/html')
+
+
+def test_build_schema_command(schema_dir):
+    call_command(
+        'build_schema', '--view', 'tests.utils.test_openapi.SchemaView',
+        '--format', 'json')
+    version = get_current_version()
+    assert (schema_dir / f'openapi-{version}.json').exists()
+    assert (schema_dir / f'openapi-{version}.json.gz').exists()
+    assert not (schema_dir / f'openapi-{version}.yaml').exists()
+
+
+def test_envelope_documented():
+    schema = json.loads(get_schema().content)
+    operation = next(
+        path for name, path in schema['paths'].items()
+        if name.endswith('/users/'))['get']
+
+    assert 'X-Envelope' in [
+        parameter['name'] for parameter in operation['parameters']]
+    response = operation['responses']['200']
+    assert set(response['schema']['properties']) == {
+        'success', 'message', 'data', 'path'}
+    assert 'columns' in (
+        response['x-columnar']['properties']['data']['properties'])
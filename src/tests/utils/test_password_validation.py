@@ -0,0 +1,103 @@
+import pytest
+from django.contrib.auth import password_validation as django_validation
+from django.core.exceptions import ValidationError
+
+from account.models import Profile, User
+from utils.base.password_validation import (CommonPasswordIndex,
+                                            CommonPasswordValidator,
+                                            UserAttributeSimilarityValidator)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / 'passwords.idx'
+    CommonPasswordIndex.build(
+        ['password', 'Qwerty', '123456', 'letmein ', 'password', ''], path)
+    return path
+
+
+class TestCommonPasswordIndex:
+
+    def test_lookup(self, index_path):
+        index = CommonPasswordIndex(index_path)
+        assert len(index) == 4
+
+        for password in ('password', 'qwerty', '123456', 'letmein'):
+            assert password in index
+
+        for password in ('passwor', 'password1', 'a' * 50, ''):
+            assert password not in index
+
+    def test_django_list(self, tmp_path):
+        path = tmp_path / 'passwords.idx'
+        stock = django_validation.CommonPasswordValidator()
+        CommonPasswordIndex.build_from_list(
+            stock.DEFAULT_PASSWORD_LIST_PATH, path)
+
+        index = CommonPasswordIndex(path)
+        assert len(index) == len(stock.passwords)
+        assert all(password in index for password in stock.passwords)
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / 'passwords.idx'
+        path.write_bytes(b'not an index file')
+        with pytest.raises(ValueError):
+            CommonPasswordIndex(path)
+
+
+class TestCommonPasswordValidator:
+
+    def test_validate(self, index_path):
+        validator = CommonPasswordValidator(index_path)
+        assert isinstance(validator.passwords, CommonPasswordIndex)
+
+        with pytest.raises(ValidationError) as excinfo:
+            validator.validate('QWERTY ')
+        assert excinfo.value.code == 'password_too_common'
+
+        validator.validate('correct-horse-battery')
+
+    def test_missing_index(self, tmp_path):
+        validator = CommonPasswordValidator(tmp_path / 'missing.idx')
+        assert isinstance(validator.passwords, set)
+
+        with pytest.raises(ValidationError):
+            validator.validate('password')
+
+
+class TestUserAttributeSimilarityValidator:
+
+    @pytest.fixture
+    def user(self):
+        user = User(email='john.doe@example.com')
+        user.profile = Profile(
+            username='johndoe', first_name='John', last_name='Doe')
+        return user
+
+    @pytest.mark.parametrize(
+        'password',
+        [
+            'johndoe', 'JohnDoe1', 'doe', 'john.doe@example.com',
+            'example', 'correct-horse-battery', 'exampl3.c0m', 'jo',
+        ]
+    )
+    def test_same_as_django(self, user, password):
+        stock = django_validation.UserAttributeSimilarityValidator()
+        validator = UserAttributeSimilarityValidator()
+
+        try:
+            stock.validate(password, user)
+            expected = None
+        except ValidationError as e:
+            expected = e.messages
+
+        try:
+            validator.validate(password, user)
+            computed = None
+        except ValidationError as e:
+            computed = e.messages
+
+        assert computed == expected
+
+    def test_no_user(self):
+        UserAttributeSimilarityValidator().validate('johndoe')
@@ -1,7 +1,11 @@
 import json
-from utils.base.renderer import ApiRenderer
+
+import pytest
+from utils.base.renderer import ApiRenderer, NDJSONRenderer
+from django.http import HttpResponse
 from django.test import RequestFactory
 
+from utils.base.encoders import RawJSON
 from utils.base.renderer import ResponseDecorator
 
 
@@ -75,3 +79,175 @@ class TestApiRenderer:
             }
         )
         assert result is not None
+
+    @pytest.mark.parametrize('ensure_ascii', [True, False])
+    def test_render_line_separators(self, ensure_ascii):
+        renderer = ApiRenderer()
+        renderer.ensure_ascii = ensure_ascii
+        response = Response({'name': 'a\u2028b\u2029c'}, 200)
+        result = renderer.render(
+            response.data,
+            renderer_context={
+                'request': self.request(),
+                'response': response,
+            }
+        )
+
+        assert '\u2028'.encode() not in result
+        assert '\u2029'.encode() not in result
+        assert json.loads(result)['data']['name'] == 'a\u2028b\u2029c'
+
+    @pytest.mark.parametrize('backend', [
+        'utils.base.encoders.DRFJSONBackend',
+        'utils.base.encoders.StdlibJSONBackend',
+        'utils.base.encoders.SimpleJSONBackend',
+        'utils.base.encoders.OrjsonJSONBackend',
+    ])
+    def test_render_backends(self, settings, backend):
+        settings.API_JSON_BACKEND = backend
+        response = Response({'name': 'Zo\u00eb'}, 200)
+        result = ApiRenderer().render(
+            response.data,
+            renderer_context={
+                'request': self.request(),
+                'response': response,
+            }
+        )
+        assert json.loads(result)['data'] == {'name': 'Zo\u00eb'}
+
+    def render_data(self, data, status=200):
+        response = Response(data, status)
+        return ApiRenderer().render(
+            response.data,
+            renderer_context={
+                'request': self.request(),
+                'response': response,
+            }
+        )
+
+    def test_render_raw_json(self):
+        raw = RawJSON(b'{"id": 1, "tags": ["a", "b"]}')
+        result = self.render_data(raw)
+
+        # Bytes are spliced in as they are
+        assert b'"data":{"id": 1, "tags": ["a", "b"]}' in result
+        assert json.loads(result)['data'] == {'id': 1, 'tags': ['a', 'b']}
+
+    def test_render_nested_raw_json(self):
+        data = {
+            'count': 2,
+            'results': [RawJSON('{"id": 1}'), RawJSON(b'{"id": 2}')],
+        }
+        result = json.loads(self.render_data(data))
+        assert result['data'] == {
+            'count': 2, 'results': [{'id': 1}, {'id': 2}]}
+
+    def test_render_raw_json_placeholder_in_data(self):
+        # Strings that look like placeholders are left alone
+        data = {'name': 'stream-0', 'raw': RawJSON(b'[]')}
+        result = json.loads(self.render_data(data))
+        assert result['data'] == {'name': 'stream-0', 'raw': []}
+
+
+class TestCompactEnvelope:
+
+    def render(self, data, status=200, accepted_media_type=None, **headers):
+        response = Response(data, status)
+        return json.loads(ApiRenderer().render(
+            response.data, accepted_media_type,
+            renderer_context={
+                'request': RequestFactory().get('/', **headers),
+                'response': response,
+            }
+        ))
+
+    def test_default_unchanged(self):
+        result = self.render({'name': None})
+        assert result == {
+            'success': True,
+            'message': 'Request is successful',
+            'data': {'name': None},
+            'path': '/',
+        }
+
+    def test_media_type_parameter(self):
+        result = self.render(
+            {'id': 1, 'name': None}, 200,
+            'application/json; envelope=compact')
+        assert result == {'data': {'id': 1}}
+
+    def test_header(self):
+        result = self.render(
+            {'id': 1, 'name': ''}, 200, HTTP_X_ENVELOPE='compact')
+        assert result == {'data': {'id': 1}}
+
+    def test_media_type_parameter_over_header(self):
+        result = self.render(
+            {'id': 1}, 200, 'application/json; envelope=full',
+            HTTP_X_ENVELOPE='compact')
+        assert result['path'] == '/'
+
+    def test_error(self):
+        result = self.render(
+            {'detail': 'Not found.'}, 404, HTTP_X_ENVELOPE='compact')
+        assert result == {
+            'error': {'code': '404'}, 'data': {'detail': 'Not found.'}}
+
+    def test_empty(self):
+        assert self.render({}, 200, HTTP_X_ENVELOPE='compact') == {}
+
+    def test_vary(self):
+        response = HttpResponse()
+        response.data = {}
+        response.message = None
+        ApiRenderer().render({}, renderer_context={
+            'request': RequestFactory().get('/'), 'response': response})
+        assert response['Vary'] == 'X-Envelope'
+
+
+class TestNDJSONRenderer:
+
+    def render(self, data, status=200):
+        response = Response(data, status)
+        result = NDJSONRenderer().render(
+            response.data,
+            renderer_context={
+                'request': RequestFactory().get('/'),
+                'response': response,
+            }
+        )
+        return [json.loads(line) for line in result.splitlines()]
+
+    def test_list(self):
+        meta, *rows = self.render([{'id': 1}, {'id': 2}])
+        assert meta == {
+            'success': True, 'message': 'Request is successful', 'path': '/'}
+        assert rows == [{'id': 1}, {'id': 2}]
+
+    def test_paginated(self):
+        meta, *rows = self.render(
+            {'count': 1, 'next': None, 'previous': None, 'results': [{}]})
+        assert meta['count'] == 1
+        assert 'results' not in meta
+        assert rows == [{}]
+
+    def test_error(self):
+        meta, detail = self.render({'detail': 'Not found.'}, 404)
+        assert meta['error']['code'] == '404'
+        assert detail == {'detail': 'Not found.'}
+
+    def test_empty(self):
+        assert len(self.render([])) == 1
+
+    def test_compact(self):
+        response = Response(
+            {'count': 1, 'next': None, 'results': [{'id': 1, 'name': None}]},
+            200)
+        result = NDJSONRenderer().render(
+            response.data, 'application/x-ndjson; envelope=compact',
+            renderer_context={
+                'request': RequestFactory().get('/'),
+                'response': response,
+            }
+        )
+        assert result == b'{"count":1}\n{"id":1}\n'
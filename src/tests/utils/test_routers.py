@@ -1,6 +1,12 @@
+import pytest
+from django.urls import URLResolver
+from django.urls.exceptions import NoReverseMatch, Resolver404
+from django.urls.resolvers import RegexPattern
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
-from utils.base.routers import CustomDefaultRouter, CustomRouterNoLookup
+from utils.base.routers import (CustomDefaultRouter, CustomRouterNoLookup,
+                                TrieDefaultRouter, TrieRouterNoLookup,
+                                get_segments)
 
 
 class BookViewSet(ModelViewSet):
@@ -94,3 +100,147 @@ class TestCustomRouterNoLookup:
         assert routes[6].name == 'books-delete'
         assert get_pattern(routes[6]) == r'^books/delete/$'
         assert urls[6].mapping == {'delete': 'destroy'}
+
+
+def get_resolver(router):
+    return URLResolver(RegexPattern(r'^/'), router.urls)
+
+
+def get_segments_of(regex):
+    variants = get_segments(regex)
+    return variants and variants[0]
+
+
+@pytest.mark.parametrize(
+    'regex, segments',
+    [
+        (r'^books/$', ['books', '']),
+        (r'^books/detail/(?P<pk>[^/.]+)/$',
+         ['books', 'detail', '(?P<pk>[^/.]+)', '']),
+        (r'^books/(?P<pk>[0-9]+)/\Z', ['books', '(?P<pk>[0-9]+)', '']),
+        (r'^a/(b|c)/$', ['a', '(b|c)', '']),
+        (r'^$', ['']),
+        # Parts that may match a slash
+        (r'^a/(?P<rest>.+)/$', None),
+        (r'^a/[^.]+/$', None),
+        (r'^a\/b/$', None),
+        # Not anchored, alternation, global flags
+        (r'^books/', None),
+        (r'^a|b$', None),
+        (r'(?i)^books/$', None),
+    ]
+)
+def test_get_segments(regex, segments):
+    assert get_segments_of(regex) == segments
+
+
+def test_get_segments_optional_slash():
+    assert get_segments(r'^books\.(?P<format>[a-z0-9]+)/?$') == [
+        ['books\\.(?P<format>[a-z0-9]+)'],
+        ['books\\.(?P<format>[a-z0-9]+)', ''],
+    ]
+
+
+DEFAULT_PATHS = [
+    '/', '/.json', '/books/', '/books.json', '/books/search/',
+    '/books/create/', '/books/detail/1/', '/books/detail/1.json',
+    '/books/update/1/', '/books/1/read/', '/books/delete/1/',
+    '/authors/detail/abc/',
+]
+
+NO_LOOKUP_PATHS = [
+    '/', '/books/', '/books/search/', '/books/create/', '/books/detail/',
+    '/books/detail.json', '/authors/update/', '/authors//',
+    '/authors/delete/',
+]
+
+NOT_FOUND_PATHS = [
+    '/books', '/books/detail/1/2/', '/shelves/', '/books/x/y/z/',
+]
+
+
+def check_same_match(resolver, trie_resolver, path):
+    expected = resolver.resolve(path)
+    match = trie_resolver.resolve(path)
+
+    assert match.url_name == expected.url_name
+    assert match.kwargs == expected.kwargs
+    assert match.func.cls is expected.func.cls
+    assert getattr(match.func, 'actions', None) == \
+        getattr(expected.func, 'actions', None)
+
+
+def check_same_reverse(resolver, trie_resolver):
+    names = {key for key in resolver.reverse_dict if isinstance(key, str)}
+    trie_names = {
+        key for key in trie_resolver.reverse_dict if isinstance(key, str)}
+    assert names == trie_names
+
+    for name in names:
+        for kwargs in ({}, {'pk': 1}, {'format': 'json'}):
+            try:
+                expected = resolver.reverse(name, **kwargs)
+            except NoReverseMatch:
+                with pytest.raises(NoReverseMatch):
+                    trie_resolver.reverse(name, **kwargs)
+            else:
+                assert trie_resolver.reverse(name, **kwargs) == expected
+
+
+class TestTrieRouter:
+
+    @pytest.fixture
+    def resolvers(self):
+        resolvers = []
+        for router_class in (CustomDefaultRouter, TrieDefaultRouter):
+            router = router_class()
+            router.register('books', BookViewSet, basename='books')
+            router.register('authors', BookViewSet, basename='authors')
+            resolvers.append(get_resolver(router))
+        return resolvers
+
+    @pytest.mark.parametrize('path', DEFAULT_PATHS)
+    def test_resolve(self, resolvers, path):
+        check_same_match(*resolvers, path)
+
+    @pytest.mark.parametrize('path', NOT_FOUND_PATHS)
+    def test_not_found(self, resolvers, path):
+        for resolver in resolvers:
+            with pytest.raises(Resolver404):
+                resolver.resolve(path)
+
+    def test_reverse(self, resolvers):
+        check_same_reverse(*resolvers)
+
+
+class TestTrieRouterNoLookup:
+
+    @pytest.fixture
+    def resolvers(self):
+        resolvers = []
+        for router_class in (CustomRouterNoLookup, TrieRouterNoLookup):
+            router = router_class()
+            router.register('books', BookViewSet, basename='books')
+            router.register('authors', BookViewSet, basename='authors')
+            resolvers.append(get_resolver(router))
+        return resolvers
+
+    @pytest.mark.parametrize('path', NO_LOOKUP_PATHS)
+    def test_resolve(self, resolvers, path):
+        check_same_match(*resolvers, path)
+
+    def test_reverse(self, resolvers):
+        check_same_reverse(*resolvers)
+
+
+def test_trie_candidates():
+    router = TrieDefaultRouter()
+    router.register('books', BookViewSet, basename='books')
+    router.register('authors', BookViewSet, basename='authors')
+    trie_resolver = router.urls[0]
+
+    candidates = trie_resolver.get_candidates('books/detail/1/')
+    assert [pattern.name for pattern in candidates] == ['books-detail']
+
+    candidates = trie_resolver.get_candidates('books.json')
+    assert [pattern.name for pattern in candidates] == ['books-list']
@@ -0,0 +1,156 @@
+import json
+import tracemalloc
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+from rest_framework import generics, serializers
+from rest_framework.test import APIRequestFactory
+
+from tests.models import ModelText
+from utils.base.mixins import ListMixinUtils
+from utils.base.renderer import ResponseDecorator
+from utils.base.streaming import (StreamingEnvelopeResponse, stream_envelope,
+                                  stream_ndjson)
+
+
+class ModelTextSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ModelText
+        fields = ['id', 'name']
+
+
+serialize = ModelTextSerializer(many=True).to_representation
+
+
+def create_rows(count):
+    ModelText.objects.bulk_create(
+        ModelText(name=f'name {i} ' * 10) for i in range(count))
+
+
+def stream_peak_memory(chunk_size):
+    tracemalloc.start()
+    try:
+        for _ in stream_envelope(
+            ModelText.objects.iterator(chunk_size=chunk_size),
+            serialize, chunk_size=chunk_size
+        ):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.django_db
+class TestStreamEnvelope:
+
+    def test_same_as_renderer(self):
+        create_rows(25)
+        request = RequestFactory().get('/items/')
+        content = b''.join(stream_envelope(
+            ModelText.objects.order_by('id'), serialize,
+            request=request, chunk_size=10))
+
+        expected = ResponseDecorator(
+            request, '200', serialize(ModelText.objects.order_by('id'))
+        ).get_response()
+        assert json.loads(content) == expected
+
+    def test_empty(self):
+        content = b''.join(stream_envelope([], serialize))
+        assert json.loads(content)['data'] == []
+
+    @pytest.mark.parametrize('count', [0, 3])
+    def test_compact_same_as_renderer(self, count):
+        create_rows(count)
+        ModelText.objects.update(name='')
+        request = RequestFactory().get('/items/')
+        content = b''.join(stream_envelope(
+            ModelText.objects.order_by('id'), serialize,
+            request=request, chunk_size=2, compact=True))
+
+        expected = ResponseDecorator(
+            request, '200', serialize(ModelText.objects.order_by('id'))
+        ).get_response(compact=True)
+        assert json.loads(content) == expected
+
+    def test_response(self):
+        create_rows(3)
+        response = StreamingEnvelopeResponse(
+            ModelText.objects.all(), serialize, status=201, message='done')
+
+        assert response.status_code == 201
+        assert response['Content-Type'] == 'application/json'
+        data = json.loads(b''.join(response.streaming_content))
+        assert data['message'] == 'done'
+        assert len(data['data']) == 3
+
+    def test_memory_flat(self):
+        create_rows(500)
+        small = stream_peak_memory(chunk_size=100)
+
+        create_rows(4500)
+        large = stream_peak_memory(chunk_size=100)
+
+        # Ten times the rows, about the same peak
+        assert large < small * 2
+
+
+@pytest.mark.django_db
+def test_stream_ndjson():
+    create_rows(5)
+    chunks = list(stream_ndjson(
+        ModelText.objects.order_by('id'), serialize, chunk_size=2))
+
+    # Envelope line, then a chunk of lines for every 2 rows
+    assert len(chunks) == 4
+    meta, *rows = [
+        json.loads(line) for line in b''.join(chunks).splitlines()]
+    assert meta['success'] is True
+    assert rows == serialize(ModelText.objects.order_by('id'))
+
+
+@pytest.mark.django_db
+class TestListMixinUtils:
+
+    class View(ListMixinUtils, generics.GenericAPIView):
+        pagination_class = None
+        permission_classes = ()
+        authentication_classes = ()
+        serializer_class = ModelTextSerializer
+
+        def get(self, request, *args, **kwargs):
+            return self.get_with_queryset(ModelText.objects.order_by('id'))
+
+    def get_response(self, **attrs):
+        view = type('View', (self.View,), attrs)
+        request = APIRequestFactory().get('/items/')
+        return view.as_view()(request)
+
+    def test_stream_unpaginated(self, settings):
+        settings.STREAM_CHUNK_SIZE = 2
+        ModelText.objects.bulk_create(
+            ModelText(name=str(i)) for i in range(5))
+
+        response = self.get_response(stream_unpaginated=True)
+        assert isinstance(response, StreamingHttpResponse)
+
+        data = json.loads(b''.join(response.streaming_content))
+        assert [item['name'] for item in data['data']] == \
+            ['0', '1', '2', '3', '4']
+        assert data['path'] == '/items/'
+
+    def test_stream_compact(self):
+        ModelText.objects.create(name='')
+        view = type('View', (self.View,), {'stream_unpaginated': True})
+        request = APIRequestFactory().get(
+            '/items/', HTTP_X_ENVELOPE='compact')
+        response = view.as_view()(request)
+
+        assert 'X-Envelope' in response['Vary']
+        data = json.loads(b''.join(response.streaming_content))
+        assert data == {'data': [{'id': ModelText.objects.get().id}]}
+
+    def test_not_streamed_by_default(self):
+        response = self.get_response()
+        assert not isinstance(response, StreamingHttpResponse)
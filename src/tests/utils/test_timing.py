@@ -0,0 +1,120 @@
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from account.models import User
+from utils.base.general import get_tokens_for_user
+from utils.base.timing import (RequestTimer, ServerTimingMiddleware,
+                               TimingHistogram, request_timer, timed,
+                               timing_histogram)
+
+
+class TestRequestTimer:
+
+    def test_header(self):
+        timer = RequestTimer()
+        timer.add('total', 0.0125)
+        timer.add('auth', 0.001)
+        timer.add('auth', 0.0005)
+        timer.queries = 2
+        timer.add('db', 0.003)
+
+        assert timer.get_header() == (
+            'auth;dur=1.5, db;dur=3.0;desc="2 queries", total;dur=12.5')
+
+    @pytest.mark.django_db
+    def test_execute_wrapper(self):
+        timer = RequestTimer()
+        with connection.execute_wrapper(timer):
+            list(User.objects.all())
+            User.objects.exists()
+
+        assert timer.queries == 2
+        assert timer.durations['db'] > 0
+
+    def test_timed(self):
+        with timed('view'):
+            # No timer, nothing to record
+            pass
+
+        timer = RequestTimer()
+        token = request_timer.set(timer)
+        try:
+            with timed('view'):
+                pass
+        finally:
+            request_timer.reset(token)
+        assert timer.durations['view'] >= 0
+
+
+class TestTimingHistogram:
+
+    @pytest.mark.parametrize(
+        'duration, bucket',
+        [(0, 0), (0.0005, 0), (0.0006, 1), (0.001, 1), (0.0011, 2),
+         (1000, 15)]
+    )
+    def test_get_bucket(self, duration, bucket):
+        assert TimingHistogram().get_bucket(duration) == bucket
+
+    def test_quantile(self):
+        histogram = TimingHistogram()
+        for duration in (0.001,) * 9 + (0.1,):
+            timer = RequestTimer()
+            timer.add('total', duration)
+            histogram.record('auth:login', timer)
+
+        assert histogram.quantile('auth:login', 'total', 0.5) == 0.001
+        assert histogram.quantile('auth:login', 'total', 1) == 0.128
+        assert histogram.quantile('auth:login', 'db', 0.5) is None
+        assert sum(histogram.snapshot()['auth:login']['total']) == 10
+
+
+class TestServerTimingMiddleware:
+
+    def test_hidden_from_anonymous(self):
+        middleware = ServerTimingMiddleware(lambda request: HttpResponse())
+        response = middleware(RequestFactory().get('/'))
+        assert not response.has_header('Server-Timing')
+
+    @pytest.mark.django_db
+    def test_staff(self, staff):
+        def get_response(request):
+            request.user = staff
+            return HttpResponse()
+
+        response = ServerTimingMiddleware(get_response)(
+            RequestFactory().get('/'))
+        assert 'total;dur=' in response['Server-Timing']
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+
+    @pytest.fixture(autouse=True)
+    def clear_histogram(self):
+        timing_histogram.clear()
+
+    def test_api_key_caller(self, get):
+        response = get(reverse('auth:username_available', args=['tester']))
+
+        header = response['Server-Timing']
+        for phase in ('auth', 'perm', 'db', 'view', 'render', 'total'):
+            assert f'{phase};dur=' in header
+        assert 'queries"' in header
+
+        snapshot = timing_histogram.snapshot()
+        assert sum(snapshot['auth:username_available']['total']) == 1
+
+    def test_hidden_without_key(self, keyless_get, user):
+        access = get_tokens_for_user(user)['access']
+        response = keyless_get(
+            reverse('auth:user_list'),
+            headers={'HTTP_AUTHORIZATION': f'Bearer {access}'})
+        assert not response.has_header('Server-Timing')
+
+        # Still recorded
+        snapshot = timing_histogram.snapshot()
+        assert sum(snapshot['auth:user_list']['total']) == 1
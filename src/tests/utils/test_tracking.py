@@ -0,0 +1,108 @@
+import pytest
+from django.contrib.postgres.indexes import HashIndex
+from django.core.cache import cache
+from rest_framework import generics, serializers
+from rest_framework.test import APIRequestFactory
+
+from tests.models import TrackedItem
+from utils.base.tracking import (TrackingCodeLookupMixin, get_tracking_key,
+                                 tracking_code_hash_index)
+
+
+class TrackedItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrackedItem
+        fields = ['id', 'tracking_code']
+
+
+class TrackedItemView(TrackingCodeLookupMixin, generics.RetrieveAPIView):
+    queryset = TrackedItem.objects.all()
+    serializer_class = TrackedItemSerializer
+    permission_classes = ()
+    authentication_classes = ()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def item():
+    obj = TrackedItem.objects.create()
+    cache.clear()
+    return obj
+
+
+@pytest.mark.django_db
+class TestTrackingLookup:
+
+    def test_pk_cached(self, item, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert TrackedItem.objects.get_tracking_pk(
+                item.tracking_code) == item.pk
+        with django_assert_num_queries(0):
+            assert TrackedItem.objects.get_tracking_pk(
+                item.tracking_code) == item.pk
+
+    def test_missing_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert TrackedItem.objects.get_tracking_pk('UIDMISSING') is None
+        with django_assert_num_queries(0):
+            assert TrackedItem.objects.get_tracking_pk('UIDMISSING') is None
+
+    def test_created_replaces_missing(self, django_assert_num_queries):
+        assert TrackedItem.objects.get_tracking_pk('UIDNEW') is None
+        obj = TrackedItem.objects.create(tracking_code='UIDNEW')
+        with django_assert_num_queries(0):
+            assert TrackedItem.objects.get_tracking_pk('UIDNEW') == obj.pk
+
+    def test_get_by_tracking_code(self, item, django_assert_num_queries):
+        TrackedItem.objects.get_tracking_pk(item.tracking_code)
+        with django_assert_num_queries(1):
+            assert TrackedItem.objects.get_by_tracking_code(
+                item.tracking_code) == item
+
+    def test_get_missing(self):
+        with pytest.raises(TrackedItem.DoesNotExist):
+            TrackedItem.objects.get_by_tracking_code('UIDMISSING')
+
+    def test_deleted_forgotten(self, item):
+        code = item.tracking_code
+        TrackedItem.objects.get_tracking_pk(code)
+        TrackedItem.objects.filter(pk=item.pk).delete()
+
+        with pytest.raises(TrackedItem.DoesNotExist):
+            TrackedItem.objects.get_by_tracking_code(code)
+        assert cache.get(get_tracking_key(TrackedItem, code)) is None
+        assert TrackedItem.objects.get_tracking_pk(code) is None
+
+    def test_filtered_queryset(self, item):
+        queryset = TrackedItem.objects.exclude(pk=item.pk)
+        with pytest.raises(TrackedItem.DoesNotExist):
+            queryset.get_by_tracking_code(item.tracking_code)
+
+    def test_hash_index(self):
+        index = tracking_code_hash_index('item_code_hash')
+        assert isinstance(index, HashIndex)
+        assert index.fields == ['tracking_code']
+
+
+@pytest.mark.django_db
+class TestTrackingCodeLookupMixin:
+
+    def get(self, code):
+        request = APIRequestFactory().get(f'/items/{code}/')
+        return TrackedItemView.as_view()(request, tracking_code=code)
+
+    def test_retrieve(self, item, django_assert_num_queries):
+        self.get(item.tracking_code)
+        with django_assert_num_queries(1):
+            response = self.get(item.tracking_code)
+        assert response.status_code == 200
+        assert response.data['tracking_code'] == item.tracking_code
+
+    def test_not_found(self, django_assert_num_queries):
+        assert self.get('UIDMISSING').status_code == 404
+        with django_assert_num_queries(0):
+            assert self.get('UIDMISSING').status_code == 404
@@ -0,0 +1,148 @@
+"""
+Batch requests, many api requests sent as one.
+
+Sub-requests are dispatched in-process to the views their paths
+resolve to. They share the authentication of the batch request, its
+user and token are forced on them and its validated project api key
+is reused, so only the permission classes of each view run again.
+Responses are returned in the envelope of the batch response, each
+with its own status, without being rendered on their own.
+"""
+
+import json
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .renderer import ApiRenderer, ResponseDecorator
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Request headers of the batch not passed on to sub-requests
+BATCH_ONLY_HEADERS = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH', 'wsgi.input',
+)
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS, default='GET')
+    path = serializers.RegexField(r'^/', max_length=2048)
+    body = serializers.JSONField(required=False)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_REQUEST_LIMIT:
+            raise serializers.ValidationError(
+                f'At most {settings.BATCH_REQUEST_LIMIT} requests '
+                'can be sent in a batch')
+        return value
+
+
+class SubResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    success = serializers.BooleanField()
+    message = serializers.CharField(required=False)
+    data = serializers.JSONField(required=False)
+    path = serializers.CharField(required=False)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = SubResponseSerializer(many=True)
+
+
+def build_sub_request(
+    request, method: str, path: str, body=None
+) -> WSGIRequest:
+    """
+    Django request of a sub-request of request, with the headers of
+    request and body encoded as json
+    """
+    path, _, query = path.partition('?')
+    content = b'' if body is None else json.dumps(body).encode()
+
+    environ = {
+        key: value for key, value in request.META.items()
+        if key not in BATCH_ONLY_HEADERS
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    if content:
+        environ['CONTENT_TYPE'] = 'application/json'
+    return WSGIRequest(environ)
+
+
+class BatchAPIView(APIView):
+    """
+    Dispatch the requests in the body to their views and return
+    their responses in order. Only api views can be requested and
+    batches can not be nested.
+    """
+
+    serializer_class = BatchRequestSerializer
+
+    def get_sub_response(self, request, sub_request: dict) -> dict:
+        """Response of sub_request in the envelope format of ApiRenderer"""
+        django_request = request._request
+        sub = build_sub_request(
+            django_request, sub_request['method'], sub_request['path'],
+            sub_request.get('body'))
+
+        try:
+            match = resolve(sub.path_info)
+        except Resolver404:
+            return self.decorate(sub, status.HTTP_404_NOT_FOUND)
+
+        view_class = getattr(match.func, 'cls', None)
+        allowed = view_class is not None and issubclass(view_class, APIView)
+        if not allowed or issubclass(view_class, BatchAPIView):
+            return self.decorate(sub, status.HTTP_400_BAD_REQUEST)
+
+        # Authenticated once for the whole batch
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+        sub.project_api_key = getattr(django_request, 'project_api_key', None)
+        sub.resolver_match = match
+
+        response = match.func(sub, *match.args, **match.kwargs)
+        # Streamed and other non api responses have no data
+        return self.decorate(
+            sub, response.status_code, getattr(response, 'data', None),
+            getattr(response, 'message', None))
+
+    def decorate(
+        self, sub, status_code: int, data=None, message: str = None
+    ) -> dict:
+        decorator = ResponseDecorator(sub, status_code, data, message)
+        compact = ApiRenderer().is_compact(
+            self.request.accepted_media_type, self.request)
+        return {
+            'status': int(decorator.status),
+            **decorator.get_response(compact=compact),
+        }
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(data={
+            'responses': [
+                self.get_sub_response(request, sub_request)
+                for sub_request in serializer.validated_data['requests']
+            ]
+        })
@@ -0,0 +1,187 @@
+"""
+Bloom filters for cheap "definitely not present" membership checks
+"""
+
+import math
+import struct
+import time
+from hashlib import blake2b
+from typing import Callable, Iterable, Iterator, Optional
+
+from django.core.cache import cache
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a false positive
+    rate of about error_rate, while holding up to capacity items
+    """
+
+    header = struct.Struct('<QB')
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing, k positions from two 64 bit hashes
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def to_bytes(self) -> bytes:
+        return self.header.pack(self.size, self.hash_count) + self.bits
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hash_count = cls.header.unpack_from(data)
+        bloom.bits = bytearray(data[cls.header.size:])
+        return bloom
+
+
+class CachedBloomFilter:
+    """
+    Bloom filter shared through the cache.
+
+    It is built with loader when it is missing from the cache or older
+    than timeout seconds, by one process at a time under a cache lock.
+    Meanwhile the other processes keep their copy, or without one
+    answer that an item may be present, so callers check the database.
+
+    Each process checks its own copy without the cache, every
+    local_timeout seconds it fetches a newer filter if there is one
+    and the items added since its last fetch.
+
+    Items added after the build are not written into the filter,
+    that would be a read, change and write of the whole filter that
+    concurrent adds can lose. They are appended to a log in the cache
+    instead, which is replayed into the copies. Adds are seen at once
+    by the adding process and within local_timeout by the others.
+    Items must only be added once they are committed, so that every
+    item logged before a build starts is loaded by the build.
+    """
+
+    def __init__(
+        self, key: str, loader: Callable[[], Iterable[str]],
+        count: Callable[[], int], capacity: int = 100000,
+        error_rate: float = 0.01, timeout: int = 3600,
+        local_timeout: int = 30, lock_timeout: int = 300
+    ):
+        self.key = key
+        self.loader = loader
+        self.count = count
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self.lock_timeout = lock_timeout
+        self.log_key = f'{key}:log'
+        self._local = None
+        self._local_expires = 0
+        self._built_at = None
+        # Log index of the next item to replay into the local copy
+        self._position = 0
+
+    def get_log_key(self, index: int) -> str:
+        return f'{self.log_key}:{index}'
+
+    def build(self) -> Optional[tuple]:
+        """
+        Build the filter and store it in the cache, returns None
+        if another process is already building it
+        """
+        lock_key = f'{self.key}:lock'
+        if not cache.add(lock_key, True, timeout=self.lock_timeout):
+            return None
+        try:
+            # Items logged from here on may be missed by the loader
+            log_start = cache.get(self.log_key, 0)
+            capacity = max(self.capacity, self.count() * 2)
+            bloom = BloomFilter(capacity, self.error_rate)
+            bloom.update(self.loader())
+            value = (time.time(), log_start, bloom.to_bytes())
+            # Kept past timeout, stale copies are used while rebuilding
+            cache.set(self.key, value, timeout=self.timeout * 2)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    def refresh(self):
+        """Fetch a newer filter and the items logged since the last fetch"""
+        value = cache.get(self.key)
+        if value is None or time.time() - value[0] >= self.timeout:
+            value = self.build() or value
+
+        if value is not None and value[0] != self._built_at:
+            self._built_at, self._position, data = value
+            self._local = BloomFilter.from_bytes(data)
+        if self._local is not None:
+            self.replay()
+
+    def replay(self):
+        end = cache.get(self.log_key, 0)
+        if end <= self._position:
+            return
+        keys = [self.get_log_key(i) for i in range(self._position, end)]
+        items = cache.get_many(keys)
+        for key in keys:
+            if key not in items:
+                # Counted but not yet set, read again on the next refresh
+                break
+            self._local.add(items[key])
+            self._position += 1
+
+    def get_filter(self) -> Optional[BloomFilter]:
+        """Local copy of the filter, None while another process builds it"""
+        now = time.monotonic()
+        if now >= self._local_expires:
+            self.refresh()
+            self._local_expires = now + self.local_timeout
+        return self._local
+
+    def add_many(self, items: Iterable[str]):
+        items = list(items)
+        if not items:
+            return
+        cache.add(self.log_key, 0, timeout=None)
+        end = cache.incr(self.log_key, len(items))
+        # Kept for as long as the filters built before they were logged
+        cache.set_many({
+            self.get_log_key(index): item
+            for index, item in enumerate(items, end - len(items))
+        }, timeout=self.timeout * 2)
+        if self._local is not None:
+            self._local.update(items)
+
+    def add(self, item: str):
+        self.add_many([item])
+
+    def clear(self):
+        cache.delete(self.key)
+        self._local = None
+        self._local_expires = 0
+        self._built_at = None
+
+    def __contains__(self, item: str) -> bool:
+        bloom = self.get_filter()
+        return bloom is None or item in bloom
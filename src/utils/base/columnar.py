@@ -0,0 +1,226 @@
+"""
+Columnar representation of lists, a schema of the flattened serializer
+fields followed by a column of values for each field. Keys are sent
+once instead of once per row.
+
+    {
+        "schema": [{"name": "email", "type": "string"}, ...],
+        "columns": [["a@example.com", ...], ...],
+        "count": 2
+    }
+"""
+
+from typing import Iterable, List, Tuple
+
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.response import Response
+
+from .renderer import ApiRenderer
+
+FIELD_TYPES = (
+    (serializers.BooleanField, 'boolean'),
+    (serializers.NullBooleanField, 'boolean'),
+    (serializers.IntegerField, 'integer'),
+    (serializers.FloatField, 'number'),
+    (serializers.ListField, 'array'),
+    (serializers.ListSerializer, 'array'),
+    (serializers.ManyRelatedField, 'array'),
+    (serializers.DictField, 'object'),
+    (serializers.JSONField, 'object'),
+)
+
+VALUE_TYPES = (
+    (bool, 'boolean'),
+    (int, 'integer'),
+    (float, 'number'),
+    (list, 'array'),
+    (dict, 'object'),
+)
+
+
+def get_field_type(field: serializers.Field) -> str:
+    for field_class, field_type in FIELD_TYPES:
+        if isinstance(field, field_class):
+            return field_type
+    return 'string'
+
+
+def get_columns(
+    serializer: serializers.Serializer, prefix: str = ''
+) -> List[Tuple[str, tuple]]:
+    """
+    Flatten the readable fields of serializer, nested serializers
+    become dotted names. Returns the name of each column and the
+    fields from the top serializer down to its field.
+    """
+    columns = []
+    for field in serializer._readable_fields:
+        name = f"{prefix}{field.field_name}"
+        if isinstance(field, serializers.Serializer):
+            columns += [
+                (nested_name, (field, *path))
+                for nested_name, path in get_columns(field, f"{name}.")
+            ]
+        else:
+            columns.append((name, (field,)))
+    return columns
+
+
+def get_plan(serializer: serializers.Serializer) -> list:
+    """
+    Readable fields of serializer with the plan of nested serializers,
+    and the number of columns of each
+    """
+    plan = []
+    for field in serializer._readable_fields:
+        if isinstance(field, serializers.Serializer):
+            nested = get_plan(field)
+            plan.append((field, nested, sum(width for *_, width in nested)))
+        else:
+            plan.append((field, None, 1))
+    return plan
+
+
+def add_values(instance, plan: list, values: list):
+    """
+    Add the representation of each column of instance to values,
+    getting nested instances once for all their columns
+    """
+    for field, nested, width in plan:
+        try:
+            attribute = field.get_attribute(instance)
+        except SkipField:
+            attribute = None
+
+        check_for_none = attribute.pk \
+            if isinstance(attribute, PKOnlyObject) else attribute
+        if check_for_none is None:
+            values += [None] * width
+        elif nested is None:
+            values.append(field.to_representation(attribute))
+        else:
+            add_values(attribute, nested, values)
+
+
+def serialize_columnar(
+    serializer: serializers.ListSerializer, instances: Iterable
+) -> dict:
+    """
+    Serialize instances with the child of a list serializer,
+    straight from the fields into columns
+    """
+    columns = get_columns(serializer.child)
+    plan = get_plan(serializer.child)
+
+    rows = []
+    for instance in instances:
+        values = []
+        add_values(instance, plan, values)
+        rows.append(values)
+
+    return {
+        'schema': [
+            {
+                'name': name,
+                'type': get_field_type(path[-1]),
+                'nullable': any(field.allow_null for field in path),
+            }
+            for name, path in columns
+        ],
+        'columns': [list(column) for column in zip(*rows)] if rows
+        else [[] for _ in columns],
+        'count': len(rows),
+    }
+
+
+def flatten_row(row: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(flatten_row(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def get_value_type(values: list) -> str:
+    value = next((value for value in values if value is not None), None)
+    for value_class, value_type in VALUE_TYPES:
+        if isinstance(value, value_class):
+            return value_type
+    return 'string'
+
+
+def is_rows(data) -> bool:
+    return isinstance(data, list) and \
+        all(isinstance(row, dict) for row in data)
+
+
+def rows_to_columnar(rows: List[dict]) -> dict:
+    """
+    Convert serialized rows to columns, for list data that was not
+    serialized with serialize_columnar. Nested dicts become dotted
+    names, types are taken from the values.
+    """
+    rows = [flatten_row(row) for row in rows]
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    columns = [[row.get(name) for row in rows] for name in names]
+    return {
+        'schema': [
+            {
+                'name': name,
+                'type': get_value_type(column),
+                'nullable': None in column,
+            }
+            for name, column in zip(names, columns)
+        ],
+        'columns': columns,
+        'count': len(rows),
+    }
+
+
+class ColumnarRenderer(ApiRenderer):
+    """
+    Render list data as columns in the response envelope. Data from
+    ColumnarListMixin is already columnar, other lists of rows,
+    paginated or not, are converted.
+    """
+
+    media_type = 'application/vnd.columnar+json'
+    format = 'columnar'
+
+    def get_data(self, response):
+        data = response.data
+        if is_rows(data):
+            return rows_to_columnar(data)
+
+        # Paginated rows
+        if isinstance(data, dict) and is_rows(data.get('results')):
+            return {**data, 'results': rows_to_columnar(data['results'])}
+        return data
+
+
+class ColumnarListMixin(object):
+    """
+    List view that can also respond with columnar json, asked for with
+    `Accept: application/vnd.columnar+json` or `?format=columnar`.
+    Pagination is applied as usual, results are columnar.
+    """
+
+    def get_renderers(self):
+        return [*super().get_renderers(), ColumnarRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != ColumnarRenderer.format:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(many=True)
+
+        if page is not None:
+            return self.get_paginated_response(
+                serialize_columnar(serializer, page))
+        return Response(serialize_columnar(serializer, queryset))
@@ -0,0 +1,177 @@
+"""
+Json encoding backends used by ApiRenderer, selected with
+settings.API_JSON_BACKEND
+
+All backends encode the types rest framework's JSONEncoder does,
+its default hook is used for anything the encoder does not know.
+Backends return str, or bytes when the encoder writes them directly.
+"""
+
+import json
+import secrets
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+from django.utils.module_loading import import_string
+from rest_framework.utils import json as drf_json
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class RawJSON:
+    """
+    Json that is already encoded, returned as response data or nested
+    in it. ApiRenderer splices the bytes into the output verbatim, so
+    they should come from ApiRenderer.encode or be escaped the same way.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Union[bytes, str]):
+        self.value = value.encode() if isinstance(value, str) else value
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.value[:40]!r})"
+
+
+class RawJSONSplicer:
+    """
+    Replace RawJSON with placeholders while encoding, then splice their
+    bytes in with one pass over the output. Placeholders carry a random
+    nonce, so strings in the data can not be mistaken for them.
+    """
+
+    def __init__(self):
+        self.nonce = secrets.token_hex(8)
+        self.fragments = []
+
+    def placeholder(self, raw: RawJSON) -> str:
+        self.fragments.append(raw.value)
+        return f"{self.nonce}-{len(self.fragments) - 1}"
+
+    def splice(self, data: bytes) -> bytes:
+        if not self.fragments:
+            return data
+
+        parts = data.split(b'"' + self.nonce.encode() + b'-')
+        spliced = [parts[0]]
+        for part in parts[1:]:
+            index, rest = part.split(b'"', 1)
+            spliced += (self.fragments[int(index)], rest)
+        return b''.join(spliced)
+
+
+# Splicer of the encoding in progress
+raw_json_splicer: ContextVar[Optional[RawJSONSplicer]] = ContextVar(
+    'raw_json_splicer', default=None)
+
+
+class JSONBackend:
+    """Base class of json encoding backends"""
+
+    def __init__(self, encoder_class=JSONEncoder):
+        self.encoder_class = encoder_class
+        self.encoder_default = encoder_class().default
+
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            splicer = raw_json_splicer.get()
+            if splicer is None:
+                # Not encoded by ApiRenderer, no splicing
+                return json.loads(obj.value)
+            return splicer.placeholder(obj)
+        return self.encoder_default(obj)
+
+    def dumps(
+        self, data, indent: Optional[int] = None, ensure_ascii: bool = True,
+        allow_nan: bool = True, separators: Tuple[str, str] = None
+    ) -> Union[str, bytes]:
+        raise NotImplementedError
+
+
+class DRFJSONBackend(JSONBackend):
+    """Encode with rest framework's json.dumps, as JSONRenderer does"""
+
+    def dumps(
+        self, data, indent=None, ensure_ascii=True,
+        allow_nan=True, separators=None
+    ):
+        return drf_json.dumps(
+            data, cls=self.encoder_class, default=self.default, indent=indent,
+            ensure_ascii=ensure_ascii, allow_nan=allow_nan,
+            separators=separators
+        )
+
+
+class StdlibJSONBackend(JSONBackend):
+    """
+    Encode with the stdlib C encoder, reusing one encoder
+    for each set of options instead of creating one per call
+    """
+
+    @lru_cache(maxsize=16)
+    def get_encoder(self, indent, ensure_ascii, allow_nan, separators):
+        return json.JSONEncoder(
+            default=self.default, indent=indent, ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan, separators=separators
+        )
+
+    def dumps(
+        self, data, indent=None, ensure_ascii=True,
+        allow_nan=True, separators=None
+    ):
+        return self.get_encoder(
+            indent, ensure_ascii, allow_nan, separators).encode(data)
+
+
+class SimpleJSONBackend(StdlibJSONBackend):
+    """
+    Encode with the simplejson C speedups. Decimals and named tuples
+    are left to the default hook, so output matches the other backends.
+    """
+
+    @lru_cache(maxsize=16)
+    def get_encoder(self, indent, ensure_ascii, allow_nan, separators):
+        import simplejson
+
+        return simplejson.JSONEncoder(
+            default=self.default, indent=indent, ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan, separators=separators,
+            use_decimal=False, namedtuple_as_object=False
+        )
+
+
+class OrjsonJSONBackend(StdlibJSONBackend):
+    """
+    Encode straight to utf-8 bytes with orjson. Dates and times are
+    left to the default hook, so output matches the other backends.
+
+    orjson only writes compact, non ascii json, other options are
+    encoded with the stdlib encoder. Nan and infinity are written as
+    null instead of raising, so the output is always strict json.
+    """
+
+    def __init__(self, encoder_class=JSONEncoder):
+        import orjson
+
+        super().__init__(encoder_class)
+        self.orjson = orjson
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        self.option = option | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(
+        self, data, indent=None, ensure_ascii=True,
+        allow_nan=True, separators=None
+    ):
+        if indent is not None or ensure_ascii or separators != (',', ':'):
+            return super().dumps(
+                data, indent=indent, ensure_ascii=ensure_ascii,
+                allow_nan=allow_nan, separators=separators)
+        return self.orjson.dumps(
+            data, default=self.default, option=self.option)
+
+
+@lru_cache(maxsize=None)
+def get_json_backend(path: str) -> JSONBackend:
+    """Return the backend instance for the dotted path"""
+    return import_string(path)()
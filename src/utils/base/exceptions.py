@@ -1,5 +1,32 @@
 from rest_framework.exceptions import APIException, ParseError
+from rest_framework.views import exception_handler as drf_exception_handler
 
 class QueryParseError(ParseError):
     default_detail = 'Malformed or Incomplete query data'
-    default_code = 'baq_query_data'
\ No newline at end of file
+    default_code = 'baq_query_data'
+
+
+class PreconditionFailed(APIException):
+    status_code = 412
+    default_detail = 'Resource was changed, get it again and retry'
+    default_code = 'precondition_failed'
+
+
+class Conflict(APIException):
+    status_code = 409
+    default_detail = 'Conflicts with an existing resource, retry'
+    default_code = 'conflict'
+
+
+class VersionConflict(Exception):
+    """Save of an instance whose row changed since it was loaded"""
+
+
+def exception_handler(exc, context):
+    """
+    Rest framework exception handler, a VersionConflict raised
+    by any view's save is a 412 Precondition Failed
+    """
+    if isinstance(exc, VersionConflict):
+        exc = PreconditionFailed()
+    return drf_exception_handler(exc, context)
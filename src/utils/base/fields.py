@@ -85,7 +85,8 @@ than {self.prefix_max_length}.",
         return name, path, args, kwargs
 
     def pre_save(self, model_instance, add: bool):
-        if add:
+        # Codes set before saving are kept, e.g by baker
+        if add and not getattr(model_instance, self.attname):
             value = create_unique_tracking_id(prefix=self.prefix)
             setattr(model_instance, self.attname, value)
             return value
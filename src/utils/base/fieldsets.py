@@ -0,0 +1,183 @@
+"""
+Sparse fieldsets, `?fields=email,profile.first_name` to select fields
+and `?expand=profile` to include expandable nested serializers.
+
+Without either parameter serializers return all their fields.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+Fieldset = Dict[str, 'Fieldset']
+
+
+def parse_fieldset(value: Optional[str]) -> Optional[Fieldset]:
+    """
+    Parse comma separated dotted names into a tree,
+    'email,profile.city' gives {'email': {}, 'profile': {'city': {}}}
+    """
+    if value is None:
+        return None
+
+    fieldset = {}
+    for name in value.split(','):
+        node = fieldset
+        for part in name.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return fieldset
+
+
+def get_request_fieldsets(
+    request
+) -> Tuple[Optional[Fieldset], Optional[Fieldset]]:
+    """Fields and expand fieldsets of a read request"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+
+    params = getattr(request, 'query_params', request.GET)
+    return (
+        parse_fieldset(params.get(FIELDS_PARAM)),
+        parse_fieldset(params.get(EXPAND_PARAM)),
+    )
+
+
+class SparseFieldsMixin(object):
+    """
+    Serializer mixin that drops unselected fields before serializing.
+
+    Fieldsets are passed with the fields and expand keyword arguments,
+    or read from the request in the context. Nested serializers in
+    Meta.expandable_fields are only included when expanded or selected
+    once either parameter is used.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.sparse_fields = kwargs.pop('fields', None)
+        self.sparse_expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+    def get_fieldsets(self) -> Tuple[Optional[Fieldset], Optional[Fieldset]]:
+        if self.sparse_fields is not None or self.sparse_expand is not None:
+            return self.sparse_fields, self.sparse_expand
+
+        # Only the top serializer reads the request
+        root = self.parent.parent if isinstance(
+            self.parent, serializers.ListSerializer) else self.parent
+        if root is None:
+            return get_request_fieldsets(self.context.get('request'))
+        return None, None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expand = self.get_fieldsets()
+        if selected is None and expand is None:
+            return fields
+
+        expand = expand or {}
+        meta = getattr(self, 'Meta', None)
+        expandable = getattr(meta, 'expandable_fields', ())
+        sparse = {}
+        for name, field in fields.items():
+            if name in expand:
+                nested_fields = (selected or {}).get(name) or None
+                nested_expand = expand[name]
+            elif selected is None and name not in expandable:
+                nested_fields, nested_expand = None, None
+            elif selected is not None and name in selected:
+                nested_fields = selected[name] or None
+                nested_expand = {}
+            else:
+                continue
+
+            if isinstance(field, SparseFieldsMixin):
+                field.sparse_fields = nested_fields
+                field.sparse_expand = nested_expand
+            sparse[name] = field
+        return sparse
+
+
+def get_model_field(model, name: str):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def narrow_queryset(
+    queryset: QuerySet, serializer: serializers.Serializer,
+    load_only: bool = True
+) -> QuerySet:
+    """
+    Select related models of the nested model serializers of
+    serializer, and with load_only, load only the model fields it
+    reads. Models with a field that is not a plain model field are
+    loaded in full.
+    """
+    only = []
+    related = []
+
+    def walk(serializer, model, prefix: str):
+        complete = True
+        names = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+
+            source = field.source_attrs
+            model_field = get_model_field(model, source[0]) \
+                if len(source) == 1 else None
+
+            if isinstance(field, serializers.ModelSerializer) and \
+                    model_field is not None and model_field.is_relation and \
+                    not model_field.many_to_many and \
+                    not model_field.one_to_many:
+                related.append(f'{prefix}{source[0]}')
+                walk(
+                    field, model_field.related_model,
+                    f'{prefix}{source[0]}__')
+                if model_field.concrete:
+                    names.append(source[0])
+            elif model_field is not None and model_field.concrete:
+                names.append(source[0])
+            else:
+                # Property, method or other attribute, may read anything
+                complete = False
+
+        if not complete:
+            names = [field.name for field in model._meta.concrete_fields]
+        only.extend(f'{prefix}{name}' for name in names)
+
+    serializer = getattr(serializer, 'child', serializer)
+    walk(serializer, queryset.model, '')
+
+    if related:
+        queryset = queryset.select_related(*related)
+    if only and load_only:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class SparseFieldsViewMixin(object):
+    """
+    View mixin selecting the related models of the nested serializers
+    read requests include, by default or with the expand parameter,
+    and narrowing the queryset to the fields selected with the
+    fields parameter
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        fields, _ = get_request_fieldsets(self.request)
+        return narrow_queryset(
+            queryset, self.get_serializer(), load_only=fields is not None)
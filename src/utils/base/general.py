@@ -1,12 +1,16 @@
+from base64 import b32encode
 from functools import reduce
 import hmac
 import os
 import secrets
 import string
 import sys
+import time
 from contextlib import contextmanager
 from io import StringIO
-from typing import Callable, Generator, List
+from itertools import islice
+from threading import Lock, Thread
+from typing import Callable, Generator, Iterable, List
 
 from cryptography.fernet import Fernet, InvalidToken
 from django.conf import settings
@@ -23,6 +27,69 @@ from rest_framework.serializers import Serializer
 from .logger import err_logger, logger  # noqa
 
 
+# Rfc 4648 base32 alphabet to crockford's, without I, L, O and U
+CROCKFORD_BASE32 = bytes.maketrans(
+    b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567',
+    b'0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+)
+
+
+class TrackingIdGenerator:
+    """
+    Ulid generator, 48 bits of unix time in milliseconds then 80
+    random bits, in 26 characters of crockford base32 that sort in
+    the order they were generated.
+
+    Ids of the same millisecond increment the random bits of the last
+    id, so ids of a process never repeat or go back in time. The
+    random bits are drawn again in forked processes.
+    """
+
+    random_bits = 80
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = Lock()
+        self.last_time = -1
+        self.last_random = 0
+
+    def new_random(self) -> int:
+        return int.from_bytes(os.urandom(self.random_bits // 8), 'big')
+
+    def __call__(self) -> str:
+        with self.lock:
+            now = time.time_ns() // 1_000_000
+            if now > self.last_time:
+                self.last_time = now
+                self.last_random = self.new_random()
+            else:
+                # Same millisecond or the clock went back
+                self.last_random += 1
+                if self.last_random >> self.random_bits:
+                    self.last_time += 1
+                    self.last_random = self.new_random()
+            value = (self.last_time << self.random_bits) | self.last_random
+
+        # 160 bits encode to 32 characters, the first 6 are
+        # the 30 zero bits above the 130 bits of the ulid
+        encoded = b32encode(value.to_bytes(20, 'big'))[6:]
+        return encoded.translate(CROCKFORD_BASE32).decode()
+
+
+tracking_id_generator = TrackingIdGenerator()
+os.register_at_fork(after_in_child=tracking_id_generator.reset)
+
+
+def create_unique_tracking_id(prefix: str = '') -> str:
+    """
+    Time ordered tracking code of prefix and an ulid, unique without
+    checking the database so codes can be made for bulk creates
+    """
+    return f'{prefix}{tracking_id_generator()}'
+
+
 def get_model_fields(model):
     """Get model fields"""
     return [field.name for field in model._meta.fields]
@@ -69,6 +136,16 @@ def compare_hash(a, b) -> bool:
     return hmac.compare_digest(a, b)
 
 
+def batched(iterable: Iterable, size: int) -> Generator[list, None, None]:
+    """Split iterable into lists of size items, the last may be shorter"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def add_queryset(a, b) -> QuerySet:
     """
     Add two querysets
@@ -126,6 +203,13 @@ def get_tokens_for_user(user) -> dict:
     """
 
     refresh = RefreshToken.for_user(user)
+
+    if settings.PRINCIPAL_TOKEN_CLAIMS:
+        from account.principal import get_principal_claims
+
+        for claim, value in get_principal_claims(user).items():
+            refresh[claim] = value
+
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -185,12 +269,24 @@ def send_email(email, subject, message, fail=True):
 
     val = send_mail(
         subject=subject, message=message,
-        html_message=message, rom_email=settings.DEFAULT_FROM_EMAIL,
+        html_message=message, from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[email], fail_silently=fail)
 
     return True if val else False
 
 
+def send_email_async(email, subject, message, fail=True) -> Thread:
+    """
+    Send mail in a background thread so the
+    request does not wait for the mail server
+    """
+    thread = Thread(
+        target=send_email, args=(email, subject, message, fail),
+        daemon=True)
+    thread.start()
+    return thread
+
+
 def upload_to_image(instance, filename: str, *args, **kwargs) -> str:
     """
     Function for dynamic upload directory for images
@@ -331,25 +427,57 @@ def get_random_secret() -> str:
     return get_random_string(length, allowed_chars)
 
 
-def get_usable_name(profile, name: str = None) -> str:
+def username_candidates(
+    name: str = None, batch_size: int = 4
+) -> Generator[List[str], None, None]:
+    """
+    Generate batches of random usernames, each batch twice as
+    large as the last, the first batch starts with name if passed
+
+    :param name: username to try first, defaults to None
+    :type name: str, optional
+    :param batch_size: size of the first batch, defaults to 4
+    :type batch_size: int, optional
+    """
+    batch = [name] if name else []
+    while True:
+        batch += [
+            username_gen(settings.USERNAME_LENGTH)
+            for _ in range(batch_size - len(batch))
+        ]
+        yield batch
+        batch = []
+        batch_size *= 2
+
+
+def get_usable_name(
+    profile, name: str = None, batch_size: int = 4, max_batches: int = 6
+) -> str:
     """
-    Get a unique username for newly created users
+    Get a unique username for newly created users,
+    checking each batch of candidates with one query
 
     :param profile: Profile model
-    :type profile: authentication.models.Profile
-    :param name: last generated username, defaults to None
+    :type profile: account.models.Profile
+    :param name: username to try first, defaults to None
     :type name: str, optional
+    :param batch_size: size of the first batch of candidates
+    :type batch_size: int, optional
+    :param max_batches: batches to try before giving up
+    :type max_batches: int, optional
+    :raises ValueError: no usable name was found
     :return: unique username
     :rtype: str
     """
-    if not name:
-        name = username_gen(5)
+    batches = username_candidates(name, batch_size)
+    for _, candidates in zip(range(max_batches), batches):
+        taken = set(profile.objects.filter(
+            username__in=candidates).values_list('username', flat=True))
+        for candidate in candidates:
+            if candidate not in taken:
+                return candidate
 
-    # Check if the name exists in the Profile table
-    exists = profile.objects.filter(username=name).exists()
-    if exists:
-        return get_usable_name(profile, username_gen(5))
-    return name
+    raise ValueError("Could not find a usable username")
 
 
 @contextmanager
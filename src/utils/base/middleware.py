@@ -0,0 +1,107 @@
+"""
+Middlewares to be used across all packages
+"""
+
+import gzip
+from hashlib import blake2b
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """
+    Check if encoding is accepted by an Accept-Encoding header,
+    by name or by *, an encoding with q=0 is refused
+    """
+    qualities = {}
+    for value in accept_encoding.split(','):
+        name, _, params = value.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, number = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    return qualities.get(encoding, qualities.get('*', 0.0)) > 0
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses for clients that accept it.
+
+    Bodies smaller than settings.COMPRESSION_MIN_SIZE are left alone,
+    they gain little and cost a gzip header. With
+    settings.COMPRESSION_CACHE_TIMEOUT set, compressed bodies are
+    cached by a digest of the uncompressed body, so identical
+    responses, e.g cached RawJSON payloads, are compressed once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not accepts_encoding(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip'):
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            content = self.compress(response.content)
+            if content is None:
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # Compressed bytes differ from the body the strong etag was for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = f'W/{etag}'
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    def compress(self, content: bytes) -> Optional[bytes]:
+        """
+        Return the gzipped content, or None when it is no smaller.
+        Cached by a digest of content when a cache timeout is set.
+        """
+        level = settings.COMPRESSION_LEVEL
+        timeout = settings.COMPRESSION_CACHE_TIMEOUT
+
+        key = None
+        if timeout:
+            digest = blake2b(content, digest_size=16).hexdigest()
+            key = f'gzip-{level}-{digest}'
+            compressed = cache.get(key)
+            if compressed is not None:
+                return compressed or None
+
+        # mtime is fixed so equal content gives equal bytes
+        compressed = gzip.compress(content, compresslevel=level, mtime=0)
+        if len(compressed) >= len(content):
+            compressed = b''
+
+        if key is not None:
+            cache.set(key, compressed, timeout)
+        return compressed or None
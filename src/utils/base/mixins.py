@@ -2,14 +2,25 @@
 Mixins to be used across all packages
 """
 
-from typing import Callable, List
+import threading
+from functools import partial
+from typing import Callable, Dict, Iterable, List
 
+from django.conf import settings
 from django.contrib import admin
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
 from django.db.models.query import QuerySet
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework import mixins, viewsets
 from rest_framework.response import Response
+from rest_framework.serializers import raise_errors_on_nested_writes
+from rest_framework.utils import model_meta
+from utils.base.exceptions import PreconditionFailed, VersionConflict
 from utils.base.fields import TrackingCodeField
+from utils.base.streaming import StreamingEnvelopeResponse
+from utils.base.tracking import TrackingCodeManager, cache_tracking_pk
 
 
 class BaseModelTracker(models.Model):
@@ -23,9 +34,256 @@ class BaseModelTracker(models.Model):
 
     tracking_code = TrackingCodeField(prefix=code_prefix, max_length=60)
 
+    objects = TrackingCodeManager()
+
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        # Replaces a cached miss of the code
+        if adding:
+            cache_tracking_pk(type(self), self.tracking_code, self.pk)
+
+
+Changes = Dict[Callable, List[models.Model]]
+
+
+def bulk_change_callback(func: Callable) -> Callable:
+    """
+    Mark a monitor_change function as taking the list of changed
+    instances, it is called once per batch instead of per instance
+    """
+    func.bulk_change = True
+    return func
+
+
+def run_change_funcs(changes: Changes):
+    for func, instances in changes.items():
+        if getattr(func, 'bulk_change', False):
+            func(instances)
+            continue
+        for instance in instances:
+            func(instance)
+
+
+class ChangeBatch:
+    """
+    Change callbacks of the models saved in a transaction, each
+    run once per row with the latest saved instance of the row
+    """
+
+    def __init__(self):
+        self.pending: Dict[tuple, models.Model] = {}
+        self.done = set()
+
+    def add(self, changes: Changes) -> List[tuple]:
+        """Keep the latest instances of changes, returns their keys"""
+        keys = []
+        for func, instances in changes.items():
+            for instance in instances:
+                key = (func, type(instance), instance.pk)
+                self.pending[key] = instance
+                keys.append(key)
+        return keys
+
+    def run(self, using: str, keys: List[tuple]):
+        # The first callback run after the commit takes the batch out
+        # of the registry, later transactions start their own
+        if change_batches.__dict__.get(using) is self:
+            del change_batches.__dict__[using]
+
+        changes = {}
+        for key in keys:
+            if key not in self.done:
+                self.done.add(key)
+                changes.setdefault(key[0], []).append(self.pending[key])
+        run_change_funcs(changes)
+
+
+# Change batch of the transaction in progress by database alias,
+# django connections are not shared between threads. The batch of
+# a transaction that rolled back is left until the next commit.
+change_batches = threading.local()
+
+
+def on_change_commit(changes: Changes, using: str):
+    """
+    Run the change callbacks of changes when the current
+    transaction commits, or now outside a transaction.
+
+    Each call has its own commit callback, so savepoint rollbacks
+    drop the changes saved in them, rows changed again later in the
+    transaction only run in the first callback.
+    """
+    batch = change_batches.__dict__.setdefault(using, ChangeBatch())
+    keys = batch.add(changes)
+    transaction.on_commit(partial(batch.run, using, keys), using=using)
+
+
+def add_changes(changes: Changes, instance: models.Model, fields: list):
+    """Add instance to the monitor_change functions of changed fields"""
+    for func in dict.fromkeys(
+        instance.monitor_change[field] for field in fields
+    ):
+        changes.setdefault(func, []).append(instance)
+
+
+def get_update_value(field: models.Field, value):
+    """Python value stored by an update of field to value"""
+    if isinstance(value, models.Model):
+        value = value.pk
+    return field.to_python(value)
+
+
+class ModelChangeQuerySet(QuerySet):
+    """
+    Queryset of ModelChangeFunc models running the monitor_change
+    functions of the rows changed by update and bulk_update.
+
+    Changed rows are found in one pass, from the values kept when
+    instances were loaded or one query of the current values. update
+    only loads rows when a monitored field is updated, and then
+    update_chunk_size rows at a time.
+    """
+
+    # Rows locked, compared and updated at a time by update
+    update_chunk_size = 2000
+
+    def get_monitored(self, fields: Iterable) -> Dict[str, str]:
+        """Monitored fields of fields, names or attnames, by field name"""
+        monitor_change = self.model.monitor_change or {}
+        monitored = {}
+        for key in fields:
+            try:
+                field = self.model._meta.get_field(key)
+            except FieldDoesNotExist:
+                continue
+            if field.name in monitor_change:
+                monitored[field.name] = key
+        return monitored
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        monitored = self.get_monitored(fields)
+        if not monitored or not objs:
+            return super().bulk_update(objs, fields, batch_size)
+
+        # Values of instances not loaded from the database
+        unknown = [
+            obj.pk for obj in objs
+            if any(
+                not hasattr(obj, obj.get_clone_field(name))
+                for name in monitored
+            )
+        ]
+        if unknown:
+            current = {
+                row[0]: row[1:] for row in
+                self.model._base_manager.using(self.db)
+                .filter(pk__in=unknown)
+                .values_list('pk', *monitored.values())
+            }
+            for obj in objs:
+                for name, value in zip(monitored, current.get(obj.pk, ())):
+                    setattr(obj, obj.get_clone_field(name), value)
+
+        changes = {}
+        for obj in objs:
+            add_changes(changes, obj, obj.get_changed_fields(monitored))
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Rows are written with update, of a queryset of the
+            # base manager so they are not compared again
+            rows = self.model._base_manager.using(self.db).bulk_update(
+                objs, fields, batch_size)
+            for obj in objs:
+                obj.snapshot_changes(monitored)
+            if changes:
+                on_change_commit(changes, self.db)
+        return rows
+
+    bulk_update.alters_data = True
+
+    def update(self, **kwargs):
+        monitored = self.get_monitored(kwargs)
+        if not monitored:
+            return super().update(**kwargs)
+
+        attnames = {
+            name: self.model._meta.get_field(name).attname
+            for name in monitored
+        }
+        queryset = self.select_related(None).order_by('pk').only(
+            *attnames.values())
+        rows = 0
+        changes = {}
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Rows are taken in chunks by primary key, locked so
+            # the values compared are the values updated
+            last = None
+            while True:
+                chunk = queryset.select_for_update()
+                if last is not None:
+                    chunk = chunk.filter(pk__gt=last)
+                instances = list(chunk[:self.update_chunk_size])
+                if not instances:
+                    break
+                last = instances[-1].pk
+                rows += self.update_chunk(
+                    instances, kwargs, monitored, attnames, changes)
+                if len(instances) < self.update_chunk_size:
+                    break
+            if changes:
+                on_change_commit(changes, self.db)
+        return rows
+
+    def update_chunk(
+        self, instances: list, kwargs: dict, monitored: Dict[str, str],
+        attnames: Dict[str, str], changes: Changes
+    ) -> int:
+        """Update the rows of instances, adding their changes"""
+        rows = self.model._base_manager.using(self.db).filter(
+            pk__in=[instance.pk for instance in instances]).update(**kwargs)
+
+        values = {}
+        expressions = []
+        for name, key in monitored.items():
+            value = kwargs[key]
+            if hasattr(value, 'resolve_expression'):
+                expressions.append(name)
+            else:
+                values[attnames[name]] = get_update_value(
+                    self.model._meta.get_field(name), value)
+
+        # Values of expressions are only known after the update
+        updated = {}
+        if expressions:
+            updated = {
+                row[0]: row[1:] for row in
+                self.model._base_manager.using(self.db)
+                .filter(pk__in=[instance.pk for instance in instances])
+                .values_list('pk', *(attnames[name] for name in expressions))
+            }
+
+        for instance in instances:
+            instance.__dict__.update(values)
+            instance.__dict__.update(
+                (attnames[name], value) for name, value in
+                zip(expressions, updated.get(instance.pk, ()))
+            )
+            add_changes(
+                changes, instance, instance.get_changed_fields(monitored))
+            instance.snapshot_changes(monitored)
+        return rows
+
+    update.alters_data = True
+
+
+ModelChangeManager = models.Manager.from_queryset(ModelChangeQuerySet)
+
 
 class ModelChangeFunc(models.Model):
 
@@ -34,10 +292,20 @@ class ModelChangeFunc(models.Model):
 
     # Setup update func
     """
-    Key and Update function to run when something changes
+    Key and Update function to run when something changes.
+
+    Values of the monitored fields are kept when the instance is
+    loaded and saved, a function runs once the transaction of a save
+    that set or changed its field commits. Functions run once per row
+    and transaction, with the last saved instance. update and
+    bulk_update of the objects manager run them too, see
+    ModelChangeQuerySet. Functions marked with bulk_change_callback
+    get the list of instances changed by each save or update.
     """
     monitor_change: dict = None
 
+    objects = ModelChangeManager()
+
     @property
     def monitor_change_fields(self) -> list:
         if self.monitor_change:
@@ -56,8 +324,54 @@ class ModelChangeFunc(models.Model):
     def get_attr(self, field: str):
         return getattr(self, field, None)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def get_change_attname(self, name: str) -> str:
+        """Attribute of the value of field name, the id of relations"""
+        try:
+            return self._meta.get_field(name).attname
+        except FieldDoesNotExist:
+            return name
+
+    def snapshot_changes(self, fields: Iterable = None):
+        """
+        Keep the values of the loaded monitored fields, of fields
+        only when given. Deferred fields are not loaded.
+        """
+        for field in self.monitor_change_fields:
+            attname = self.get_change_attname(field)
+            if fields is not None and field not in fields and \
+                    attname not in fields:
+                continue
+            if attname in self.__dict__:
+                setattr(
+                    self, self.get_clone_field(field), self.__dict__[attname])
+
+    def get_changed_fields(self, fields: Iterable = None) -> list:
+        """Monitored fields changed since loaded or saved"""
+        changed = []
+        for field in self.monitor_change_fields:
+            attname = self.get_change_attname(field)
+            if fields is not None and field not in fields and \
+                    attname not in fields:
+                continue
+            if attname not in self.__dict__:
+                # Deferred and never set
+                continue
+
+            clone_field = self.get_clone_field(field)
+            if not hasattr(self, clone_field) or \
+                    self.__dict__[attname] != getattr(self, clone_field):
+                changed.append(field)
+        return changed
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_changes()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        self.snapshot_changes(fields)
 
     def call_updates(self):
         """Forcefully call all update functions"""
@@ -65,34 +379,194 @@ class ModelChangeFunc(models.Model):
             function(self)
 
     def save(self, force_insert=False, force_update=False, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        if len(args) > 1:
+            update_fields = args[1]
+
+        if adding:
+            # Fields set on create run their functions too
+            changed = [
+                field for field in self.monitor_change_fields
+                if self.get_attr(self.get_change_attname(field)) is not None
+            ]
+        else:
+            changed = self.get_changed_fields(update_fields)
         super().save(force_insert, force_update, *args, **kwargs)
 
-        for field in self.monitor_change_fields:
-            clone_field = self.get_clone_field(field)
+        if changed:
+            changes = {}
+            add_changes(changes, self, changed)
+            on_change_commit(changes, self._state.db)
+        self.snapshot_changes(None if adding else update_fields)
 
-            # Get clone and normal values
-            clone_value = self.get_attr(clone_field)
-            normal_value = self.get_attr(field)
 
-            # Check if value are different
-            if normal_value != clone_value:
-                # Get Function to run
-                change_func = self.monitor_change.get(field)
-                change_func(self)
+class VersionedModel(models.Model):
+    """
+    Abstract model for optimistic concurrency. Saves of an existing
+    row only update it if it still has the version of the instance,
+    and increment the version. Saving a stale instance raises
+    VersionConflict, no row is locked. Like an IntegrityError it
+    marks the transaction for rollback, save in an atomic block to
+    recover from it.
+
+    Queryset updates do not change the version.
+    """
 
-        for field in self.monitor_change_fields:
-            clone_field = self.get_clone_field(field)
-            default_value = self.get_attr(field)
-            setattr(self, clone_field, default_value)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(
+        self, base_qs, using, pk_val, values, update_fields, forced_update
+    ):
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, self.version + 1))
+
+        updated = super()._do_update(
+            base_qs.filter(version=self.version), using, pk_val, values,
+            update_fields, forced_update)
+        if updated:
+            self.version += 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise VersionConflict(
+                f'{self._meta.object_name} {pk_val} is not at '
+                f'version {self.version}')
+        return updated
+
+
+class ConditionalUpdateMixin(object):
+    """
+    Retrieve and update view mixin for VersionedModel objects.
+
+    Responses carry an ETag of the object's version, reads with a
+    matching If-None-Match get 304 Not Modified. Updates with an
+    If-Match that does not match, or of an object changed since it
+    was read, get 412 Precondition Failed. The weak form of the ETag,
+    sent by CompressionMiddleware with gzipped bodies, matches too.
+    """
+
+    def get_versions(self, obj) -> tuple:
+        """Versions of the rows in the representation of obj"""
+        version = getattr(obj, 'version', None)
+        return () if version is None else (version,)
+
+    def get_etag(self, obj) -> str:
+        versions = self.get_versions(obj)
+        if not versions:
+            return None
+        return f'"{obj.pk}-{".".join(str(v) for v in versions)}"'
+
+    def etag_matches(self, etag: str, header: str) -> bool:
+        """Check if an If-Match or If-None-Match header lists etag"""
+        etags = parse_etags(header)
+        return '*' in etags or etag in (
+            tag[2:] if tag.startswith('W/') else tag for tag in etags)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        if etag is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        if self.etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(self.get_serializer(instance).data)
+        response['ETag'] = etag
+        return response
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+
+        etag = self.get_etag(instance)
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if if_match is not None and etag is not None and \
+                not self.etag_matches(etag, if_match):
+            raise PreconditionFailed()
+
+        serializer = self.get_serializer(
+            instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # The update only matches the version checked above
+            with transaction.atomic():
+                self.perform_update(serializer)
+        except VersionConflict:
+            raise PreconditionFailed()
+
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
+
+        response = Response(serializer.data)
+        etag = self.get_etag(instance)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+
+class ChangedFieldsMixin(object):
+    """
+    Model serializer mixin saving only the fields that changed on
+    update, with save(update_fields=...). Nothing is written when no
+    field changed, auto_now fields are only written with a change.
+    """
+
+    def get_changed_fields(self, instance, validated_data) -> list:
+        """Names of the model fields of validated_data that changed"""
+        changed = []
+        for attr, value in validated_data.items():
+            try:
+                field = instance._meta.get_field(attr)
+            except FieldDoesNotExist:
+                continue
+            if not field.concrete or field.many_to_many:
+                continue
+
+            if field.is_relation:
+                # Compare ids, the related object is not loaded
+                current = getattr(instance, field.attname)
+                value = getattr(value, 'pk', value)
+            else:
+                current = getattr(instance, attr)
+            if current != value:
+                changed.append(attr)
+        return changed
+
+    def update(self, instance, validated_data):
+        raise_errors_on_nested_writes('update', self, validated_data)
+        info = model_meta.get_field_info(instance)
+        changed = self.get_changed_fields(instance, validated_data)
+
+        m2m_fields = []
+        for attr, value in validated_data.items():
+            if attr in info.relations and info.relations[attr].to_many:
+                m2m_fields.append((attr, value))
+            else:
+                setattr(instance, attr, value)
+
+        if changed:
+            instance.save(update_fields=changed)
+
+        for attr, value in m2m_fields:
+            field = getattr(instance, attr)
+            field.set(value)
+
+        return instance
 
 
 class UpdateRetrieveViewSet(
+    ConditionalUpdateMixin,
     mixins.UpdateModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
 ):
     """
-    A viewset that provides `retrieve`, `update` actions.
+    A viewset that provides `retrieve`, `update` actions,
+    conditional for VersionedModel objects.
 
     To use it, override the class and set the `.queryset` and
     `.serializer_class` attributes.
@@ -104,16 +578,41 @@ class ListMixinUtils(object):
     """
     Implementation of a get reponse passed a queryset manually,
     to be used with list views sets with different list urls.
+
+    Set stream_unpaginated to stream the list when
+    there is no pagination, instead of building it at once.
     """
+
+    stream_unpaginated = False
+
     def get_with_queryset(self, queryset: QuerySet):
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
+        if self.stream_unpaginated:
+            return self.stream_with_queryset(queryset)
+
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def stream_with_queryset(self, queryset: QuerySet, chunk_size: int = None):
+        """
+        Stream all items of queryset in the response envelope,
+        fetching and serializing chunk_size rows at a time
+        """
+        chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+
+        # One serializer for all chunks, new serializers per
+        # chunk leave reference cycles for the gc to collect
+        serializer = self.get_serializer(many=True)
+        return StreamingEnvelopeResponse(
+            queryset.iterator(chunk_size=chunk_size),
+            serializer.to_representation,
+            request=self.request, chunk_size=chunk_size
+        )
+
 
 class ExtraAdminUtils(admin.ModelAdmin):
     add_fieldsets: dict = None
@@ -0,0 +1,205 @@
+"""
+Prebuilt OpenAPI schema, generated once per version of the api and
+served from memory with a strong ETag and a precompressed body.
+
+The version is a digest of the URLconf and settings.CODE_VERSION,
+so the schema is rebuilt when either changes. Build it at deploy
+time with `python manage.py build_schema`, otherwise the first
+request of a new version builds it. Without a CODE_VERSION a schema
+file can not tell which code it came from, so the schema is built
+once per process and kept in memory only.
+"""
+
+import gzip
+import os
+import threading
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLResolver, get_resolver
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.renderers import _SpecRenderer
+
+from .middleware import accepts_encoding
+
+# File extension of the schema encoded with each codec
+CODEC_EXTENSIONS = {
+    OpenAPICodecJson: 'json',
+    OpenAPICodecYaml: 'yaml',
+}
+
+
+def get_url_signature(patterns, prefix: str = '') -> List[str]:
+    """Route, view and name of every url in patterns"""
+    signature = []
+    for pattern in patterns:
+        route = f'{prefix}{pattern.pattern}'
+        if isinstance(pattern, URLResolver):
+            signature += get_url_signature(pattern.url_patterns, route)
+            continue
+
+        view = pattern.callback
+        view = getattr(view, 'cls', getattr(view, 'view_class', view))
+        signature.append(
+            f'{route} {view.__module__}.{view.__qualname__} {pattern.name}')
+    return signature
+
+
+@lru_cache(maxsize=8)
+def get_schema_version(urlconf: str, code_version: str) -> str:
+    """Digest of the urls of urlconf and the code version"""
+    digest = blake2b(code_version.encode(), digest_size=10)
+    for line in get_url_signature(get_resolver(urlconf).url_patterns):
+        digest.update(line.encode())
+    return digest.hexdigest()
+
+
+def get_current_version() -> str:
+    return get_schema_version(settings.ROOT_URLCONF, settings.CODE_VERSION)
+
+
+class PrebuiltSchema:
+    """Encoded schema with its gzipped bytes and etags"""
+
+    __slots__ = ('content', 'compressed', 'etag', 'compressed_etag')
+
+    def __init__(self, content: bytes, compressed: bytes = None):
+        self.content = content
+        if compressed is None:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        self.compressed = compressed
+
+        digest = blake2b(content, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.compressed_etag = f'"{digest}-gzip"'
+
+    @classmethod
+    def load(cls, path: Path) -> 'PrebuiltSchema':
+        return cls(path.read_bytes(), Path(f'{path}.gz').read_bytes())
+
+    def save(self, path: Path):
+        """Write the schema and its gzipped bytes next to it"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for name, content in (
+            (path, self.content), (Path(f'{path}.gz'), self.compressed)
+        ):
+            # Written aside then renamed, workers never read half a file
+            temp = name.with_name(f'.{name.name}.{os.getpid()}')
+            temp.write_bytes(content)
+            os.replace(temp, name)
+
+    def get_response(self, request, content_type: str) -> HttpResponse:
+        """
+        Response of the schema, gzipped when accepted, or
+        not modified when the client has the current etag
+        """
+        compress = accepts_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip')
+        etag = self.compressed_etag if compress else self.etag
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in (tag.strip() for tag in if_none_match.split(',')):
+            response = HttpResponseNotModified()
+        elif compress:
+            response = HttpResponse(
+                self.compressed, content_type=content_type)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(self.content, content_type=content_type)
+
+        response.headers['ETag'] = etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class PrebuiltSchemaMixin(object):
+    """
+    Schema view mixin serving the prebuilt schema for spec formats,
+    the UI pages are rendered as usual. Views set schema_info, the
+    openapi.Info of the schema, and must be public.
+    """
+
+    schema_info = None
+
+    # Prebuilt schemas by version and file extension
+    prebuilt: Dict[tuple, PrebuiltSchema] = {}
+    prebuilt_lock = threading.Lock()
+
+    def get(self, request, version='', format=None):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, _SpecRenderer):
+            return super().get(request, version, format)
+
+        extension = CODEC_EXTENSIONS[renderer.codec_class]
+        schema = self.get_prebuilt_schema(get_current_version(), extension)
+        return schema.get_response(
+            request, f'{renderer.media_type}; charset={renderer.charset}')
+
+    @classmethod
+    def get_schema_path(cls, version: str, extension: str) -> Path:
+        return Path(settings.OPENAPI_SCHEMA_DIR) / \
+            f'openapi-{version}.{extension}'
+
+    @classmethod
+    def get_prebuilt_schema(
+        cls, version: str, extension: str
+    ) -> PrebuiltSchema:
+        """Prebuilt schema from memory, then disk, else built now"""
+        schema = cls.prebuilt.get((version, extension))
+        if schema is not None:
+            return schema
+
+        with cls.prebuilt_lock:
+            # Built by another thread while waiting
+            schema = cls.prebuilt.get((version, extension))
+            if schema is not None:
+                return schema
+
+            path = cls.get_schema_path(version, extension)
+            if not settings.CODE_VERSION:
+                # Files of an earlier deploy can have the same version
+                schema = cls.generate_schemas([extension])[extension]
+            else:
+                if not path.exists():
+                    cls.build_schema(version, [extension])
+                schema = PrebuiltSchema.load(path)
+            cls.prebuilt[(version, extension)] = schema
+            return schema
+
+    @classmethod
+    def generate_schemas(
+        cls, extensions: List[str] = None
+    ) -> Dict[str, PrebuiltSchema]:
+        """
+        Generate the schema encoded in the formats of extensions,
+        all formats by default
+        """
+        generator = cls.generator_class(cls.schema_info)
+        swagger = generator.get_schema(request=None, public=True)
+        return {
+            extension: PrebuiltSchema(codec_class([]).encode(swagger))
+            for codec_class, extension in CODEC_EXTENSIONS.items()
+            if extensions is None or extension in extensions
+        }
+
+    @classmethod
+    def build_schema(
+        cls, version: str = None, extensions: List[str] = None
+    ) -> List[Path]:
+        """
+        Generate the schema and write it in the formats of extensions,
+        all formats by default. Returns the paths written.
+        """
+        version = version or get_current_version()
+        paths = []
+        for extension, schema in cls.generate_schemas(extensions).items():
+            path = cls.get_schema_path(version, extension)
+            schema.save(path)
+            paths.append(path)
+        return paths
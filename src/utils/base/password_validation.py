@@ -0,0 +1,163 @@
+"""
+Password validators to be used in settings.AUTH_PASSWORD_VALIDATORS
+in place of the django validators with the same names
+"""
+
+import gzip
+import mmap
+import re
+import struct
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils.translation import gettext as _
+
+from .logger import err_logger
+
+
+class CommonPasswordIndex:
+    """
+    Read only index of common passwords in a memory mapped file.
+
+    The file holds sorted fixed width records, so lookups are a
+    binary search over the mapped pages. Nothing is parsed into
+    python objects, workers share the pages through the os page
+    cache instead of each holding a set of 20k strings.
+    """
+
+    magic = b'CPIDX1'
+    header = struct.Struct('<6sHI4x')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.width, self.count = self.header.unpack_from(self._mmap)
+        if magic != self.magic:
+            raise ValueError(f"{path} is not a common password index")
+
+    @classmethod
+    def build(cls, passwords: Iterable[str], path):
+        """Write an index of passwords to path"""
+        records = sorted({
+            password.strip().lower().encode()
+            for password in passwords if password.strip()
+        })
+        width = max(map(len, records), default=0)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(cls.header.pack(cls.magic, width, len(records)))
+            for record in records:
+                f.write(record.ljust(width, b'\0'))
+
+    @classmethod
+    def build_from_list(cls, source_path, path):
+        """Write an index of a password list, which may be gzipped"""
+        try:
+            with gzip.open(source_path, 'rt', encoding='utf-8') as f:
+                passwords = f.read().splitlines()
+        except OSError:
+            with open(source_path, encoding='utf-8') as f:
+                passwords = f.read().splitlines()
+        cls.build(passwords, path)
+
+    def __contains__(self, password: str) -> bool:
+        key = password.encode()
+        if not key or len(key) > self.width:
+            return False
+        key = key.ljust(self.width, b'\0')
+
+        low, high = 0, self.count
+        offset, width = self.header.size, self.width
+        while low < high:
+            middle = (low + high) // 2
+            start = offset + middle * width
+            record = self._mmap[start:start + width]
+            if record < key:
+                low = middle + 1
+            elif record > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    Validate whether the password is a common password, using the
+    index built by `manage.py build_password_index` when it exists.
+    Falls back to the django password list if it does not.
+    """
+
+    def __init__(self, index_path=None):
+        if index_path is None:
+            index_path = settings.COMMON_PASSWORD_INDEX
+
+        self.passwords = self.load_index(index_path)
+        if self.passwords is None:
+            super().__init__()
+
+    def load_index(self, index_path) -> Optional[CommonPasswordIndex]:
+        try:
+            return CommonPasswordIndex(index_path)
+        except (OSError, ValueError) as e:
+            err_logger.warning(
+                f"Common password index not loaded, {e}. "
+                "Run `manage.py build_password_index`")
+
+
+class UserAttributeSimilarityValidator(
+    password_validation.UserAttributeSimilarityValidator
+):
+    """
+    Validate whether the password is sufficiently different from the
+    user's attributes. Same result as the django validator, but skips
+    the SequenceMatcher for parts whose lengths alone rule out a ratio
+    of max_similarity.
+    """
+
+    def validate(self, password, user=None):
+        if not user:
+            return
+
+        password = password.lower()
+        password_length = len(password)
+
+        for attribute_name in self.user_attributes:
+            value = getattr(user, attribute_name, None)
+            if not value or not isinstance(value, str):
+                continue
+
+            value_parts = re.split(r'\W+', value) + [value]
+            for value_part in value_parts:
+                value_part = value_part.lower()
+
+                # Upper bound of SequenceMatcher ratios
+                total = password_length + len(value_part)
+                bound = 2.0 * min(
+                    password_length, len(value_part)) / total if total else 1.0
+                if bound < self.max_similarity:
+                    continue
+
+                matcher = SequenceMatcher(a=password, b=value_part)
+                if matcher.quick_ratio() >= self.max_similarity:
+                    try:
+                        verbose_name = str(user._meta.get_field(
+                            attribute_name).verbose_name)
+                    except FieldDoesNotExist:
+                        verbose_name = attribute_name
+                    raise ValidationError(
+                        _("The password is too similar to \
+the %(verbose_name)s."),
+                        code='password_too_similar',
+                        params={'verbose_name': verbose_name},
+                    )
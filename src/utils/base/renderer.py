@@ -1,15 +1,46 @@
-from typing import Type
-
+from django.conf import settings
+from django.core.validators import EMPTY_VALUES
+from django.http.response import HttpResponseBase
+from django.http.multipartparser import parse_header
+from django.utils.cache import patch_vary_headers
 from rest_framework.renderers import (INDENT_SEPARATORS, LONG_SEPARATORS,
                                       SHORT_SEPARATORS, JSONRenderer)
-from rest_framework.utils import json
-from utils.base.status import CustomStatusCode
+from utils.base.encoders import (RawJSONSplicer, get_json_backend,
+                                 raw_json_splicer)
+from utils.base.status import STATUS_MESSAGES
+from utils.base.timing import timed
+
+COMPACT_ENVELOPE = 'compact'
+
+# Header asking for an envelope, the envelope media type parameter
+# can be used instead, e.g `Accept: application/json; envelope=compact`
+ENVELOPE_HEADER = 'X-Envelope'
+
+
+def drop_empty(data):
+    """
+    Return data without null or empty values in its dicts,
+    nested dicts left empty are dropped too. List items are kept.
+    """
+    if isinstance(data, dict):
+        compact = {}
+        for key, value in data.items():
+            value = drop_empty(value)
+            if value not in EMPTY_VALUES:
+                compact[key] = value
+        return compact
+    if isinstance(data, (list, tuple)):
+        return [drop_empty(item) for item in data]
+    return data
 
 
 class ResponseDecorator:
     """
     Class for customizing rest api return response
     """
+
+    __slots__ = ('data', 'status', 'path', 'success', 'message')
+
     def __init__(
         self, request=None, status: str = '200',
         data: dict = None, message: str = None
@@ -18,37 +49,32 @@ class ResponseDecorator:
         if data is None:
             data = {}
 
-        self.data = data
-
-        # Use the passed status or default
-        if isinstance(dict, dict):
-            self.status = data.pop("status", str(status))
-        else:
-            self.status = str(status)
-        self.path = ''
-        self.success = True
-        if self.status.startswith('4') or self.status.startswith('5'):
-            self.success = False
+        # Use the status in data or the passed status,
+        # without changing the data passed in
+        if isinstance(data, dict) and 'status' in data:
+            status = data['status']
+            data = {
+                key: value for key, value in data.items() if key != 'status'}
 
-        if request is not None:
-            self.path = request.META['PATH_INFO']
+        self.data = data
+        self.status = str(status)
+        self.success = self.status[:1] not in ('4', '5')
+        self.path = request.META['PATH_INFO'] if request is not None else ''
 
         self.message = message
         if self.message is None:
             self.set_message()
 
     def set_message(self):
-        for key, value in CustomStatusCode.__dict__.items():
-            if key.find(self.status) != -1:
-                stat_obj_property: Type[property] = value
-                self.message = stat_obj_property.__doc__
-                break
+        self.message = STATUS_MESSAGES.get(self.status)
 
-    def get_response(self) -> dict:
+    def get_response(self, compact: bool = False) -> dict:
         """
         Return response in nice format
         """
 
+        if compact:
+            return self.get_compact_response()
         if self.success:
             return self.get_success_response()
         return self.get_error_response()
@@ -86,6 +112,33 @@ class ResponseDecorator:
             "path": self.path,
         }
 
+    def get_compact_response(self) -> dict:
+        """
+        Return a compact response format, for clients that know the
+        request path and read success from the status code. The message
+        is only kept when it is not the status message, null and empty
+        values are left out.
+
+        :return: Compact response
+        :rtype: dict
+        """
+
+        response = {}
+        message = None
+        if self.message != STATUS_MESSAGES.get(self.status):
+            message = self.message
+
+        if not self.success:
+            response['error'] = drop_empty(
+                {'code': self.status, 'message': message})
+        elif message not in EMPTY_VALUES:
+            response['message'] = message
+
+        data = drop_empty(self.data)
+        if data not in EMPTY_VALUES:
+            response['data'] = data
+        return response
+
 
 class ApiRenderer(JSONRenderer):
     def render(
@@ -98,33 +151,140 @@ class ApiRenderer(JSONRenderer):
         Used restframework main code and edited it
         """
 
+        with timed('render'):
+            return self.render_envelope(
+                data, accepted_media_type, renderer_context)
+
+    def render_envelope(
+        self, data, accepted_media_type=None,
+        renderer_context: dict = None
+    ) -> bytes:
+        """Render data in the response envelope"""
+
+        renderer_context = renderer_context or {}
+
         # Customize the response
-        request = renderer_context.get('request')
         response = renderer_context.get('response')
-        data_kwargs = {
-            'request': request,
-            'status': response.status_code,
-            'data': response.data,
-            'message': getattr(response, 'message', None)
-        }
-        data = ResponseDecorator(**data_kwargs).get_response()
+        request = renderer_context.get('request')
+        data = ResponseDecorator(
+            request=request,
+            status=response.status_code,
+            data=self.get_data(response),
+            message=getattr(response, 'message', None)
+        ).get_response(
+            compact=self.is_compact(accepted_media_type, request))
+
+        if isinstance(response, HttpResponseBase):
+            patch_vary_headers(response, (ENVELOPE_HEADER,))
 
-        renderer_context = renderer_context or {}
         indent = self.get_indent(accepted_media_type, renderer_context)
+        return self.encode(data, indent)
+
+    def is_compact(self, accepted_media_type=None, request=None) -> bool:
+        """
+        Check if the compact envelope is asked for, with the
+        envelope media type parameter or the envelope header
+        """
+
+        if accepted_media_type:
+            _, params = parse_header(accepted_media_type.encode('ascii'))
+            envelope = params.get('envelope', b'')
+            if isinstance(envelope, bytes):
+                envelope = envelope.decode('ascii')
+            if envelope:
+                return envelope.lower() == COMPACT_ENVELOPE
+
+        if request is None:
+            return False
+        envelope = request.headers.get(ENVELOPE_HEADER, '')
+        return envelope.lower() == COMPACT_ENVELOPE
 
+    def get_data(self, response):
+        """Data of the response to put in the envelope"""
+        return response.data
+
+    def get_separators(self, indent: int = None):
         if indent is None:
-            separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
-        else:
-            separators = INDENT_SEPARATORS
+            return SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        return INDENT_SEPARATORS
+
+    def encode(self, data, indent: int = None) -> bytes:
+        """
+        Encode data with the json backend, escaping line and
+        paragraph separators and splicing in any RawJSON
+        """
 
-        ret = json.dumps(
-            data, cls=self.encoder_class,
-            indent=indent, ensure_ascii=self.ensure_ascii,
-            allow_nan=not self.strict, separators=separators
-        )
+        backend = get_json_backend(settings.API_JSON_BACKEND)
+        splicer = RawJSONSplicer()
+        token = raw_json_splicer.set(splicer)
+        try:
+            ret = backend.dumps(
+                data, indent=indent, ensure_ascii=self.ensure_ascii,
+                allow_nan=not self.strict,
+                separators=self.get_separators(indent)
+            )
+        finally:
+            raw_json_splicer.reset(token)
+
+        if isinstance(ret, str):
+            ret = ret.encode()
 
         # We always fully escape \u2028 and \u2029 to ensure we output JSON
-        # that is a strict javascript subset.
+        # that is a strict javascript subset, ascii output is already escaped
         # See: http://timelessrepo.com/json-isnt-a-javascript-subset
-        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
-        return ret.encode()
+        if not self.ensure_ascii:
+            for char in ('\u2028', '\u2029'):
+                encoded = char.encode()
+                if encoded in ret:
+                    ret = ret.replace(encoded, char.encode('unicode_escape'))
+        return splicer.splice(ret)
+
+
+class NDJSONRenderer(ApiRenderer):
+    """
+    Render newline delimited json. The first line is the response
+    envelope without data, followed by a line for each item of data.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_envelope(
+        self, data, accepted_media_type=None,
+        renderer_context: dict = None
+    ):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        data = response.data
+
+        meta = {}
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            # Paginated list, the rest of the page data goes in the meta
+            meta = {
+                key: value for key, value in data.items() if key != 'results'}
+            data = data['results']
+
+        rows = data if isinstance(data, list) else [data] if data else []
+        request = renderer_context.get('request')
+        compact = self.is_compact(accepted_media_type, request)
+        if compact:
+            meta, rows = drop_empty(meta), drop_empty(rows)
+        return self.render_meta(
+            request, response.status_code,
+            getattr(response, 'message', None), compact=compact, **meta
+        ) + self.render_rows(rows)
+
+    def render_meta(
+        self, request=None, status: str = '200', message: str = None,
+        compact: bool = False, **meta
+    ) -> bytes:
+        """Return the envelope line, with meta in place of data"""
+        envelope = ResponseDecorator(
+            request, status, message=message).get_response(compact=compact)
+        envelope.pop('data', None)
+        envelope.update(meta)
+        return self.encode(envelope) + b'\n'
+
+    def render_rows(self, rows) -> bytes:
+        """Return a line for each row"""
+        return b''.join(self.encode(row) + b'\n' for row in rows)
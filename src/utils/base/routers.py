@@ -1,5 +1,18 @@
+import re
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional
+
+from django.urls import URLPattern, URLResolver
+from django.urls.exceptions import Resolver404
+from django.urls.resolvers import RegexPattern, ResolverMatch
 from rest_framework.routers import DefaultRouter, DynamicRoute, Route
 
+# Segment of literal characters and escaped punctuation
+STATIC_SEGMENT = re.compile(r'(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])*')
+
+# Inline flags applying to the whole regex, e.g (?i)
+GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
 
 class CustomDefaultRouter(DefaultRouter):
     """
@@ -118,3 +131,262 @@ class CustomRouterNoLookup(DefaultRouter):
         ),
     ]
 
+
+def iter_tokens(regex: str) -> Iterator[str]:
+    """Escapes, character classes and single characters of regex"""
+    i = 0
+    while i < len(regex):
+        if regex[i] == '\\':
+            end = i + 2
+        elif regex[i] == '[':
+            # A ] first in the class is a literal
+            first = i + (3 if regex[i + 1:i + 2] == '^' else 2)
+            end = regex.index(']', first) + 1
+            while regex[end - 2] == '\\':
+                end = regex.index(']', end) + 1
+        else:
+            end = i + 1
+        yield regex[i:end]
+        i = end
+
+
+def split_segments(regex: str) -> Optional[List[str]]:
+    """
+    Split regex on the slashes outside groups, returns None when a
+    slash is in a group or alternation is used outside one, as the
+    segments could not be matched on their own then
+    """
+    segments = ['']
+    depth = 0
+    for token in iter_tokens(regex):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == '|' and not depth:
+            return None
+        elif token == '/':
+            if depth:
+                return None
+            segments.append('')
+            continue
+        segments[-1] += token
+    return segments
+
+
+def can_match_slash(segment: str) -> bool:
+    """Check if any part of a segment regex can match a slash"""
+    return any(
+        token == '.' or (len(token) > 1 and re.fullmatch(token, '/'))
+        for token in iter_tokens(segment)
+    )
+
+
+def strip_anchors(regex: str) -> Optional[str]:
+    """
+    Regex without its start and end anchors, None when it is not
+    anchored at both ends or sets global flags
+    """
+    if not regex.startswith('^') or GLOBAL_FLAGS.search(regex):
+        return None
+    if regex.endswith('\\Z'):
+        return regex[1:-2]
+    if regex.endswith('$') and not regex.endswith('\\$'):
+        return regex[1:-1]
+    return None
+
+
+def is_own_segment(segment: str) -> bool:
+    """Check if a segment regex matches path segments on its own"""
+    if segment[:1] in ('?', '*', '+', '{'):
+        # Quantifier of the slash before it
+        return False
+    if can_match_slash(segment):
+        return False
+    # Segments are matched on their own, raises re.error if invalid
+    re.compile(segment)
+    return True
+
+
+def get_segments(regex: str) -> Optional[List[List[str]]]:
+    """
+    Segments of the paths an anchored url regex matches, two lists
+    when the trailing slash is optional. None when the regex can not
+    be split in segments that match path segments on their own.
+    """
+    regex = strip_anchors(regex)
+    if regex is None:
+        return None
+
+    try:
+        segments = split_segments(regex)
+        if segments is None:
+            return None
+        variants = [segments]
+        if len(segments) > 1 and segments[-1] == '?':
+            # Optional trailing slash, e.g of format suffix patterns
+            variants = [segments[:-1], segments[:-1] + ['']]
+
+        if not all(is_own_segment(segment) for segment in variants[-1]):
+            return None
+    except (ValueError, re.error):
+        return None
+    return variants
+
+
+def get_literal_prefix(segment: str) -> str:
+    """Literal text every match of a segment regex starts with"""
+    prefix = []
+    for token in iter_tokens(segment):
+        if token in ('?', '*', '+', '{'):
+            # The last literal is optional
+            prefix = prefix[:-1]
+            break
+        if not STATIC_SEGMENT.fullmatch(token):
+            break
+        prefix.append(token[-1])
+    return ''.join(prefix)
+
+
+class RouteTrie:
+    """
+    Prefix trie of url patterns by path segment. Static segments are
+    looked up in a dict, segments with a regex are grouped by their
+    literal prefix so only those the path segment starts with are
+    matched. Patterns that can not be split in segments are always
+    candidates.
+    """
+
+    __slots__ = ('static', 'dynamic', 'indexes')
+
+    def __init__(self):
+        self.static: Dict[str, RouteTrie] = {}
+        self.dynamic: Dict[str, Dict[str, tuple]] = {}
+        self.indexes: List[int] = []
+
+    def add(self, segments: List[str], index: int):
+        node = self
+        for segment in segments:
+            if STATIC_SEGMENT.fullmatch(segment):
+                literal = re.sub(r'\\(.)', r'\1', segment)
+                node = node.static.setdefault(literal, RouteTrie())
+                continue
+
+            group = node.dynamic.setdefault(get_literal_prefix(segment), {})
+            if segment not in group:
+                group[segment] = (re.compile(segment), RouteTrie())
+            node = group[segment][1]
+        node.indexes.append(index)
+
+    def find(self, segments: List[str], position: int = 0) -> Iterator[int]:
+        """Indexes of the patterns that may match segments"""
+        if position == len(segments):
+            yield from self.indexes
+            return
+
+        segment = segments[position]
+        child = self.static.get(segment)
+        if child is not None:
+            yield from child.find(segments, position + 1)
+
+        if not self.dynamic:
+            return
+        for end in range(len(segment) + 1):
+            group = self.dynamic.get(segment[:end])
+            if group is None:
+                continue
+            for regex, child in group.values():
+                if regex.fullmatch(segment):
+                    yield from child.find(segments, position + 1)
+
+
+class TrieURLResolver(URLResolver):
+    """
+    Resolver that only tries the patterns a route trie finds for
+    the path, in their url pattern order, instead of all of them.
+    Reversing is unchanged.
+
+    Resolver404 lists only the patterns that were tried.
+    """
+
+    @cached_property
+    def trie(self):
+        trie = RouteTrie()
+        fallback = []
+        for index, pattern in enumerate(self.url_patterns):
+            variants = None
+            if isinstance(pattern, URLPattern):
+                variants = get_segments(pattern.pattern.regex.pattern)
+            if variants is None:
+                fallback.append(index)
+                continue
+            for segments in variants:
+                trie.add(segments, index)
+        return trie, fallback
+
+    def get_candidates(self, path: str) -> List:
+        trie, fallback = self.trie
+        indexes = set(trie.find(path.split('/')))
+        indexes.update(fallback)
+        return [self.url_patterns[index] for index in sorted(indexes)]
+
+    def resolve(self, path):
+        # URLResolver.resolve over the candidates of the trie
+        path = str(path)
+        tried = []
+        match = self.pattern.match(path)
+        if not match:
+            raise Resolver404({'path': path})
+
+        new_path, args, kwargs = match
+        for pattern in self.get_candidates(new_path):
+            try:
+                sub_match = pattern.resolve(new_path)
+            except Resolver404 as e:
+                self._extend_tried(tried, pattern, e.args[0].get('tried'))
+                continue
+
+            if not sub_match:
+                tried.append([pattern])
+                continue
+
+            sub_match_dict = {**kwargs, **self.default_kwargs}
+            sub_match_dict.update(sub_match.kwargs)
+            sub_match_args = sub_match.args
+            if not sub_match_dict:
+                sub_match_args = args + sub_match.args
+            current_route = '' if isinstance(pattern, URLPattern) \
+                else str(pattern.pattern)
+            self._extend_tried(tried, pattern, sub_match.tried)
+            return ResolverMatch(
+                sub_match.func,
+                sub_match_args,
+                sub_match_dict,
+                sub_match.url_name,
+                [self.app_name] + sub_match.app_names,
+                [self.namespace] + sub_match.namespaces,
+                self._join_route(current_route, sub_match.route),
+                tried,
+            )
+        raise Resolver404({'tried': tried, 'path': new_path})
+
+
+class TrieRouterMixin(object):
+    """
+    Router mixin wrapping the router's urls in a TrieURLResolver,
+    names and reversing are the same as the router's own urls.
+
+    Meant for routers of many viewsets, below a few hundred routes
+    django's linear resolver is as fast, see benchmarks/routing.py
+    """
+
+    def get_urls(self):
+        return [TrieURLResolver(RegexPattern(r'^'), super().get_urls())]
+
+
+class TrieDefaultRouter(TrieRouterMixin, CustomDefaultRouter):
+    pass
+
+
+class TrieRouterNoLookup(TrieRouterMixin, CustomRouterNoLookup):
+    pass
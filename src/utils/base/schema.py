@@ -4,6 +4,9 @@ from drf_yasg.openapi import Schema
 
 from rest_framework.status import is_success
 
+from utils.base.columnar import ColumnarRenderer
+from utils.base.renderer import COMPACT_ENVELOPE, ENVELOPE_HEADER
+
 
 class BaseSchema(SwaggerAutoSchema):
     def wrap_schema_success(self, schema):
@@ -48,6 +51,66 @@ class BaseSchema(SwaggerAutoSchema):
             }
         )
 
+    def get_columnar_schema(self):
+        """Schema of lists rendered by ColumnarRenderer
+
+        :return: Columnar schema
+        :rtype: Schema
+        """
+        return Schema(
+            type='object',
+            description='Rows as columns, aligned with schema. '
+                        'Nested fields are flattened to dotted names.',
+            properties={
+                'schema': Schema(
+                    type='array',
+                    items=Schema(
+                        type='object',
+                        properties={
+                            'name': Schema(type='string'),
+                            'type': Schema(type='string'),
+                            'nullable': Schema(type='boolean'),
+                        }
+                    )
+                ),
+                'columns': Schema(
+                    type='array',
+                    items=Schema(type='array', items=Schema(type='string'))
+                ),
+                'count': Schema(type='integer'),
+            }
+        )
+
+    def has_columnar(self) -> bool:
+        return any(
+            renderer.media_type == ColumnarRenderer.media_type
+            for renderer in self.get_renderer_classes()
+        )
+
+    def get_envelope_parameter(self):
+        """Header parameter asking for the compact envelope
+
+        :return: Envelope header parameter
+        :rtype: openapi.Parameter
+        """
+        return openapi.Parameter(
+            ENVELOPE_HEADER, openapi.IN_HEADER,
+            description='Send `compact` for a compact envelope, also asked '
+                        'for with `Accept: application/json; '
+                        'envelope=compact`. Success, message and path are '
+                        'left out, the message is kept when it is not the '
+                        'status message, and null or empty values are '
+                        'dropped from data.',
+            type=openapi.TYPE_STRING,
+            enum=[COMPACT_ENVELOPE],
+            required=False,
+        )
+
+    def add_manual_parameters(self, parameters):
+        """Add the envelope header to the parameters of all operations"""
+        return super().add_manual_parameters(
+            [*parameters, self.get_envelope_parameter()])
+
     def get_responses(self):
         """Get responses for swagger,
         wrap all responses with success, status, message, data and path fields
@@ -60,6 +123,11 @@ class BaseSchema(SwaggerAutoSchema):
         for code in data.keys():
             try:
                 if is_success(int(code)):
+                    if self.has_columnar():
+                        # Documented as an extension, swagger 2
+                        # has one schema for all media types
+                        data[code]['x-columnar'] = self.wrap_schema_success(
+                            self.get_columnar_schema())
                     data[code].schema = self.wrap_schema_success(
                         data[code].schema)
                 else:
@@ -90,5 +90,18 @@ class CustomStatusCode(object):
         """Error creating payment charge"""
         return 442
 
+    @property
+    def HTTP_443_INVALID_OTP(self) -> int:
+        """OTP provided is not valid or has expired"""
+        return 443
+
 
 StatCode = CustomStatusCode()
+
+
+# Message of each status code as a string, from the docstrings above
+STATUS_MESSAGES = {
+    name.split('_')[1]: value.__doc__
+    for name, value in vars(CustomStatusCode).items()
+    if name.startswith('HTTP_') and isinstance(value, property)
+}
@@ -0,0 +1,147 @@
+"""
+Streaming of large lists in the api response envelope, so the
+full list and its json are never held in memory at once
+"""
+
+import uuid
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .general import batched
+from .renderer import (ENVELOPE_HEADER, ApiRenderer, NDJSONRenderer,
+                       ResponseDecorator, drop_empty)
+
+
+def is_compact(request=None) -> bool:
+    """Check if the compact envelope is asked for, see ApiRenderer"""
+    return ApiRenderer().is_compact(
+        getattr(request, 'accepted_media_type', None), request)
+
+
+def serialize_chunks(
+    items: Iterable, serialize: Callable[[list], list],
+    chunk_size: int = None, compact: bool = False
+) -> Iterator[list]:
+    """
+    Yield the serialized lists of chunk_size items, without
+    null or empty values for compact envelopes
+    """
+    for chunk in batched(items, chunk_size or settings.STREAM_CHUNK_SIZE):
+        rows = serialize(chunk)
+        if compact:
+            rows = drop_empty(rows)
+        if rows:
+            yield rows
+
+
+def stream_envelope(
+    items: Iterable, serialize: Callable[[list], list], request=None,
+    status: str = '200', message: str = None, chunk_size: int = None,
+    compact: bool = False
+) -> Iterator[bytes]:
+    """
+    Yield the response envelope of items as json bytes,
+    serializing and encoding chunk_size items at a time
+
+    :param items: items to serialize, e.g queryset.iterator()
+    :type items: Iterable
+    :param serialize: function returning the serialized list of a chunk,
+        e.g to_representation of a list serializer
+    :type serialize: Callable[[list], list]
+    :param chunk_size: items per chunk, defaults to settings.STREAM_CHUNK_SIZE
+    :type chunk_size: int, optional
+    :param compact: use the compact envelope, as ApiRenderer does
+    :type compact: bool, optional
+    """
+    renderer = ApiRenderer()
+    chunks = serialize_chunks(items, serialize, chunk_size, compact)
+
+    first = next(chunks, None)
+    if first is None:
+        # Same envelope as the renderer's, compact ones leave the list out
+        yield renderer.encode(ResponseDecorator(
+            request, status, [], message).get_response(compact=compact))
+        return
+
+    # Envelope is encoded once with a marker in place of the data
+    marker = f'stream-{uuid.uuid4().hex}'
+    envelope = renderer.encode(ResponseDecorator(
+        request, status, marker, message).get_response(compact=compact))
+    head, tail = envelope.split(renderer.encode(marker), 1)
+
+    # Strip the brackets of each chunk's list
+    yield head + b'[' + renderer.encode(first)[1:-1]
+    for rows in chunks:
+        yield b',' + renderer.encode(rows)[1:-1]
+    yield b']' + tail
+
+
+class StreamingEnvelopeResponse(StreamingHttpResponse):
+    """
+    Streaming response of items in the api response envelope.
+
+    Returned by views in place of a rest framework Response,
+    it skips the renderer, content is always json.
+    """
+
+    def __init__(
+        self, items: Iterable, serialize: Callable[[list], list],
+        request=None, status: int = 200, message: str = None,
+        chunk_size: int = None, **kwargs
+    ):
+        kwargs.setdefault('content_type', ApiRenderer.media_type)
+        super().__init__(
+            stream_envelope(
+                items, serialize, request, str(status), message, chunk_size,
+                compact=is_compact(request)),
+            status=status, **kwargs
+        )
+        patch_vary_headers(self, (ENVELOPE_HEADER,))
+
+
+def stream_ndjson(
+    items: Iterable, serialize: Callable[[list], list], request=None,
+    status: str = '200', message: str = None, chunk_size: int = None,
+    compact: bool = False
+) -> Iterator[bytes]:
+    """
+    Yield the envelope line of NDJSONRenderer, then the lines
+    of items, serializing chunk_size items at a time
+    """
+    renderer = NDJSONRenderer()
+    yield renderer.render_meta(request, status, message, compact=compact)
+
+    for rows in serialize_chunks(items, serialize, chunk_size, compact):
+        yield renderer.render_rows(rows)
+
+
+class NDJSONListMixin(object):
+    """
+    List view that can also respond with newline delimited json, asked
+    for with `Accept: application/x-ndjson`, `?format=ndjson` or a
+    .ndjson format suffix. Ndjson lists are streamed without pagination.
+    """
+
+    def get_renderers(self):
+        return [*super().get_renderers(), NDJSONRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != NDJSONRenderer.format:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        serializer = self.get_serializer(many=True)
+        response = StreamingHttpResponse(
+            stream_ndjson(
+                queryset.iterator(chunk_size=chunk_size),
+                serializer.to_representation, request=request,
+                chunk_size=chunk_size, compact=is_compact(request)
+            ),
+            content_type=NDJSONRenderer.media_type
+        )
+        patch_vary_headers(response, (ENVELOPE_HEADER,))
+        return response
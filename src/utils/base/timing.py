@@ -0,0 +1,223 @@
+"""
+Per request timing of the phases of api requests, sent in a
+Server-Timing header to staff and api key callers and recorded
+in an in-process histogram.
+
+    Server-Timing: auth;dur=0.8, perm;dur=2.1, db;dur=3.4;desc="3 queries",
+        view;dur=9.7, render;dur=0.6, total;dur=12.9
+
+ServerTimingMiddleware times the request and its queries,
+ServerTimingMixin the authentication, permissions and handler of a
+view, and ApiRenderer its rendering. Phases overlap, db time is also
+part of the phase that ran the queries.
+"""
+
+import math
+import threading
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional
+
+from django.db import connections
+
+# Phases in the order they are sent
+PHASES = ('auth', 'perm', 'db', 'view', 'render', 'total')
+
+
+class RequestTimer:
+    """Durations of the phases of a request, in seconds"""
+
+    __slots__ = ('durations', 'queries')
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.queries = 0
+
+    def add(self, phase: str, duration: float):
+        self.durations[phase] = self.durations.get(phase, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing queries"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', perf_counter() - start)
+
+    def get_header(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        metrics = []
+        for phase in PHASES:
+            if phase in self.durations:
+                metric = f'{phase};dur={self.durations[phase] * 1000:.1f}'
+                if phase == 'db':
+                    metric += f';desc="{self.queries} queries"'
+                metrics.append(metric)
+        return ', '.join(metrics)
+
+
+# Timer of the request in progress
+request_timer: ContextVar[Optional[RequestTimer]] = ContextVar(
+    'request_timer', default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Add the time spent in the block to phase of the request timer,
+    does nothing outside a timed request
+    """
+    timer = request_timer.get()
+    if timer is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, perf_counter() - start)
+
+
+class TimingHistogram:
+    """
+    Counts of phase durations by view, in buckets doubling in size
+    from 0.5ms. Durations over the last bucket are counted in it.
+    """
+
+    def __init__(self, buckets: int = 16, first: float = 0.0005):
+        self.buckets = buckets
+        self.first = first
+        self.counts: Dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, duration: float) -> int:
+        if duration <= self.first:
+            return 0
+        bucket = math.ceil(math.log2(duration / self.first))
+        return min(bucket, self.buckets - 1)
+
+    def get_bound(self, bucket: int) -> float:
+        """Upper bound of bucket in seconds"""
+        return self.first * 2 ** bucket
+
+    def record(self, view: str, timer: RequestTimer):
+        with self.lock:
+            for phase, duration in timer.durations.items():
+                counts = self.counts.get((view, phase))
+                if counts is None:
+                    counts = self.counts[(view, phase)] = [0] * self.buckets
+                counts[self.get_bucket(duration)] += 1
+
+    def quantile(self, view: str, phase: str, q: float) -> Optional[float]:
+        """
+        Upper bound in seconds of the bucket holding the q quantile
+        of the durations of phase, None when nothing was recorded
+        """
+        with self.lock:
+            counts = list(self.counts.get((view, phase), ()))
+
+        total = sum(counts)
+        if not total:
+            return None
+
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= q * total:
+                return self.get_bound(bucket)
+
+    def snapshot(self) -> Dict[str, Dict[str, list]]:
+        """Copy of the counts, by view then phase"""
+        with self.lock:
+            snapshot = {}
+            for (view, phase), counts in self.counts.items():
+                snapshot.setdefault(view, {})[phase] = list(counts)
+            return snapshot
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+
+timing_histogram = TimingHistogram()
+
+
+def can_see_timing(request) -> bool:
+    """Check if the caller is staff or used a valid api key"""
+    if getattr(request, 'project_api_key', None) is not None:
+        return True
+
+    user = getattr(request, 'user', None)
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    return bool(getattr(user, 'staff', False) or getattr(user, 'admin', False))
+
+
+class ServerTimingMiddleware:
+    """
+    Time requests and their database queries, record the durations
+    in timing_histogram and send them to staff and api key callers
+    in a Server-Timing header.
+
+    Queries are counted with a database execute wrapper, so it
+    works without DEBUG. Queries of streamed content run after the
+    response is returned and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = request_timer.set(timer)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            request_timer.reset(token)
+        timer.add('total', perf_counter() - start)
+
+        match = getattr(request, 'resolver_match', None)
+        timing_histogram.record(
+            match.view_name if match is not None else '', timer)
+
+        if can_see_timing(request):
+            response.headers['Server-Timing'] = timer.get_header()
+        return response
+
+
+class ServerTimingMixin(object):
+    """
+    Api view mixin timing authentication, permission checks
+    and the handler of the request
+    """
+
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('perm'):
+            super().check_object_permissions(request, obj)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # The handler runs next, ended in finalize_response
+        self.timing_start = perf_counter()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        start = getattr(self, 'timing_start', None)
+        timer = request_timer.get()
+        if start is not None and timer is not None:
+            timer.add('view', perf_counter() - start)
+        return super().finalize_response(request, response, *args, **kwargs)
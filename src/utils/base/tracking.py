@@ -0,0 +1,115 @@
+"""
+Tracking code lookups of BaseModelTracker models, resolved to the
+primary key through the cache so detail requests read the row by its
+primary key instead of scanning the wide tracking_code index.
+
+Codes without a row are cached too, for a shorter time, so repeated
+requests for a missing code do not reach the database.
+"""
+
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.postgres.indexes import HashIndex
+from django.core.cache import cache
+from django.db import models
+from django.http import Http404
+
+# Cached in place of the pk of codes without a row
+MISSING = ''
+
+
+def get_tracking_key(model, code: str) -> str:
+    return f'tracking:{model._meta.label_lower}:{code}'
+
+
+def cache_tracking_pk(model, code: str, pk):
+    cache.set(
+        get_tracking_key(model, code), pk,
+        timeout=settings.TRACKING_CODE_CACHE_TIMEOUT)
+
+
+def get_tracking_pk(model, code: str, using: str = None) -> Optional[object]:
+    """Pk of the row of model with tracking code, None if there is none"""
+    key = get_tracking_key(model, code)
+    pk = cache.get(key)
+    if pk is not None:
+        return None if pk == MISSING else pk
+
+    # Base manager, rows hidden by a manager still have their code
+    pk = model._base_manager.db_manager(using).filter(
+        tracking_code=code).values_list('pk', flat=True).first()
+    if pk is None:
+        cache.set(
+            key, MISSING, timeout=settings.TRACKING_CODE_MISSING_TIMEOUT)
+    else:
+        cache_tracking_pk(model, code, pk)
+    return pk
+
+
+def get_by_tracking_code(queryset: models.QuerySet, code: str):
+    """
+    Object of queryset with tracking code, reading the row by its
+    cached pk. Raises DoesNotExist like queryset.get.
+    """
+    model = queryset.model
+    pk = get_tracking_pk(model, code, queryset.db)
+    if pk is None:
+        raise model.DoesNotExist(
+            f'{model._meta.object_name} matching query does not exist.')
+
+    try:
+        obj = queryset.get(pk=pk)
+    except model.DoesNotExist:
+        cache.delete(get_tracking_key(model, code))
+        raise
+
+    # Pks of deleted rows can be reused
+    if obj.tracking_code != code:
+        cache.delete(get_tracking_key(model, code))
+        raise model.DoesNotExist(
+            f'{model._meta.object_name} matching query does not exist.')
+    return obj
+
+
+def tracking_code_hash_index(name: str) -> HashIndex:
+    """
+    Postgres hash index on tracking_code, for Meta.indexes of models
+    on Postgres. It holds a 4 byte hash of each code, smaller than
+    the btree of the unique constraint, and only serves equality.
+    """
+    return HashIndex(fields=['tracking_code'], name=name)
+
+
+class TrackingCodeQuerySet(models.QuerySet):
+
+    def get_tracking_pk(self, code: str):
+        return get_tracking_pk(self.model, code, self.db)
+
+    def get_by_tracking_code(self, code: str):
+        return get_by_tracking_code(self, code)
+
+
+TrackingCodeManager = models.Manager.from_queryset(TrackingCodeQuerySet)
+
+
+class TrackingCodeLookupMixin(object):
+    """
+    Generic view mixin getting the object of the tracking code
+    in the url through its cached pk
+    """
+
+    lookup_field = 'tracking_code'
+
+    def get_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            obj = get_by_tracking_code(
+                queryset, self.kwargs[lookup_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj